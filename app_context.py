@@ -0,0 +1,136 @@
+"""Datos de la app compartidos por las secciones.
+
+`app.py` pinta la página y después importa este módulo y sólo la sección
+elegida (`section_*.py`): cada sección trae sus propias dependencias
+(plotly, reportlab, índices) y cálculos. Aquí quedan la carga de datos con
+recarga en segundo plano y lo que usan varias secciones: las tablas
+canónicas, la base SQLite y las vistas precalculadas, armadas la primera
+vez que una sección las pide.
+"""
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import pandas as pd
+import streamlit as st
+
+from dashboard import DASHBOARD_FILENAME, read_dashboard
+from data_source import gsheets_client, gsheets_credentials, load_sheets, source_signature
+from profiling import span
+from reloader import SourceWatcher
+from result_cache import ResultCache, freeze
+from schema import canonical_sheets
+from snapshot import SNAPSHOT_DIRNAME, file_stamp
+import storage_sqlite
+
+
+@st.cache_resource(show_spinner="Cargando datos...", on_release=SourceWatcher.stop)
+def data_watcher(xls_path: Path) -> SourceWatcher:
+    """The loaded data, shared by every session and swapped in the background when the source changes."""
+    creds_dict = gsheets_credentials(st.secrets)
+    client = None
+    if creds_dict:
+        try:
+            client = gsheets_client(creds_dict)
+        except Exception:
+            # load_sheets reports the error and falls back to the local files
+            pass
+    return SourceWatcher(
+        lambda: load_sheets(xls_path, creds_dict, client),
+        lambda: source_signature(xls_path, creds_dict, client),
+        # A failed reload keeps serving the previous data
+        accept=lambda result: "tbl_bitacora" in result[0],
+    ).start()
+
+
+def data_update_check(watcher: SourceWatcher, generation: int):
+    """Rerun the session once the watcher has swapped in newer data."""
+    if watcher.generation != generation:
+        st.rerun()
+
+
+@st.cache_resource(max_entries=1)
+def open_database(db_path: Path, data_version: str, _canon: Callable[[], Dict[str, pd.DataFrame]]):
+    """Connection to the SQLite backend, re-imported (from `_canon()`) only when it holds other data."""
+    with span("open_database"):
+        con = storage_sqlite.connect(db_path)
+        storage_sqlite.ensure_current(con, _canon, data_version)
+    return con
+
+
+@st.cache_resource(max_entries=1)
+def load_canonical(data_version: str, _sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Sheets resolved to canonical typed frames, once per data version. Treat as read-only."""
+    with span("canonical_sheets"):
+        return canonical_sheets(_sheets)
+
+
+@st.cache_resource(max_entries=1)
+def load_dashboard(snap_dir: Path, data_version: str, stamp: str) -> Optional[dict]:
+    """Precomputed default views of this data version (reread when the file changes)."""
+    with span("read_dashboard"):
+        return read_dashboard(snap_dir, data_version)
+
+
+@st.cache_resource
+def result_cache() -> ResultCache:
+    """Section results of every session (LRU, capped at result_cache.MAX_BYTES)."""
+    return ResultCache()
+
+
+class AppContext:
+    """One script run's view of the loaded data; the derived tables are built on first use."""
+
+    def __init__(self, workspace: Path, sheets: Dict[str, pd.DataFrame], data_version: Optional[str]):
+        self.workspace = workspace
+        self.sheets = sheets
+        self.data_version = data_version
+        self._live = {}
+
+    def dashboard(self) -> Optional[dict]:
+        """Default views precomputed for this data version by `python precompute.py` (None if not run)."""
+        if "dash" not in self._live:
+            self._live["dash"] = None
+            if self.data_version:
+                snap_dir = self.workspace / SNAPSHOT_DIRNAME
+                stamp = file_stamp(snap_dir / self.data_version / DASHBOARD_FILENAME)
+                self._live["dash"] = load_dashboard(snap_dir, self.data_version, stamp)
+        return self._live["dash"]
+
+    def memo(self, name: str, filters, compute: Callable[[], Any]) -> Any:
+        """compute() once per data version and filter values (see result_cache); treat the result as read-only."""
+        with span(name) as step:
+            if not self.data_version:
+                return compute()
+            step["cached"] = True
+
+            def timed_compute():
+                step["cached"] = False
+                return compute()
+
+            return result_cache().get_or_compute((name, self.data_version, freeze(filters)), timed_compute)
+
+    def canon(self) -> Dict[str, pd.DataFrame]:
+        # The default views of a precomputed data version are served without the canonical tables
+        if "canon" not in self._live:
+            # Column resolution and parsing happen once per data load
+            self._live["canon"] = load_canonical(self.data_version, self.sheets) if self.data_version else canonical_sheets(self.sheets)
+        return self._live["canon"]
+
+    def has_table(self, name: str) -> bool:
+        """Whether the sheets resolved to this canonical table (asked to SQLite when present)."""
+        db = self.db()
+        return storage_sqlite.has_table(db, name) if db is not None else name in self.canon()
+
+    def db(self):
+        # SQLite backend (opt-in: created with `python storage_sqlite.py`). When present the KPI
+        # totals and the Confiabilidad events are queried by date/equipment in SQL; the canonical
+        # tables are only built to re-import a database that holds another data version.
+        if "db" not in self._live:
+            self._live["db"] = None
+            db_path = self.workspace / storage_sqlite.DB_FILENAME
+            if db_path.exists() and self.data_version:
+                try:
+                    self._live["db"] = open_database(db_path, self.data_version, self.canon)
+                except Exception as e:
+                    st.warning(f"No se pudo usar la base SQLite ({e}); se usan los datos en memoria.")
+        return self._live["db"]
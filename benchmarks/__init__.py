@@ -0,0 +1 @@
+"""Benchmarks de rendimiento (`python -m benchmarks.<nombre>`)."""
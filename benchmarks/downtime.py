@@ -0,0 +1,60 @@
+"""Benchmark: detención por fila (apply) vs motor columnar.
+
+    python -m benchmarks.downtime                  # 1.000.000 filas
+    python -m benchmarks.downtime --rows 200000 --legacy-rows 5000
+
+La bitácora sale de `benchmarks.synthetic` (la misma de `benchmarks.pipeline`).
+La versión fila a fila es muy lenta sobre 1M de filas, así que se mide
+sobre una muestra (`--legacy-rows`) y se extrapola; la misma muestra se usa
+para verificar que ambos cálculos entregan el mismo resultado. Se miden los
+dos caminos por separado: la columna "Detención (min.)" y, sin ella, el
+cálculo desde "Inicio detención"/"Fin detención".
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks.synthetic import synthetic_sheets
+from kpi import compute_downtime_minutes, downtime_minutes
+
+# The two paths of compute_downtime_minutes: the numeric minutes column, and
+# max(Fin - Inicio, 0) when there is no minutes column (older workbooks)
+PATHS = [
+    ("columna numérica", ("Detención (min.)", "Inicio detención", "Fin detención")),
+    ("respaldo Inicio/Fin", (None, "Inicio detención", "Fin detención")),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=20_000)
+    args = parser.parse_args()
+
+    df = synthetic_sheets(args.rows, sheets=["tbl_bitacora"])["tbl_bitacora"]
+    sample = df.head(args.legacy_rows)
+    print(f"Filas: {len(df):,}  (apply extrapolado desde {len(sample):,} filas)")
+
+    same = True
+    for path, cols in PATHS:
+        t0 = time.perf_counter()
+        legacy = sample.apply(lambda r: compute_downtime_minutes(r, *cols), axis=1)
+        legacy_s = (time.perf_counter() - t0) * len(df) / len(sample)
+
+        t0 = time.perf_counter()
+        fast = downtime_minutes(df, *cols)
+        fast_s = time.perf_counter() - t0
+
+        ok = bool(np.allclose(fast.head(len(sample)).to_numpy(), legacy.to_numpy(dtype=float), equal_nan=True))
+        same &= ok
+        print(f"{path} (det={cols[0]!r} inicio={cols[1]!r} fin={cols[2]!r})")
+        print(f"  apply fila a fila: {legacy_s:8.2f} s")
+        print(f"  motor columnar:    {fast_s:8.2f} s")
+        print(f"  aceleración:       {legacy_s / fast_s:8.1f}x")
+        print(f"  resultados iguales en la muestra: {ok}")
+    if not same:
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
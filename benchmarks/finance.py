@@ -0,0 +1,134 @@
+"""Benchmark: desglose mensual de gastos fila a fila (iterrows) vs ledger columnar.
+
+    python -m benchmarks.finance                   # OM de 50.000 filas (escala de 1.000.000 de eventos)
+    python -m benchmarks.finance --events 400000
+
+Las hojas OM, Otros_Gastos y Presupuesto salen de `benchmarks.synthetic`
+(una OM cada ~20 eventos). Mide lo que hace "Control Presupuestario" al elegir un año y un mes: los
+totales mensuales por categoría (`actuals`) y la tabla "Desglose Detallado
+de Gastos". La versión anterior limpiaba montos con `apply(clean_currency)`
+y armaba ambas listas con `iterrows` en cada selección; la nueva construye el
+ledger (melt y concat) una vez por carga y luego solo filtra columnas. Se
+verifica que ambas entregan las mismas filas.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_sheets
+from finance import BUDGET, SpendCube, build_ledger, clean_currency
+from schema import OM, OTROS_GASTOS, PRESUPUESTO, canonical_sheets, find_column, from_days
+
+def legacy_breakdown(sheets: dict, year: int, month: int):
+    """Monthly actuals and the detail of one month as the section built them before."""
+    df_om, df_otros = sheets["OM"].copy(), sheets["Otros_Gastos"].copy()
+    om_date_col = find_column(df_om, ["fecha entrada", "fecha inicio", "date"])
+    om_rep_col = find_column(df_om, ["costo repuestos", "repuestos"])
+    om_serv_col = find_column(df_om, ["costo servicios", "servicios"])
+    og_date_col = find_column(df_otros, ["fecha", "date"])
+    og_amount_col = find_column(df_otros, ["monto", "amount", "valor"])
+    og_cat_col = find_column(df_otros, ["categoria", "category", "tipo"])
+
+    actuals = []
+    for df, col in ((df_om, om_date_col), (df_otros, og_date_col)):
+        df["_date"] = pd.to_datetime(df[col], errors="coerce", dayfirst=True)
+        df["_year"] = df["_date"].dt.year
+        df["_month"] = df["_date"].dt.month
+    df_om_year = df_om[df_om["_year"] == year].copy()
+    for col, cat in ((om_rep_col, "Repuestos y Mat."), (om_serv_col, "Contratistas")):
+        df_om_year[col] = df_om_year[col].apply(clean_currency)
+        for _, r in df_om_year.groupby("_month")[col].sum().reset_index().iterrows():
+            actuals.append({"Month": r["_month"], "Category": cat, "Amount": r[col]})
+    df_otros_year = df_otros[df_otros["_year"] == year].copy()
+    df_otros_year[og_amount_col] = df_otros_year[og_amount_col].apply(clean_currency)
+    for _, r in df_otros_year.groupby(["_month", og_cat_col])[og_amount_col].sum().reset_index().iterrows():
+        actuals.append({"Month": r["_month"], "Category": r[og_cat_col], "Amount": r[og_amount_col]})
+
+    details = []
+    om_month = df_om[(df_om["_year"] == year) & (df_om["_month"] == month)].copy()
+    om_month[om_rep_col] = om_month[om_rep_col].apply(clean_currency)
+    om_month[om_serv_col] = om_month[om_serv_col].apply(clean_currency)
+    for _, row in om_month.iterrows():
+        for col, cat in ((om_rep_col, "Repuestos y Mat."), (om_serv_col, "Contratistas")):
+            if row[col] > 0:
+                details.append({"Fecha": row["_date"].strftime("%d/%m/%Y"), "Origen": f"OM {row['N° Orden']}",
+                                "Descripción": row["Descripción"], "Categoría": cat, "Monto": row[col]})
+    og_month = df_otros[(df_otros["_year"] == year) & (df_otros["_month"] == month)].copy()
+    og_month[og_amount_col] = og_month[og_amount_col].apply(clean_currency)
+    for _, row in og_month.iterrows():
+        if row[og_amount_col] > 0:
+            details.append({"Fecha": row["_date"].strftime("%d/%m/%Y"), "Origen": "Otros Gastos",
+                            "Descripción": row["Descripción"], "Categoría": row[og_cat_col], "Monto": row[og_amount_col]})
+    return pd.DataFrame(actuals), pd.DataFrame(details).sort_values("Fecha")
+
+
+def build_tables(sheets: dict):
+    """Ledger and spend cube, built once per data load in the dashboard."""
+    canon = canonical_sheets(sheets)
+    ledger = build_ledger(canon.get(OM), canon.get(OTROS_GASTOS), canon.get(PRESUPUESTO))
+    return ledger, SpendCube.build(ledger)
+
+
+def columnar_breakdown(ledger: pd.DataFrame, cube: SpendCube, year: int, month: int):
+    """The same two tables from the ledger and the spend cube."""
+    actuals = cube.actuals(year)
+    month_rows = ledger[(ledger["anio"] == year) & (ledger["mes"] == month) & (ledger["fuente"] != BUDGET) & (ledger["monto"] > 0)]
+    details = pd.DataFrame({
+        "Fecha": from_days(month_rows["dia"]).dt.strftime("%d/%m/%Y"),
+        "Origen": month_rows["origen"].astype(object),
+        "Descripción": month_rows["descripcion"],
+        "Categoría": month_rows["categoria"].astype(object),
+        "Monto": month_rows["monto"],
+    }).reset_index(drop=True)
+    return actuals, details.sort_values("Fecha")
+
+
+def _same_actuals(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    key = ["Month", "Category"]
+    a = a.groupby(key)["Amount"].sum()
+    b = b.groupby(key)["Amount"].sum()
+    a, b = a[a != 0], b[b != 0]
+    return a.index.equals(b.index) and np.allclose(a.to_numpy(), b.to_numpy())
+
+
+def _same_details(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    # Blank categories are missing on both sides; DataFrame.equals treats them as equal
+    return a.reset_index(drop=True).astype(object).equals(b.reset_index(drop=True).astype(object))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000, help="escala de benchmarks.synthetic (OM = eventos / 20)")
+    parser.add_argument("--year", type=int, default=2025)
+    parser.add_argument("--month", type=int, default=6)
+    args = parser.parse_args()
+
+    sheets = synthetic_sheets(args.events, sheets=["OM", "Otros_Gastos", "Presupuesto"])
+    print(f"OM: {len(sheets['OM']):,} filas  Otros_Gastos: {len(sheets['Otros_Gastos']):,} filas  mes {args.month}/{args.year}")
+
+    t0 = time.perf_counter()
+    old_actuals, old_details = legacy_breakdown(sheets, args.year, args.month)
+    legacy_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    ledger, cube = build_tables(sheets)
+    build_s = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    new_actuals, new_details = columnar_breakdown(ledger, cube, args.year, args.month)
+    fast_s = time.perf_counter() - t0
+
+    same = _same_actuals(old_actuals, new_actuals) and _same_details(old_details, new_details)
+    print(f"iterrows + apply (cada selección): {legacy_s:8.3f} s")
+    print(f"ledger + cubo (una vez por carga): {build_s:8.3f} s")
+    print(f"consulta columnar (cada selección): {fast_s:8.3f} s")
+    print(f"aceleración por selección:          {legacy_s / fast_s:8.1f}x")
+    print(f"detalle del mes: {len(new_details):,} filas; resultados iguales: {same}")
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""Benchmark: etapas del tablero sobre datos sintéticos, con registro por commit.
+
+    python -m benchmarks.pipeline                                  # 1.000.000 de eventos, 300 equipos, 3 años
+    python -m benchmarks.pipeline --events 100000 --assets 100 --years 2
+    python -m benchmarks.pipeline --check                          # falla si alguna etapa empeora
+    python -m benchmarks.pipeline --compare 6ec1749 HEAD           # sólo compara resultados guardados
+
+Genera los datos con `benchmarks.synthetic` (una vez por escala y semilla,
+en `.benchmarks/data/`) y mide cada etapa tal como la ejecutan la app y
+precompute.py: carga con `load_sheets` (sin y con snapshot), tablas
+canónicas, cubo y disponibilidad del KPI con los filtros por defecto,
+resumen y Pareto de Confiabilidad, libro y cubo de gastos del Presupuesto, y
+el índice y las consultas de la Bitácora. De cada etapa se guarda el mejor
+tiempo de `--repeat` corridas y el pico de memoria asignada por Python y
+numpy (tracemalloc, en una corrida aparte para no inflar los tiempos; no
+cuenta los buffers de Arrow/Parquet), más la memoria máxima del proceso.
+
+Cada corrida se agrega a `.benchmarks/pipeline.jsonl` con el commit, la
+escala y las versiones de Python/pandas/numpy, y se compara con la última
+corrida guardada de la misma escala en otro commit (o con `--baseline`).
+"""
+from pathlib import Path
+from typing import Callable, List, NamedTuple, Optional
+import argparse
+import datetime
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.search import QUERIES
+from benchmarks.synthetic import GENERATOR_VERSION, synthetic_sheets, write_workspace
+from dashboard import dated_events, kpi_cube, kpi_default_equips, kpi_default_range, master_frame, pareto_table, reliability_default_types, reliability_frame
+from data_source import load_sheets
+from finance import SpendCube, build_ledger, expense_lines
+from profiling import peak_rss_mb
+from reliability import equipment_summary
+from schema import OM, OTROS_GASTOS, PRESUPUESTO, canonical_sheets
+from search_index import SearchIndex
+from snapshot import SNAPSHOT_DIRNAME
+
+ROOT = Path(__file__).resolve().parent.parent
+RESULTS_DIR = ROOT / ".benchmarks"
+
+
+class Stage(NamedTuple):
+    name: str
+    run: Callable[[dict], None]
+    # Untimed, before every run (e.g. removing the snapshot for a cold load)
+    prepare: Optional[Callable[[dict], None]] = None
+
+
+def _drop_snapshot(state: dict):
+    shutil.rmtree(state["xls_path"].parent / SNAPSHOT_DIRNAME, ignore_errors=True)
+
+
+def _load(state: dict):
+    state["sheets"], _, state["data_version"], _ = load_sheets(state["xls_path"])
+
+
+def _canonical(state: dict):
+    state["canon"] = canonical_sheets(state["sheets"])
+
+
+def _kpi_cube(state: dict):
+    state["cube"] = kpi_cube(state["canon"])
+
+
+def _kpi_totals(state: dict):
+    # Default view, then the whole history of every equipment
+    cube = state["cube"]
+    mask = cube.select(kpi_default_equips(master_frame(state["sheets"])))
+    first, last = cube.event_bounds(mask)
+    cube.totals(*kpi_default_range(first, last), mask)
+    all_mask = cube.select(None)
+    cube.totals(*cube.event_bounds(all_mask), all_mask)
+
+
+def _reliability(state: dict):
+    df_rel, type_col, _, _ = reliability_frame(state["canon"])
+    if type_col:
+        df_rel = df_rel[df_rel[type_col].isin(reliability_default_types(sorted(df_rel[type_col].dropna().unique())))]
+    df_gen = dated_events(df_rel)
+    equipment_summary(df_gen, "equipo")
+    pareto_table(df_gen, "equipo", by_downtime=True)
+    pareto_table(df_gen, "equipo", by_downtime=False)
+
+
+def _budget(state: dict):
+    canon = state["canon"]
+    ledger = build_ledger(canon.get(OM), canon.get(OTROS_GASTOS), canon.get(PRESUPUESTO))
+    cube = SpendCube.build(ledger)
+    for year in cube.budget_years:
+        cube.actuals(year)
+        cube.burn_rate(year, 12)
+        for month in range(1, 13):
+            expense_lines(ledger, year, month)
+    cube.monthly_spend(cube.budget_years)
+
+
+def _search_index(state: dict):
+    state["index"] = SearchIndex.build(state["sheets"]["tbl_bitacora"])
+
+
+def _search_queries(state: dict):
+    for query in QUERIES:
+        state["index"].search(query)
+
+
+STAGES = [
+    Stage("carga sin snapshot", _load, _drop_snapshot),
+    Stage("carga con snapshot", _load),
+    Stage("tablas canónicas", _canonical),
+    Stage("KPI: cubo", _kpi_cube),
+    Stage("KPI: disponibilidad", _kpi_totals),
+    Stage("Confiabilidad", _reliability),
+    Stage("Presupuesto", _budget),
+    Stage("Bitácora: índice", _search_index),
+    Stage("Bitácora: consultas", _search_queries),
+]
+
+
+def measure(stage: Stage, state: dict, repeat: int, memory: bool) -> dict:
+    """Best of `repeat` timed runs and, if asked, the allocation peak of one more run."""
+    times = []
+    for _ in range(repeat):
+        if stage.prepare:
+            stage.prepare(state)
+        t0 = time.perf_counter()
+        stage.run(state)
+        times.append(time.perf_counter() - t0)
+    out = {"s": min(times)}
+    if memory:
+        if stage.prepare:
+            stage.prepare(state)
+        tracemalloc.start()
+        stage.run(state)
+        out["peak_mb"] = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return out
+
+
+def git_commit() -> dict:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def load_results(path: Path) -> List[dict]:
+    if not path.exists():
+        return []
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines() if line.strip()]
+
+
+def find_run(runs: List[dict], ref: str, scale: Optional[dict] = None) -> Optional[dict]:
+    """Latest stored run of a commit (prefix, or HEAD) at this scale, if any."""
+    if ref == "HEAD":
+        ref = git_commit()["commit"] or ""
+    for run in reversed(runs):
+        if (run.get("commit") or "").startswith(ref) and (scale is None or run["scale"] == scale):
+            return run
+    return None
+
+
+def _mb(result: dict) -> str:
+    return f"{result['peak_mb']:10.1f}" if "peak_mb" in result else f"{'–':>10}"
+
+
+def compare(base: dict, new: dict, threshold: float) -> List[str]:
+    """Prints both runs side by side; returns the stages slower than base by more than threshold."""
+    def label(run):
+        return f"{run['commit']}{'+' if run['dirty'] else ''}"
+
+    print(f"\nComparación {label(base)} ({base['date']}) -> {label(new)} ({new['date']}), escala {new['scale']}:")
+    print(f"{'etapa':24} {'antes (s)':>10} {'ahora (s)':>10} {'cambio':>8}  {'antes (MB)':>10} {'ahora (MB)':>10}")
+    slower = []
+    for name, now in new["stages"].items():
+        before = base["stages"].get(name)
+        if before is None:
+            print(f"{name:24} {'–':>10} {now['s']:10.3f}")
+            continue
+        change = now["s"] / before["s"] - 1 if before["s"] else 0.0
+        flag = ""
+        # Sub-10 ms stages are mostly noise
+        if change > threshold and now["s"] - before["s"] > 0.01:
+            slower.append(name)
+            flag = "  más lento"
+        print(f"{name:24} {before['s']:10.3f} {now['s']:10.3f} {change:+8.0%}  {_mb(before)} {_mb(now)}{flag}")
+    return slower
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--assets", type=int, default=300)
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="corridas por etapa (se guarda la mejor)")
+    parser.add_argument("--no-memory", action="store_true", help="no medir el pico de memoria")
+    parser.add_argument("--results", type=Path, default=RESULTS_DIR / "pipeline.jsonl")
+    parser.add_argument("--baseline", help="commit con el cual comparar (por defecto, la última corrida de otro commit)")
+    parser.add_argument("--threshold", type=float, default=0.15, help="empeoramiento tolerado (0.15 = 15%%)")
+    parser.add_argument("--check", action="store_true", help="terminar con error si alguna etapa empeora más que --threshold")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "AHORA"), help="sólo comparar dos commits ya medidos")
+    args = parser.parse_args()
+
+    scale = {"events": args.events, "assets": args.assets, "years": args.years, "seed": args.seed}
+    runs = load_results(args.results)
+    if args.compare:
+        base, new = (find_run(runs, ref, scale) for ref in args.compare)
+        if base is None or new is None:
+            print(f"No hay corridas guardadas de {args.compare[0] if base is None else args.compare[1]} con la escala {scale}.")
+            sys.exit(1)
+        slower = compare(base, new, args.threshold)
+        sys.exit(1 if args.check and slower else 0)
+
+    data_dir = RESULTS_DIR / "data" / f"v{GENERATOR_VERSION}-{args.events}-{args.assets}-{args.years}-{args.seed}"
+    xls_path = data_dir / "BBDD_MANTENCION.xlsm"
+    if not (data_dir / "tbl_bitacora.csv").exists():
+        t0 = time.perf_counter()
+        write_workspace(synthetic_sheets(args.events, args.assets, args.years, args.seed), data_dir)
+        print(f"Datos sintéticos generados en {data_dir} ({time.perf_counter() - t0:.1f} s)")
+
+    state = {"xls_path": xls_path}
+    stages = {}
+    print(f"Escala: {args.events:,} eventos, {args.assets} equipos, {args.years} años (semilla {args.seed})")
+    print(f"{'etapa':24} {'tiempo (s)':>10} {'pico (MB)':>10}")
+    for stage in STAGES:
+        stages[stage.name] = measure(stage, state, max(args.repeat, 1), not args.no_memory)
+        print(f"{stage.name:24} {stages[stage.name]['s']:10.3f} {_mb(stages[stage.name])}")
+    # None where the platform does not report it (Windows)
+    rss_mb = peak_rss_mb()
+    if rss_mb is not None:
+        print(f"Memoria máxima del proceso: {rss_mb:,.0f} MB")
+
+    run = {
+        **git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "scale": scale,
+        "versions": {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__},
+        "stages": stages,
+        "max_rss_mb": rss_mb,
+    }
+    if args.baseline:
+        base = find_run(runs, args.baseline, scale)
+        if base is None:
+            print(f"No hay corridas guardadas de {args.baseline} con esta escala.")
+    else:
+        base = next((r for r in reversed(runs) if r["scale"] == scale and r["commit"] != run["commit"]), None)
+    slower = compare(base, run, args.threshold) if base else []
+
+    if not args.no_save:
+        args.results.parent.mkdir(parents=True, exist_ok=True)
+        with args.results.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(run, ensure_ascii=False) + "\n")
+        print(f"\nResultado guardado en {args.results}")
+    if args.check and slower:
+        print(f"Etapas más lentas que {base['commit']} (> {args.threshold:.0%}): {', '.join(slower)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
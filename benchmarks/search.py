@@ -0,0 +1,74 @@
+"""Benchmark: búsqueda en la Bitácora, recorrido de celdas vs índice de trigramas.
+
+    python -m benchmarks.search                    # 1.000.000 filas
+    python -m benchmarks.search --rows 200000 --legacy-rows 50000
+
+La bitácora sale de `benchmarks.synthetic` (Observaciones de texto libre,
+casi únicas por fila). El recorrido anterior (`astype(str)` + `str.contains` en todas las columnas)
+se mide sobre una muestra (`--legacy-rows`) y se extrapola. El índice se
+construye una vez y luego se mide cada consulta; sobre la muestra se
+verifica que el índice encuentra las mismas filas que el recorrido sobre el
+texto sin tildes.
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import synthetic_sheets
+from schema import normalize_str
+from search_index import SearchIndex
+
+QUERIES = ["prensa", "rodamiento motor", "equipo:prensa 12", "valvula", "ion", "fuga aceite cilindro", "xyz"]
+
+
+def scan(df: pd.DataFrame, term: str) -> np.ndarray:
+    """The previous search: every cell as text, case-insensitive substring."""
+    return df.astype(str).apply(lambda x: x.str.contains(term, case=False, na=False, regex=False)).any(axis=1).to_numpy()
+
+
+def accent_free(df: pd.DataFrame) -> pd.DataFrame:
+    """Cells through normalize_str (missing cells stay missing), to check the index against scan()."""
+    return df.astype(object).apply(lambda c: c.map(lambda v: v if pd.isna(v) else normalize_str(str(v))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--legacy-rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    df = synthetic_sheets(args.rows, sheets=["tbl_bitacora"])["tbl_bitacora"]
+    sample = df.head(args.legacy_rows)
+    print(f"Filas: {len(df):,}  columnas: {len(df.columns)}")
+
+    t0 = time.perf_counter()
+    index = SearchIndex.build(df)
+    print(f"construir índice:  {time.perf_counter() - t0:8.2f} s ({len(index.words):,} palabras)")
+    sample_index = SearchIndex.build(sample)
+
+    t0 = time.perf_counter()
+    scan(sample, "prensa")
+    legacy_s = (time.perf_counter() - t0) * len(df) / len(sample)
+    print(f"recorrido de celdas por consulta: {legacy_s * 1000:10.1f} ms (extrapolado desde {len(sample):,} filas)")
+
+    plain = accent_free(sample)
+    same = True
+    for query in QUERIES:
+        t0 = time.perf_counter()
+        hits = index.search(query)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"  {query!r:28} {ms:8.1f} ms  {int(hits.sum()):>9,} filas")
+        if ":" not in query:
+            expected = np.ones(len(sample), dtype=bool)
+            for term in query.split():
+                expected &= scan(plain, normalize_str(term))
+            same &= bool(np.array_equal(sample_index.search(query), expected))
+    print(f"resultados iguales en la muestra: {same}")
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
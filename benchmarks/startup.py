@@ -0,0 +1,88 @@
+"""Benchmark: arranque de la app por sección (tiempo al primer elemento).
+
+    python -m benchmarks.startup                       # app.py de este repositorio
+    python -m benchmarks.startup --app otra/app.py --runs 5
+
+Cada medición corre en un intérprete nuevo (como un servidor recién
+iniciado) con `streamlit.testing.v1.AppTest`, con la sección ya elegida en
+`app_tab`. Se mide, desde que empieza la ejecución del script: el primer
+elemento enviado al navegador ("primer elemento"), el final de la ejecución
+con la sección completa ("sección") y una segunda ejecución en el mismo
+proceso, con los cachés llenos ("rerun"). También se listan los módulos
+pesados que quedaron importados. La app usa los datos de su carpeta.
+"""
+from pathlib import Path
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+SECTIONS = ["KPI Dashboard", "Análisis de Confiabilidad", "Control Presupuestario", "Bitácora"]
+# Imports worth seeing: plotting, PDF and components
+HEAVY = ["plotly.express", "plotly.graph_objs._figure", "reportlab.platypus", "streamlit.components.v1"]
+
+
+def measure(app: Path, section: str) -> dict:
+    """One cold start in this process: call through a fresh interpreter."""
+    sys.path.insert(0, str(app.parent))
+    import streamlit.delta_generator as dg
+    from streamlit.testing.v1 import AppTest
+
+    marks = {}
+    enqueue = dg.DeltaGenerator._enqueue
+
+    def timed(self, *args, **kwargs):
+        marks.setdefault("first", time.perf_counter())
+        return enqueue(self, *args, **kwargs)
+
+    dg.DeltaGenerator._enqueue = timed
+    at = AppTest.from_file(str(app), default_timeout=600)
+    # st.secrets must exist, as on the server
+    at.secrets["benchmark"] = "1"
+    at.session_state["app_tab"] = section
+    out = {}
+    for run in ("cold", "rerun"):
+        marks.clear()
+        t0 = time.perf_counter()
+        at.run()
+        out[run] = {"first": marks.get("first", time.perf_counter()) - t0, "total": time.perf_counter() - t0}
+    out["errors"] = [e.value for e in at.exception]
+    out["heavy"] = [m for m in HEAVY if m in sys.modules]
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", type=Path, default=Path(__file__).resolve().parent.parent / "app.py")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    app = args.app.resolve()
+
+    if args.child:
+        print(json.dumps(measure(app, args.child)))
+        return
+
+    print(f"App: {app}  ({args.runs} arranques por sección, mediana)")
+    print(f"{'sección':<28}{'primer elemento':>16}{'sección':>10}{'rerun':>10}  módulos pesados")
+    for section in SECTIONS:
+        results = []
+        for _ in range(args.runs):
+            proc = subprocess.run([sys.executable, "-m", "benchmarks.startup", "--app", str(app), "--child", section],
+                                  capture_output=True, text=True, cwd=Path(__file__).resolve().parent.parent)
+            if proc.returncode:
+                sys.exit(proc.stderr)
+            results.append(json.loads(proc.stdout.strip().splitlines()[-1]))
+        first = statistics.median(r["cold"]["first"] for r in results) * 1000
+        total = statistics.median(r["cold"]["total"] for r in results) * 1000
+        rerun = statistics.median(r["rerun"]["total"] for r in results) * 1000
+        heavy = ", ".join(results[-1]["heavy"]) or "-"
+        print(f"{section:<28}{first:13.0f} ms{total:7.0f} ms{rerun:7.0f} ms  {heavy}")
+        for err in results[-1]["errors"]:
+            print(f"  ERROR: {err}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""Datos sintéticos con el formato de BBDD_MANTENCION (todas las hojas que usa el tablero).
+
+    python -m benchmarks.synthetic --out /tmp/planta                # 1.000.000 de eventos
+    python -m benchmarks.synthetic --out /tmp/planta --events 50000 --assets 120 --years 2
+
+Genera tbl_bitacora, tbl_programacion, OM, Presupuesto, Otros_Gastos y
+maestra_activos con las columnas y formatos del libro real (fechas como
+texto, montos con `$` y puntos de miles, horas `HH:MM:SS`, meses con
+nombre). La misma semilla entrega siempre los mismos datos. Las
+proporciones imitan tbl_bitacora.csv: eventos sólo de lunes a viernes y más
+en el turno 2, ~94% de registros sin detención, detenciones de 5 a 600 min
+y unos pocos equipos con la mayoría de los eventos.
+
+Las demás pruebas de rendimiento (`benchmarks.downtime`, `.search`,
+`.finance`, `.pipeline`) toman sus datos de aquí, así todas miden la misma
+forma de datos.
+
+`--out` deja la carpeta lista para `data_source.load_sheets`: la bitácora
+en `tbl_bitacora.csv` (más de un millón de filas no cabe en una hoja de
+Excel) y las demás hojas en `BBDD_MANTENCION.xlsm`, escrito antes que el
+CSV para que éste cuente como su exportación vigente.
+"""
+from pathlib import Path
+from typing import Collection, Dict, Optional
+import argparse
+import datetime
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Part of the benchmark's data cache key: bump when the generated data changes
+GENERATOR_VERSION = 2
+# Sheet names, in workbook order
+SHEETS = ["tbl_bitacora", "OM", "Presupuesto", "Otros_Gastos", "tbl_programacion", "maestra_activos"]
+MONTHS = ["Enero", "Febrero", "Marzo", "Abril", "Mayo", "Junio", "Julio", "Agosto", "Septiembre", "Octubre", "Noviembre", "Diciembre"]
+# Equipment families and the Grupo their events are logged under
+FAMILIES = [("PRENSA GLT", "Prensas"), ("FINGER", "Finger"), ("MOLDURERA", "Cepillado"), ("CEPILLO", "Cepillado"),
+            ("TROZADORA", "Trozado"), ("Pantografo CNC", "CNC"), ("ENCOLADORA", "Prensas"), ("Nave", "Planta"),
+            ("Sala de bombas", "Planta"), ("Taller", "Taller"), ("Lijadora", "Terminaciones")]
+SPECIALTIES = (["Mecánica", "Eléctrica", "Serv. General", "Neumática", "Hidráulica", "Lubricación"], [0.36, 0.26, 0.2, 0.09, 0.08, 0.01])
+WORDS = ["se", "realizó", "retiro", "cambio", "rodamiento", "correa", "motor", "cuchillos", "cabezal", "petróleo", "grasa",
+         "lubricación", "ajuste", "tensión", "sensor", "válvula", "cilindro", "fuga", "aceite", "eléctrica", "revisión", "repone"]
+OTHER_CATEGORIES = ["Caja chica", "Compras directas", "Servicios externos", "Seguridad", "Capacitación"]
+
+
+def asset_names(assets: int) -> np.ndarray:
+    """`assets` distinct equipment names spread over the families (e.g. "FINGER 3")."""
+    return np.asarray([f"{FAMILIES[i % len(FAMILIES)][0]} {i // len(FAMILIES) + 1}" for i in range(assets)], dtype=object)
+
+
+def _weekdays(start: datetime.date, years: int) -> pd.DatetimeIndex:
+    end = datetime.date(start.year + years, start.month, start.day) - datetime.timedelta(days=1)
+    return pd.bdate_range(start, end)
+
+
+def _clock(minutes: np.ndarray) -> np.ndarray:
+    """Minutes of the day as "HH:MM:00" (one format call per distinct value)."""
+    labels = np.asarray([f"{m // 60:02d}:{m % 60:02d}:00" for m in range(24 * 60)], dtype=object)
+    return labels[minutes]
+
+
+def _amounts(rng: np.random.Generator, values: np.ndarray, blank: float = 0.05) -> np.ndarray:
+    # Mix of the formats seen in the sheets: "$ 25.000", plain numbers and blanks
+    out = values.astype(object)
+    text = rng.random(len(values)) < 0.4
+    out[text] = [f"$ {v:,}".replace(",", ".") for v in values[text]]
+    out[rng.random(len(values)) < blank] = None
+    return out
+
+
+def synthetic_bitacora(days: pd.DatetimeIndex, names: np.ndarray, events: int, rng: np.random.Generator) -> pd.DataFrame:
+    """tbl_bitacora with the columns and value formats of tbl_bitacora.csv."""
+    # A few equipments concentrate most events (heavy-tailed rate per asset)
+    weights = rng.pareto(1.2, len(names)) + 0.05
+    equipo = rng.choice(len(names), events, p=weights / weights.sum())
+    fecha = days[np.sort(rng.integers(0, len(days), events))]
+
+    downtime = np.where(rng.random(events) < 0.06, np.clip(np.round(rng.lognormal(3.6, 0.9, events) / 5) * 5, 5, 600), 0).astype(int)
+    turno = np.where(rng.random(events) < 0.63, 2, 1)
+    start = np.where(turno == 1, rng.integers(0, 9 * 60, events), rng.integers(9 * 60, 24 * 60, events))
+    inicio, fin = _clock(start), _clock((start + downtime) % (24 * 60))
+    blank = rng.random(events) < 0.02
+    inicio[blank] = ""
+    fin[blank] = ""
+
+    words = np.asarray(WORDS, dtype=object)
+    picks = words[rng.integers(0, len(words), (events, 5))]
+    families = np.asarray([g for _, g in FAMILIES], dtype=object)
+    return pd.DataFrame({
+        "Mes": fecha.month,
+        "Fecha": fecha.strftime("%Y-%m-%d"),
+        "Turno": turno,
+        "Ubicación/Equipo": names[equipo],
+        "Especialidad": rng.choice(SPECIALTIES[0], events, p=SPECIALTIES[1]),
+        "Observaciones": [" ".join(p) + f" OT {n}" for p, n in zip(picks, rng.integers(0, 100_000, events))],
+        "Inicio detención": inicio,
+        "Fin detención": fin,
+        "Detención (h)": np.asarray([f"0 days {m // 60:02d}:{m % 60:02d}:00" for m in range(601)], dtype=object)[downtime],
+        "Detención (min.)": downtime,
+        "Grupo": families[equipo % len(FAMILIES)],
+        "ACR o APT": np.where(rng.random(events) < 0.03, rng.choice(["ACR", "APT"], events, p=[0.9, 0.1]), None),
+    })
+
+
+def synthetic_finance(days: pd.DatetimeIndex, names: np.ndarray, events: int, rng: np.random.Generator) -> Dict[str, pd.DataFrame]:
+    """OM, Otros_Gastos and Presupuesto: roughly one work order every 20 events."""
+    om_rows = max(100, events // 20)
+    om_dates = days[rng.integers(0, len(days), om_rows)]
+    repuestos = rng.integers(0, 400, om_rows) * 1000
+    servicios = np.where(rng.random(om_rows) < 0.4, rng.integers(0, 1500, om_rows) * 1000, 0)
+    om = pd.DataFrame({
+        "N° Orden": np.arange(1, om_rows + 1),
+        "Fecha Entrada": om_dates.strftime("%d/%m/%Y"),
+        "Descripción": [f"OT {n} {names[e]}" for n, e in zip(range(1, om_rows + 1), rng.integers(0, len(names), om_rows))],
+        "Costo Repuestos": _amounts(rng, repuestos),
+        "Costo Servicios": _amounts(rng, servicios),
+    })
+    otros_rows = max(30, om_rows // 3)
+    otros_amounts = rng.integers(1, 200, otros_rows) * 500
+    otros = pd.DataFrame({
+        "Fecha": days[rng.integers(0, len(days), otros_rows)].strftime("%d/%m/%Y"),
+        "Categoría": rng.choice(np.asarray(OTHER_CATEGORIES + [None], dtype=object), otros_rows),
+        "Descripción": [f"Gasto {i}" for i in range(1, otros_rows + 1)],
+        "Monto": _amounts(rng, otros_amounts, blank=0.0),
+    })
+
+    # Monthly budget ~10% over the average spend, so the burn rate runs out in some years
+    budget_years = sorted(set(days.year))
+    monthly = (repuestos.sum() + servicios.sum() + otros_amounts.sum()) / (12 * len(budget_years))
+    budget = np.round(monthly * rng.uniform(0.9, 1.3, 12 * len(budget_years)) / 100_000) * 100_000
+    presupuesto = pd.DataFrame({
+        "Año": np.repeat(budget_years, 12),
+        "Mes": MONTHS * len(budget_years),
+        "Monto_Presupuesto": _amounts(rng, budget.astype(np.int64), blank=0.0),
+    })
+    return {"OM": om, "Presupuesto": presupuesto, "Otros_Gastos": otros}
+
+
+def synthetic_sheets(events: int = 1_000_000, assets: int = 300, years: int = 3, seed: int = 0,
+                     start: datetime.date = datetime.date(2023, 1, 1), sheets: Optional[Collection[str]] = None) -> Dict[str, pd.DataFrame]:
+    """Every sheet the dashboard reads (or just `sheets`), `years` years of events from `start`.
+
+    Each group of sheets draws from its own random stream, so a benchmark
+    that asks only for the bitácora or the finance sheets gets exactly the
+    rows the full workbook has.
+    """
+    wanted = set(SHEETS if sheets is None else sheets)
+    rng_master, rng_bitacora, rng_prog, rng_finance = (np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(4))
+    days = _weekdays(start, years)
+    names = asset_names(assets)
+    out = {}
+
+    master = pd.DataFrame({
+        "Equipo": names,
+        "Tipo": np.where(rng_master.random(assets) < 0.85, "Equipo", "Infraestructura"),
+        "Sistema": [f"Sistema {i % 12 + 1}" for i in range(assets)],
+        "Edificio": [f"Nave {i % 5 + 1}" for i in range(assets)],
+    })
+    if "tbl_bitacora" in wanted:
+        out["tbl_bitacora"] = synthetic_bitacora(days, names, events, rng_bitacora)
+    if wanted & {"OM", "Presupuesto", "Otros_Gastos"}:
+        out.update({name: df for name, df in synthetic_finance(days, names, events, rng_finance).items() if name in wanted})
+    if "tbl_programacion" in wanted:
+        # Programmed hours per equipment and day over the last six months (as since 11/2025 in the real sheet)
+        prog_days = days[days >= days[-1] - pd.Timedelta(days=182)]
+        equips = names[master["Tipo"].to_numpy() == "Equipo"]
+        pairs = pd.MultiIndex.from_product([prog_days, equips]).to_frame(index=False)
+        pairs = pairs[rng_prog.random(len(pairs)) < 0.8]
+        out["tbl_programacion"] = pd.DataFrame({
+            "Fecha": pairs[0].dt.strftime("%d/%m/%Y").to_numpy(),
+            "Equipo": pairs[1].to_numpy(),
+            "Horas Programadas": rng_prog.choice(np.asarray([8, 9.5, "12", "7,5", None], dtype=object), len(pairs), p=[0.4, 0.4, 0.08, 0.07, 0.05]),
+        })
+    if "maestra_activos" in wanted:
+        out["maestra_activos"] = master
+    return {name: out[name] for name in SHEETS if name in out}
+
+
+def write_workspace(sheets: Dict[str, pd.DataFrame], out: Path) -> Path:
+    """Workbook (every sheet but the bitácora) and then tbl_bitacora.csv; returns the workbook path."""
+    out.mkdir(parents=True, exist_ok=True)
+    xls_path = out / "BBDD_MANTENCION.xlsm"
+    tmp = out / "BBDD_MANTENCION.tmp.xlsx"
+    with pd.ExcelWriter(tmp, engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            if name != "tbl_bitacora":
+                df.to_excel(writer, sheet_name=name, index=False)
+    os.replace(tmp, xls_path)
+    sheets["tbl_bitacora"].to_csv(out / "tbl_bitacora.csv", index=False, encoding="utf-8-sig")
+    return xls_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--out", type=Path, required=True, help="carpeta donde dejar el libro y el CSV")
+    parser.add_argument("--events", type=int, default=1_000_000, help="filas de la bitácora")
+    parser.add_argument("--assets", type=int, default=300, help="equipos distintos")
+    parser.add_argument("--years", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    sheets = synthetic_sheets(args.events, args.assets, args.years, args.seed)
+    print(f"Generado en {time.perf_counter() - t0:.1f} s:")
+    for name, df in sheets.items():
+        print(f" - {name}: {len(df):,} filas")
+    t0 = time.perf_counter()
+    xls_path = write_workspace(sheets, args.out)
+    print(f"Escrito en {args.out} ({xls_path.name} + tbl_bitacora.csv) en {time.perf_counter() - t0:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Vistas por defecto del tablero, precalculadas fuera de Streamlit.
+
+`python precompute.py` carga los datos igual que la app (`data_source`) y
+calcula lo que muestra cada sección al abrirla, con los filtros en sus
+valores por defecto: disponibilidad por equipo (KPI), resumen de
+confiabilidad y tablas de Pareto, y el cubo de gastos/presupuesto con el
+detalle del último mes del año por defecto. El resultado se guarda junto al
+snapshot de esa versión de datos (`.snapshot/<fingerprint>/dashboard.pkl`).
+La app lo usa mientras los filtros sigan en sus valores por defecto y
+calcula en vivo (construyendo las tablas canónicas) en cuanto cambian.
+"""
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import datetime
+import os
+import time
+
+import pandas as pd
+
+from finance import BUDGET, SpendCube, build_ledger, expense_lines
+from kpi import AvailabilityCube
+from reliability import equipment_summary
+from schema import BITACORA, CANONICAL_SOURCES, MAESTRA, NO_DAY, OM, OTROS_GASTOS, PRESUPUESTO, PROGRAMACION, canonical_maestra, from_days, normalize_str
+
+FORMAT_VERSION = 1
+DASHBOARD_FILENAME = "dashboard.pkl"
+# The KPI range starts here by default (or at the first event, if later)
+KPI_DEFAULT_START = datetime.date(2025, 8, 1)
+
+
+# --- Defaults shared by the app and the precompute job ---
+
+def master_frame(sheets: Dict[str, pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """Canonical maestra_activos on its own (None if missing, empty or without an Equipo column)."""
+    df = sheets.get(CANONICAL_SOURCES[MAESTRA])
+    if df is None or df.empty:
+        return None
+    return canonical_maestra(df)
+
+
+def kpi_default_types(all_types: List) -> List:
+    # Default to 'Equipo'; if no 'equipo' found, select all to avoid empty chart
+    return [t for t in all_types if "equipo" in normalize_str(t)] or all_types
+
+
+def kpi_default_equips(master: Optional[pd.DataFrame]) -> Optional[set]:
+    """Equipment keys the KPI view starts with (default Tipo filter), None for all."""
+    if master is None or "tipo" not in master.columns:
+        return None
+    types = kpi_default_types(sorted(list(master["tipo"].dropna().unique())))
+    if not types:
+        return None
+    return set(master[master["tipo"].isin(types)]["equipo_key"].unique())
+
+
+def kpi_default_range(first: Optional[datetime.date], last: Optional[datetime.date]) -> Tuple[datetime.date, datetime.date]:
+    """Default KPI date range given the first/last event of the selected equipments."""
+    if first is None:
+        today = datetime.date.today()
+        return today, today
+    # 1 de Agosto 2025 (o el mínimo si es posterior): un rango "útil" al cargar la página
+    start = max(KPI_DEFAULT_START, first) if first < KPI_DEFAULT_START else first
+    # Si la fecha objetivo es mayor que el máximo, usar el mínimo real
+    if start > last:
+        start = first
+    return start, last
+
+
+def reliability_default_types(all_types: List) -> List:
+    return [t for t in all_types if "equipo" in str(t).lower()] or all_types
+
+
+def reliability_frame(canon: Dict[str, pd.DataFrame]) -> Tuple[Optional[pd.DataFrame], Optional[str], Optional[str], Optional[str]]:
+    """Bitácora merged with maestra_activos: (df, type_col, system_col, space_col).
+
+    Master data wins over the bitácora's own type column.
+    """
+    df_rel = canon.get(BITACORA)
+    type_col = "tipo" if df_rel is not None and "tipo" in df_rel.columns else None
+    system_col = None
+    space_col = None
+    if df_rel is not None and MAESTRA in canon:
+        df_master = canon[MAESTRA]
+        m_cols = [c for c in ("tipo", "sistema", "espacio") if c in df_master.columns]
+        bit_cols = ["dia", "equipo", "equipo_key", "downtime_min"] + (["tipo"] if type_col else [])
+        df_merged = df_rel[bit_cols].merge(df_master[["equipo_key"] + m_cols], on="equipo_key", how="left", suffixes=("", "_master"))
+        if "tipo" in m_cols:
+            if type_col:
+                df_merged["tipo"] = df_merged["tipo_master"].fillna(df_merged["tipo"].astype(object))
+            type_col = "tipo"
+        if "sistema" in m_cols:
+            system_col = "sistema"
+        if "espacio" in m_cols:
+            space_col = "espacio"
+        df_rel = df_merged
+    return df_rel, type_col, system_col, space_col
+
+
+def dated_events(df_rel: pd.DataFrame) -> pd.DataFrame:
+    """Rows with a date, with the __date/__downtime_min columns the analyses use."""
+    df_rel = df_rel[df_rel["dia"] != NO_DAY]
+    return df_rel.assign(__date=from_days(df_rel["dia"])).rename(columns={"downtime_min": "__downtime_min"})
+
+
+def pareto_table(df: pd.DataFrame, equipo_col: str, by_downtime: bool) -> pd.DataFrame:
+    """Equipo, Valor (minutes or failures), Porcentaje and Acumulado, largest first."""
+    if by_downtime:
+        grouped = df.groupby(equipo_col, observed=True)["__downtime_min"].sum().reset_index()
+    else:
+        grouped = df.groupby(equipo_col, observed=True).size().reset_index(name="Valor")
+    grouped.columns = ["Equipo", "Valor"]
+    grouped = grouped.sort_values("Valor", ascending=False)
+    total_val = grouped["Valor"].sum()
+    grouped["Porcentaje"] = (grouped["Valor"] / total_val) * 100
+    grouped["Acumulado"] = grouped["Porcentaje"].cumsum()
+    return grouped
+
+
+# --- Live views with a precomputed default ---
+
+class KpiView:
+    """AvailabilityCube stand-in: the default selection and range come from the
+    precomputed snapshot, anything else from the live cube (built on first need)."""
+
+    def __init__(self, pre: Optional[dict], build: Callable[[], AvailabilityCube]):
+        self.pre = pre
+        self._build = build
+        self._cube: Optional[AvailabilityCube] = None
+
+    @property
+    def live(self) -> AvailabilityCube:
+        if self._cube is None:
+            self._cube = self._build()
+        return self._cube
+
+    def _is_default(self, keys: Optional[set]) -> bool:
+        return self.pre is not None and (keys if keys is None else set(keys)) == self.pre["equipos"]
+
+    def select(self, keys: Optional[set] = None) -> Optional[set]:
+        """The selection itself (the live mask is computed only if needed)."""
+        return keys
+
+    def event_bounds(self, keys: Optional[set]) -> Tuple[Optional[datetime.date], Optional[datetime.date]]:
+        if self._is_default(keys):
+            return self.pre["bounds"]
+        return self.live.event_bounds(self.live.select(keys))
+
+    def totals(self, start: datetime.date, end: datetime.date, keys: Optional[set]) -> pd.DataFrame:
+        if self._is_default(keys) and (start, end) == self.pre["range"]:
+            return self.pre["totals"].copy()
+        return self.live.totals(start, end, self.live.select(keys))
+
+
+# --- Precompute ---
+
+def kpi_cube(canon: Dict[str, pd.DataFrame]) -> AvailabilityCube:
+    """Equipo x Día cube of the canonical bitácora, tbl_programacion as overrides."""
+    bit = canon[BITACORA]
+    prog = canon.get(PROGRAMACION)
+    overrides = None if prog is None else pd.DataFrame({"fecha": from_days(prog["dia"]), "equipo": prog["equipo"], "minutos": prog["minutos"]})
+    return AvailabilityCube.build(from_days(bit["dia"]), bit["equipo"], bit["downtime_min"], overrides)
+
+
+def _kpi(sheets: Dict[str, pd.DataFrame], canon: Dict[str, pd.DataFrame]) -> Optional[dict]:
+    if BITACORA not in canon:
+        return None
+    cube = kpi_cube(canon)
+    equipos = kpi_default_equips(master_frame(sheets))
+    mask = cube.select(equipos)
+    bounds = cube.event_bounds(mask)
+    start, end = kpi_default_range(*bounds)
+    return {"equipos": equipos, "bounds": bounds, "range": (start, end), "totals": cube.totals(start, end, mask)}
+
+
+def _options(df: pd.DataFrame, col: Optional[str]) -> Optional[list]:
+    return sorted(list(df[col].dropna().unique())) if col else None
+
+
+def _reliability(canon: Dict[str, pd.DataFrame]) -> Optional[dict]:
+    df_rel, type_col, system_col, space_col = reliability_frame(canon)
+    if df_rel is None:
+        return None
+    # Filter options with nothing selected upstream (the cascade starts from every row)
+    options = {"espacio": _options(df_rel, space_col), "sistema": _options(df_rel, system_col), "tipo": _options(df_rel, type_col)}
+    types = options["tipo"]
+    default_types = reliability_default_types(types) if type_col else None
+    if default_types:
+        df_rel = df_rel[df_rel[type_col].isin(default_types)]
+    df_gen = dated_events(df_rel)
+    if df_gen.empty:
+        return None
+    return {
+        "columns": (type_col, system_col, space_col),
+        "options": options,
+        "default_types": default_types,
+        "range": (df_gen["__date"].min().date(), df_gen["__date"].max().date()),
+        # Every dated event of the default filters: other date ranges are cut from it
+        "events": df_gen[["equipo", "__date", "__downtime_min"]].reset_index(drop=True),
+        "summary": equipment_summary(df_gen, "equipo"),
+        "pareto_downtime": pareto_table(df_gen, "equipo", by_downtime=True),
+        "pareto_count": pareto_table(df_gen, "equipo", by_downtime=False),
+    }
+
+
+def _budget(canon: Dict[str, pd.DataFrame]) -> dict:
+    ledger = build_ledger(canon.get(OM), canon.get(OTROS_GASTOS), canon.get(PRESUPUESTO))
+    cube = SpendCube.build(ledger)
+    out = {"has_budget": PRESUPUESTO in canon and bool((ledger["fuente"] == BUDGET).any()), "cube": cube, "details": {}}
+    if cube.budget_years:
+        year = cube.budget_years[-1]
+        months = sorted(cube.actuals(year)["Month"].unique())
+        if months:
+            out["details"][(year, months[-1])] = expense_lines(ledger, year, months[-1])
+    return out
+
+
+def precompute(sheets: Dict[str, pd.DataFrame], canon: Dict[str, pd.DataFrame], data_version: str) -> dict:
+    """Every default-view aggregate, with the seconds each section took."""
+    out = {"format": FORMAT_VERSION, "data_version": data_version, "computed_at": datetime.datetime.now().isoformat(timespec="seconds"), "seconds": {}}
+    for name, compute in (("kpi", lambda: _kpi(sheets, canon)), ("reliability", lambda: _reliability(canon)), ("budget", lambda: _budget(canon))):
+        t0 = time.perf_counter()
+        out[name] = compute()
+        out["seconds"][name] = time.perf_counter() - t0
+    return out
+
+
+def write_dashboard(snap_dir: Path, dashboard: dict) -> Path:
+    """Store next to the snapshot version it was computed from (pruned with it)."""
+    version_dir = snap_dir / dashboard["data_version"]
+    version_dir.mkdir(parents=True, exist_ok=True)
+    path = version_dir / DASHBOARD_FILENAME
+    tmp = path.with_name(path.name + ".tmp")
+    pd.to_pickle(dashboard, tmp)
+    os.replace(tmp, path)
+    return path
+
+
+def read_dashboard(snap_dir: Path, data_version: str) -> Optional[dict]:
+    """The precomputed views of this data version, or None (not computed, or from another format)."""
+    try:
+        dashboard = pd.read_pickle(snap_dir / data_version / DASHBOARD_FILENAME)
+    except Exception:
+        return None
+    if not isinstance(dashboard, dict) or dashboard.get("format") != FORMAT_VERSION or dashboard.get("data_version") != data_version:
+        return None
+    return dashboard
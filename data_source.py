@@ -0,0 +1,206 @@
+"""Carga de las hojas desde Google Sheets, el CSV o el libro local.
+
+Es la carga que usa la app, sin Streamlit: corre en el hilo de recarga
+(`reloader.SourceWatcher`) y en los procesos de línea de comandos
+(`precompute.py`), que así obtienen los mismos datos y la misma versión
+(fingerprint del snapshot) que ve la app.
+"""
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional
+import time
+
+import pandas as pd
+
+from export_data import csv_matches_workbook
+from gsheets_sync import fetch_sheets, sheet_revision
+from profiling import span
+from snapshot import SNAPSHOT_DIRNAME, SNAPSHOT_SHEETS, file_stamp, read_snapshot, write_snapshot
+
+# Seconds a Google Sheets snapshot is reused (across restarts) when the sheet's
+# revision cannot be read; with it, the snapshot is reused until the revision changes.
+# Local files are stamped by size/mtime, so their snapshot is reused until they change.
+SNAPSHOT_MAX_AGE = 600
+SHEET_KEY = "1Xxl5G53qe8zjRy2XAkscrCBKp6_OTMHTlcKdCJshWYU"
+# Drive metadata gives the sheet's revision (modifiedTime) for the change watcher
+GSHEETS_SCOPES = ["https://www.googleapis.com/auth/spreadsheets", "https://www.googleapis.com/auth/drive.metadata.readonly"]
+
+
+def gsheets_credentials(secrets: Mapping) -> Optional[dict]:
+    """Service account info from st.secrets (or a parsed .streamlit/secrets.toml)."""
+    # Check if secrets are nested under [gcp_service_account] or at root
+    if "gcp_service_account" in secrets:
+        return dict(secrets["gcp_service_account"])
+    if "type" in secrets and secrets["type"] == "service_account":
+        # Fallback: User pasted JSON content directly without header
+        return dict(secrets)
+    return None
+
+
+def read_secrets(workspace: Path) -> dict:
+    """The app's .streamlit/secrets.toml outside Streamlit ({} if there is none)."""
+    import tomllib
+
+    try:
+        with open(workspace / ".streamlit" / "secrets.toml", "rb") as f:
+            return tomllib.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def gsheets_client(creds_dict: dict):
+    import gspread
+    from google.oauth2.service_account import Credentials
+
+    return gspread.authorize(Credentials.from_service_account_info(creds_dict, scopes=GSHEETS_SCOPES))
+
+
+def source_signature(xls_path: Path, creds_dict: Optional[dict], client=None) -> str:
+    """Cheap identity of the data source: local file stamps plus the Google Sheet's revision."""
+    parts = ["local:" + file_stamp(xls_path, xls_path.parent / "tbl_bitacora.csv")]
+    if creds_dict:
+        revision = sheet_revision(client, SHEET_KEY) if client is not None else None
+        # Without a revision the sheet is re-read every SNAPSHOT_MAX_AGE seconds, as before
+        parts.append(revision or f"gsheets-age:{int(time.time() // SNAPSHOT_MAX_AGE)}")
+    return "|".join(parts)
+
+
+def load_sheets(xls_path: Path, creds_dict: Optional[dict] = None, client=None) -> tuple[Dict[str, pd.DataFrame], str, Optional[str], List[tuple]]:
+    """Returns (sheets, source_type, data_version, notices); data_version is the snapshot fingerprint.
+
+    Runs outside the script thread (SourceWatcher) and outside Streamlit
+    (precompute.py), so messages for the user come back as
+    (st function name, text) notices instead of st calls. Each step is
+    timed (profiling.span) as part of the caller's trace, or as its own.
+    """
+    with span("load_sheets") as step:
+        result = _load_sheets(xls_path, creds_dict, client)
+        step.update(source=result[1], rows=sum(len(df) for df in result[0].values()))
+    return result
+
+
+def _load_sheets(xls_path: Path, creds_dict: Optional[dict], client) -> tuple[Dict[str, pd.DataFrame], str, Optional[str], List[tuple]]:
+    snap_dir = xls_path.parent / SNAPSHOT_DIRNAME
+    notices: List[tuple] = []
+
+    # 0. Try loading from Google Sheets (Cloud / Secrets)
+    if creds_dict:
+        gs_stamp = f"gsheets:{SHEET_KEY}"
+        revision = None
+        try:
+            with span("gsheets.revision"):
+                client = client or gsheets_client(creds_dict)
+                revision = sheet_revision(client, SHEET_KEY)
+        except Exception:
+            # Reported below, if the snapshot cannot stand in for the sheet
+            pass
+        with span("snapshot.read"):
+            cached = read_snapshot(snap_dir, gs_stamp, max_age=None if revision else SNAPSHOT_MAX_AGE)
+        if cached is not None and (revision is None or cached[1].get("revision") == revision):
+            return cached[0], cached[1]["source_type"], cached[1]["fingerprint"], notices
+        # A stale snapshot is still the base for the incremental bitácora sync
+        with span("snapshot.read_previous"):
+            previous = read_snapshot(snap_dir, gs_stamp)
+        prev_bitacora = previous[0].get("tbl_bitacora") if previous else None
+        prev_sync = previous[1].get("bitacora_sync") if previous else None
+        try:
+            import gspread
+
+            client = client or gsheets_client(creds_dict)
+            # Open the Google Sheet by Key (more reliable)
+            try:
+                sh = client.open_by_key(SHEET_KEY)
+            except gspread.SpreadsheetNotFound:
+                notices.append(("error", f"No se encontró el Google Sheet con ID '{SHEET_KEY}'. Asegúrate de compartirlo con el email del robot: {creds_dict.get('client_email', 'unknown')}"))
+                return {}, "Error GSheets", None, notices
+
+            # Read all worksheets in one batched request (bitácora as a delta when possible)
+            with span("gsheets.fetch") as step:
+                loaded_data, sync_state, fetch_timings, fetch_notices = fetch_sheets(sh, SNAPSHOT_SHEETS, prev_bitacora, prev_sync)
+                step["timings_ms"] = fetch_timings
+            notices.extend(("warning", msg) for msg in fetch_notices)
+
+            extra = {"fetch_timings": fetch_timings, "revision": revision}
+            if sync_state:
+                extra["bitacora_sync"] = sync_state
+            with span("snapshot.write"):
+                manifest = write_snapshot(snap_dir, loaded_data, gs_stamp, "☁️ Google Sheets (Nube)", extra=extra)
+            return loaded_data, "☁️ Google Sheets (Nube)", manifest["fingerprint"] if manifest else None, notices
+
+        except Exception as e:
+            notices.append(("error", f"Error conectando a Google Sheets: {e}"))
+            # Fallthrough to local files if GSheets fails
+            pass
+
+    # Performance: avoid loading the whole workbook (xlsm) which can be large and slow
+    # Fast path: reuse the on-disk snapshot while the local files are unchanged.
+    # In cloud deployment, xls_path might not exist, so we rely on CSV.
+    csv_cache = xls_path.parent / "tbl_bitacora.csv"
+    local_stamp = "local:" + file_stamp(xls_path, csv_cache)
+    with span("snapshot.read"):
+        cached = read_snapshot(snap_dir, local_stamp)
+    if cached is not None:
+        return cached[0], cached[1]["source_type"], cached[1]["fingerprint"], notices
+
+    with span("local.read"):
+        sheets, source_type = _load_local_sheets(xls_path, csv_cache)
+    manifest = None
+    if sheets:
+        # Stamp again: reading the Excel may have refreshed the CSV cache
+        with span("snapshot.write"):
+            manifest = write_snapshot(snap_dir, sheets, "local:" + file_stamp(xls_path, csv_cache), source_type)
+    return sheets, source_type, manifest["fingerprint"] if manifest else None, notices
+
+
+
+def _load_local_sheets(xls_path: Path, csv_cache: Path) -> tuple[Dict[str, pd.DataFrame], str]:
+    # 1. Try loading CSV first
+    if csv_cache.exists():
+        # If Excel exists, check the CSV is its export
+        if xls_path.exists():
+            # export_data.py's manifest says by content; mtimes are reset by copies (scp, git)
+            fresh = csv_matches_workbook(xls_path, csv_cache)
+            if fresh is None:
+                fresh = csv_cache.stat().st_mtime >= xls_path.stat().st_mtime
+            if fresh:
+                try:
+                    with span("local.csv"):
+                        sheets = {"tbl_bitacora": pd.read_csv(csv_cache, parse_dates=True, encoding="utf-8-sig")}
+                    # The other sheets are small: read just those from the workbook
+                    with span("local.workbook"):
+                        book = pd.ExcelFile(xls_path, engine="openpyxl")
+                        for name in SNAPSHOT_SHEETS:
+                            if name != "tbl_bitacora" and name in book.sheet_names:
+                                sheets[name] = book.parse(name)
+                    return sheets, "📁 CSV Local (Caché)"
+                except Exception:
+                    pass
+        else:
+            # Excel missing (Cloud scenario), just use CSV
+            try:
+                df = pd.read_csv(csv_cache, parse_dates=True, encoding="utf-8-sig")
+                return {"tbl_bitacora": df}, "📁 CSV Local (Sin Excel)"
+            except Exception:
+                pass
+
+    # 2. If CSV failed or is old, try reading Excel (if it exists)
+    if xls_path.exists():
+        try:
+            # Read only the sheets we use (much faster than sheet_name=None); the
+            # snapshot keeps them all, so the workbook is parsed once per change.
+            with span("local.workbook"):
+                book = pd.ExcelFile(xls_path, engine="openpyxl")
+                names = [n for n in SNAPSHOT_SHEETS if n in book.sheet_names]
+                if "tbl_bitacora" not in names:
+                    raise ValueError("tbl_bitacora not found")
+                sheets = {name: book.parse(name) for name in names}
+            # Save a CSV cache to speed up subsequent loads (best-effort)
+            try:
+                sheets["tbl_bitacora"].to_csv(csv_cache, index=False, encoding="utf-8-sig")
+            except Exception:
+                pass
+            return sheets, "📁 Excel Local (.xlsm)"
+        except Exception:
+            # Last-resort: fall back to reading all sheets (original behaviour)
+            return pd.read_excel(xls_path, sheet_name=None, engine="openpyxl"), "📁 Excel Local (Completo)"
+    
+    return {}, "❌ Sin Datos"
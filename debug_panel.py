@@ -0,0 +1,71 @@
+"""Panel de tiempos por etapa, sólo para administración.
+
+Aparece al final de la página cuando la URL trae `?admin=<clave>` y la
+clave coincide con `admin_key` de los secrets (o con la variable de entorno
+`DASHBOARD_ADMIN_KEY`); sin clave configurada no se muestra nunca. Presenta
+las etapas de la ejecución actual (ms, memoria del proceso y cuánto creció,
+resultados servidos desde la caché), la última recarga de datos y las
+ejecuciones recientes de todas las sesiones (ver `profiling.py`).
+"""
+from typing import Optional
+import hmac
+import os
+
+import pandas as pd
+import streamlit as st
+
+from profiling import LOG_PATH, Trace, recent_traces
+
+_COLUMNS = ("name", "depth", "ms", "rss_mb", "delta_mb")
+
+
+def admin_key() -> Optional[str]:
+    key = os.environ.get("DASHBOARD_ADMIN_KEY")
+    if key:
+        return key
+    try:
+        return st.secrets.get("admin_key")
+    except Exception:
+        # No secrets file
+        return None
+
+
+def spans_frame(trace: Trace) -> pd.DataFrame:
+    """One row per span, indented by nesting; extra keys (cached, rows, source...) as Detalle."""
+    return pd.DataFrame([{
+        "Etapa": " " * s["depth"] + s["name"],
+        "ms": s.get("ms"),
+        "RSS (MB)": s.get("rss_mb"),
+        "Δ MB": s.get("delta_mb"),
+        "Detalle": ", ".join(f"{k}={v}" for k, v in s.items() if k not in _COLUMNS),
+    } for s in trace.spans])
+
+
+def _mb(value: Optional[float]) -> str:
+    return "–" if value is None else f"{value:,.0f} MB"
+
+
+def render(trace: Optional[Trace]):
+    key = admin_key()
+    if not key or not hmac.compare_digest(st.query_params.get("admin", ""), str(key)):
+        return
+    with st.expander("⏱️ Tiempos por etapa (admin)", expanded=True):
+        if trace is not None:
+            st.markdown(f"**Esta ejecución:** {trace.ms:,.0f} ms · memoria máxima del proceso {_mb(trace.peak_rss_mb)}")
+            st.dataframe(spans_frame(trace), hide_index=True, use_container_width=True)
+
+        loads = recent_traces("load_sheets")
+        if loads:
+            st.markdown(f"**Última recarga de datos** ({loads[0].started:%d/%m %H:%M:%S}): {loads[0].ms:,.0f} ms")
+            st.dataframe(spans_frame(loads[0]), hide_index=True, use_container_width=True)
+
+        runs = recent_traces("app")
+        if runs:
+            st.markdown("**Ejecuciones recientes (todas las sesiones)**")
+            st.dataframe(pd.DataFrame([{
+                "Hora": t.started.strftime("%H:%M:%S"),
+                "Sección": next((s["section"] for s in t.spans if s["name"] == "render"), None),
+                "ms": t.ms,
+                "Memoria máx. (MB)": t.peak_rss_mb,
+            } for t in runs]), hide_index=True, use_container_width=True)
+        st.caption(f"Registro: `{LOG_PATH}` (un archivo por día). Resumen de varios días: `python profiling.py --days 7`.")
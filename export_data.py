@@ -1,8 +1,205 @@
-import pandas as pd
+"""Exporta la hoja tbl_bitacora de BBDD_MANTENCION.xlsm a tbl_bitacora.csv.
+
+    python export_data.py            # agrega sólo las filas nuevas
+    python export_data.py --full     # reescribe el CSV completo
+
+Junto al CSV queda `tbl_bitacora.manifest.json` con la huella del libro y
+del CSV exportados, la cantidad de filas y un hash por bloque de filas. En
+la siguiente exportación las filas ya exportadas se comparan bloque a
+bloque: si ninguna cambió, sólo se agregan las nuevas al final del CSV; si
+alguna se editó o se borró, el CSV se reescribe completo. La app usa el
+manifiesto (y no las fechas de modificación) para saber si el CSV
+corresponde al libro.
+"""
+from itertools import islice
 from pathlib import Path
+from typing import List, Optional, Tuple
+import argparse
+import csv
+import hashlib
+import json
+import os
 import sys
+import time
+
+from reporte import cell_text, sheet_rows
+
+SHEET = "tbl_bitacora"
+# 2: datetimes always with their time, durations as "0 days 01:40:00" (older CSVs are rewritten)
+MANIFEST_VERSION = 2
+# Rows per hashed block (a block that changed means a full rewrite)
+BLOCK_ROWS = 1000
+
+
+def manifest_path(csv_path: Path) -> Path:
+    return csv_path.with_name(csv_path.stem + ".manifest.json")
+
+
+def file_digest(path: Path) -> dict:
+    """Size and content hash of a file (mtimes change on every copy, the content does not)."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return {"size": path.stat().st_size, "blake2b": h.hexdigest()}
+
+
+def read_manifest(csv_path: Path) -> Optional[dict]:
+    try:
+        manifest = json.loads(manifest_path(csv_path).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("version") != MANIFEST_VERSION:
+        return None
+    return manifest
+
+
+def csv_matches_workbook(xls_path: Path, csv_path: Path) -> Optional[bool]:
+    """Whether the CSV is the export of this workbook, by the manifest.
+
+    None when there is no manifest for this CSV (missing, or the CSV was
+    written by something else since), so the caller can fall back to mtimes.
+    """
+    manifest = read_manifest(csv_path)
+    if manifest is None:
+        return None
+    csv_file = manifest.get("csv", {})
+    if csv_file.get("size") != csv_path.stat().st_size or csv_file != file_digest(csv_path):
+        return None
+    workbook = manifest.get("workbook", {})
+    return workbook.get("size") == xls_path.stat().st_size and workbook == file_digest(xls_path)
+
+
+def _write_manifest(csv_path: Path, manifest: dict):
+    path = manifest_path(csv_path)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False, indent=1), encoding="utf-8")
+    os.replace(tmp, path)
+
+
+class _BlockHashes:
+    """Hash of every BLOCK_ROWS rows, the last block possibly partial."""
 
-def export_excel_to_csv():
+    def __init__(self):
+        self.done: List[str] = []
+        self.rows = 0
+        self._h = hashlib.blake2b(digest_size=8)
+
+    def add(self, texts: List[str]):
+        self._h.update("\x1f".join(texts).encode("utf-8") + b"\x1e")
+        self.rows += 1
+        if self.rows % BLOCK_ROWS == 0:
+            self.done.append(self._h.hexdigest())
+            self._h = hashlib.blake2b(digest_size=8)
+
+    def hashes(self) -> List[str]:
+        return self.done + ([self._h.hexdigest()] if self.rows % BLOCK_ROWS else [])
+
+
+def _append_new_rows(rows, header: List[str], csv_path: Path, previous: dict) -> Tuple[str, _BlockHashes]:
+    """Check the already exported rows block by block and append the rest to the CSV.
+
+    If any earlier row changed or was removed, the CSV is rewritten instead
+    in the same pass over the sheet. Returns the mode ("append" or "full")
+    and the block hashes.
+    """
+    blocks = _BlockHashes()
+    known, old = previous["rows"], previous["blocks"]
+    # Rows of the block being checked; a rewrite copies the earlier ones from the CSV
+    pending: List[List[str]] = []
+    rows = iter(rows)
+    for cells in rows:
+        texts = [cell_text(v) for v in cells]
+        blocks.add(texts)
+        if blocks.rows > known:
+            with open(csv_path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(texts)
+                for cells in rows:
+                    texts = [cell_text(v) for v in cells]
+                    blocks.add(texts)
+                    writer.writerow(texts)
+            return "append", blocks
+        pending.append(texts)
+        if blocks.rows % BLOCK_ROWS == 0:
+            if blocks.done[-1] != old[len(blocks.done) - 1]:
+                break
+            pending = []
+        if blocks.rows == known and blocks.hashes()[-1] != old[-1]:
+            break
+    else:
+        if blocks.rows == known:
+            return "append", blocks
+    return "full", _write_all_rows(rows, header, csv_path, blocks, pending)
+
+
+def _write_all_rows(rows, header: List[str], csv_path: Path, blocks: Optional[_BlockHashes] = None,
+                    pending: List[List[str]] = ()) -> _BlockHashes:
+    """Write the whole CSV to a temporary file and swap it in.
+
+    `blocks` holds the rows already read from the sheet: those before
+    `pending` were checked against the current CSV and are copied from it.
+    """
+    if blocks is None:
+        blocks = _BlockHashes()
+    checked = blocks.rows - len(pending)
+    tmp = csv_path.with_name(csv_path.name + ".tmp")
+    with open(tmp, "w", newline="", encoding="utf-8-sig") as f:
+        # \n line ends, as pandas' to_csv
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(header)
+        if checked:
+            with open(csv_path, newline="", encoding="utf-8-sig") as src:
+                exported = csv.reader(src)
+                next(exported)
+                writer.writerows(islice(exported, checked))
+        writer.writerows(pending)
+        for cells in rows:
+            texts = [cell_text(v) for v in cells]
+            blocks.add(texts)
+            writer.writerow(texts)
+    os.replace(tmp, csv_path)
+    return blocks
+
+
+def export_bitacora(xls_path: Path, csv_path: Path, full: bool = False) -> dict:
+    """Bring the CSV (and its manifest) up to date with the workbook.
+
+    Returns {"mode": "append"|"full", "rows", "appended", "seconds"}.
+    """
+    from openpyxl import load_workbook
+
+    start = time.perf_counter()
+    previous = None if full or not csv_path.exists() else read_manifest(csv_path)
+    if previous is not None and previous.get("csv") != file_digest(csv_path):
+        previous = None
+
+    wb = load_workbook(filename=str(xls_path), data_only=True, read_only=True)
+    try:
+        header, rows = sheet_rows(wb[SHEET])
+        header = [cell_text(h) for h in header]
+        if previous is not None and previous.get("header") == header:
+            mode, blocks = _append_new_rows(rows, header, csv_path, previous)
+        else:
+            mode, blocks = "full", _write_all_rows(rows, header, csv_path)
+    finally:
+        wb.close()
+
+    _write_manifest(csv_path, {
+        "version": MANIFEST_VERSION,
+        "sheet": SHEET,
+        "header": header,
+        "rows": blocks.rows,
+        "block_rows": BLOCK_ROWS,
+        "blocks": blocks.hashes(),
+        "workbook": file_digest(xls_path),
+        "csv": file_digest(csv_path),
+    })
+    appended = blocks.rows - previous["rows"] if mode == "append" else blocks.rows
+    return {"mode": mode, "rows": blocks.rows, "appended": appended, "seconds": time.perf_counter() - start}
+
+
+def export_excel_to_csv(full: bool = False):
     workspace = Path(__file__).parent
     xls_path = workspace / "BBDD_MANTENCION.xlsm"
     csv_path = workspace / "tbl_bitacora.csv"
@@ -13,15 +210,20 @@ def export_excel_to_csv():
 
     print(f"Leyendo archivo Excel: {xls_path.name}...")
     try:
-        # Leer solo la hoja necesaria
-        df = pd.read_excel(xls_path, sheet_name="tbl_bitacora", engine="openpyxl")
-        
-        print(f"Exportando {len(df)} filas a CSV...")
-        df.to_csv(csv_path, index=False, encoding="utf-8-sig")
-        print(f"¡Éxito! Archivo creado: {csv_path.name}")
+        result = export_bitacora(xls_path, csv_path, full=full)
     except Exception as e:
         print(f"ERROR al procesar el archivo: {e}")
         sys.exit(1)
+    if result["mode"] == "append" and not result["appended"]:
+        print(f"Sin filas nuevas ({result['rows']} en total).")
+    elif result["mode"] == "append":
+        print(f"Agregadas {result['appended']} filas nuevas ({result['rows']} en total).")
+    else:
+        print(f"CSV reescrito completo: {result['rows']} filas.")
+    print(f"¡Éxito! Archivo actualizado: {csv_path.name} ({result['seconds']:.2f} s)")
+
 
 if __name__ == "__main__":
-    export_excel_to_csv()
+    parser = argparse.ArgumentParser(description="Exporta tbl_bitacora a CSV, agregando sólo las filas nuevas.")
+    parser.add_argument("--full", action="store_true", help="reescribir el CSV completo")
+    export_excel_to_csv(full=parser.parse_args().full)
@@ -0,0 +1,232 @@
+"""Limpieza de datos financieros (OM, Otros_Gastos, Presupuesto)."""
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from schema import from_days
+
+# Map month names to numbers; Presupuesto may use "Enero" ... or 1-12
+MONTH_MAP = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6,
+    "julio": 7, "agosto": 8, "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12
+}
+
+
+def get_month_num(val):
+    if isinstance(val, int): return val
+    s = str(val).lower().strip()
+    return MONTH_MAP.get(s, 0)
+
+
+def clean_currency(val):
+    if pd.isna(val): return 0.0
+    if isinstance(val, (int, float)): return float(val)
+    s = str(val).replace("$", "").replace(".", "").replace(",", ".") # Remove $ and thousands separator, fix decimal
+    try:
+        return float(s)
+    except:
+        return 0.0
+
+
+def parse_currency(values: pd.Series) -> pd.Series:
+    """Vectorized clean_currency: the same float for every cell.
+
+    Numbers pass through; text goes through one string replace and
+    `pd.to_numeric`. The few cells that does not parse (empty strings,
+    typos) are resolved with clean_currency once per distinct value.
+    """
+    s = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s.astype(float).fillna(0.0)
+    s = s.astype(object)
+    out = pd.Series(0.0, index=s.index)
+    missing = s.isna().to_numpy()
+    is_num = s.map(lambda v: isinstance(v, (int, float))).to_numpy(dtype=bool) & ~missing
+    out[is_num] = s[is_num].astype(float)
+    text = s[~is_num & ~missing]
+    if len(text):
+        cleaned = text.astype(str).str.replace("$", "", regex=False).str.replace(".", "", regex=False).str.replace(",", ".", regex=False)
+        parsed = pd.to_numeric(cleaned, errors="coerce")
+        # "", "nan", "1_000" and typos: fall back to float() semantics
+        redo = text[parsed.isna()]
+        if len(redo):
+            parsed[redo.index] = redo.map({v: clean_currency(v) for v in redo.unique()})
+        out[text.index] = parsed.astype(float)
+    return out
+
+
+# --- Finance ledger ---
+# OM (one row per cost part), Otros_Gastos and Presupuesto as one long table,
+# built once per data version from the canonical frames. The budget views
+# are filters and group-bys on it.
+
+BUDGET = "Presupuesto"
+LEDGER_COLUMNS = ["dia", "anio", "mes", "fuente", "origen", "categoria", "descripcion", "monto"]
+# OM cost columns -> expense category
+OM_PARTS = {"repuestos": "Repuestos y Mat.", "servicios": "Contratistas"}
+
+
+def build_ledger(om: Optional[pd.DataFrame], otros: Optional[pd.DataFrame], presupuesto: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """One typed row per amount: OM parts, Otros_Gastos and budget lines (fuente "Presupuesto").
+
+    Expense rows keep zero and negative amounts (they count in the monthly
+    totals); rows are in sheet order, OM parts in OM_PARTS order per order.
+    Budget rows have no date (dia = NO_DAY) and their year as an integer.
+    """
+    from schema import NO_DAY
+
+    parts = []
+    om_parts = [name for name in OM_PARTS if om is not None and name in om.columns]
+    if om is not None and not om.empty and om_parts:
+        # Wide (repuestos, servicios) -> long, then back to sheet order: each order's parts together
+        long = om.assign(_row=np.arange(len(om))).melt(
+            id_vars=["_row", "dia", "anio", "mes", "orden", "descripcion"], value_vars=om_parts, var_name="_part", value_name="monto")
+        long = long.sort_values("_row", kind="stable")
+        parts.append(pd.DataFrame({
+            "dia": long["dia"], "anio": long["anio"], "mes": long["mes"], "fuente": "OM",
+            "origen": "OM " + long["orden"].astype(str), "categoria": long["_part"].map(OM_PARTS),
+            "descripcion": long["descripcion"], "monto": long["monto"],
+        }))
+    if otros is not None and not otros.empty:
+        parts.append(pd.DataFrame({
+            "dia": otros["dia"], "anio": otros["anio"], "mes": otros["mes"], "fuente": "Otros Gastos",
+            "origen": "Otros Gastos", "categoria": otros["categoria"].astype(object),
+            "descripcion": otros["descripcion"], "monto": otros["monto"],
+        }))
+    if presupuesto is not None and not presupuesto.empty:
+        years = pd.to_numeric(presupuesto["anio"], errors="coerce")
+        parts.append(pd.DataFrame({
+            "dia": NO_DAY, "anio": years.fillna(0).astype(np.int16), "mes": presupuesto["mes"].where(presupuesto["mes"].between(1, 12), 0).astype(np.int8),
+            "fuente": BUDGET, "origen": BUDGET, "categoria": BUDGET, "descripcion": "", "monto": presupuesto["monto"],
+        }))
+    if not parts:
+        return pd.DataFrame({c: pd.Series(dtype=object) for c in LEDGER_COLUMNS})
+    ledger = pd.concat(parts, ignore_index=True)[LEDGER_COLUMNS]
+    return ledger.astype({"dia": np.int32, "anio": np.int16, "mes": np.int8, "fuente": "category", "origen": "category",
+                          "categoria": "category", "monto": float})
+
+
+def expense_lines(ledger: pd.DataFrame, year: int, month: int) -> pd.DataFrame:
+    """Expense lines of a month for the detail table (only positive amounts are listed)."""
+    month_rows = ledger[(ledger["anio"] == year) & (ledger["mes"] == month) & (ledger["fuente"] != BUDGET) & (ledger["monto"] > 0)]
+    return pd.DataFrame({
+        "Fecha": from_days(month_rows["dia"]).dt.strftime("%d/%m/%Y"),
+        "Origen": month_rows["origen"].astype(object),
+        "Descripción": month_rows["descripcion"],
+        "Categoría": month_rows["categoria"].astype(object),
+        "Monto": month_rows["monto"],
+    }).reset_index(drop=True)
+
+
+class SpendCube:
+    """Año x Mes x Categoría totals of the ledger, built once per data version.
+
+    Month slot 0 holds budget lines whose month could not be read (they
+    count in the annual total only). `count` keeps how many ledger rows fed
+    each cell, so a month whose expenses add up to 0 still shows up as a
+    month with expenses, as with a group-by on the rows.
+    """
+
+    def __init__(self, years: np.ndarray, categories: list, spend: np.ndarray, count: np.ndarray, budget: np.ndarray, budget_years: List[int]):
+        self.years = years
+        self.budget_years = budget_years
+        self.categories = categories
+        self.spend = spend
+        self.count = count
+        self.budget = budget
+
+    @classmethod
+    def build(cls, ledger: pd.DataFrame) -> "SpendCube":
+        years = np.unique(ledger["anio"].to_numpy(dtype=np.int64))
+        years = years[years != 0]
+        is_budget = (ledger["fuente"] == BUDGET).to_numpy()
+        expenses = ledger[~is_budget & ledger["categoria"].notna().to_numpy()]
+        cat_codes, categories = pd.factorize(expenses["categoria"].astype(object), sort=True)
+
+        spend = np.zeros((len(years), 13, len(categories)))
+        count = np.zeros((len(years), 13, len(categories)), dtype=np.int64)
+        budget = np.zeros((len(years), 13))
+        y = np.searchsorted(years, expenses["anio"].to_numpy(dtype=np.int64))
+        # Rows without a date (anio 0) never match a selected year
+        ok = expenses["anio"].to_numpy() != 0
+        m = expenses["mes"].to_numpy(dtype=np.int64)
+        np.add.at(spend, (y[ok], m[ok], cat_codes[ok]), expenses["monto"].to_numpy(dtype=float)[ok])
+        np.add.at(count, (y[ok], m[ok], cat_codes[ok]), 1)
+
+        lines = ledger[is_budget & (ledger["anio"] != 0).to_numpy()]
+        np.add.at(budget, (np.searchsorted(years, lines["anio"].to_numpy(dtype=np.int64)), lines["mes"].to_numpy(dtype=np.int64)),
+                  lines["monto"].to_numpy(dtype=float))
+        budget_years = [int(v) for v in np.unique(lines["anio"].to_numpy(dtype=np.int64))]
+        return cls(years, list(categories), spend, count, budget, budget_years)
+
+    @classmethod
+    def from_totals(cls, years, expenses: pd.DataFrame, budget: pd.DataFrame) -> "SpendCube":
+        """The same cube from totals already grouped elsewhere (storage_sqlite.spend_totals).
+
+        `expenses`: anio, mes, categoria, monto (sum) and n (rows) per cell;
+        `budget`: anio, mes (0 if unknown), monto; `years`: every ledger year but 0.
+        """
+        years = np.unique(np.asarray(years, dtype=np.int64))
+        cat_codes, categories = pd.factorize(expenses["categoria"].astype(object), sort=True)
+        spend = np.zeros((len(years), 13, len(categories)))
+        count = np.zeros((len(years), 13, len(categories)), dtype=np.int64)
+        y = np.searchsorted(years, expenses["anio"].to_numpy(dtype=np.int64))
+        m = expenses["mes"].to_numpy(dtype=np.int64)
+        spend[y, m, cat_codes] = expenses["monto"].to_numpy(dtype=float)
+        count[y, m, cat_codes] = expenses["n"].to_numpy(dtype=np.int64)
+        totals = np.zeros((len(years), 13))
+        np.add.at(totals, (np.searchsorted(years, budget["anio"].to_numpy(dtype=np.int64)), budget["mes"].to_numpy(dtype=np.int64)),
+                  budget["monto"].to_numpy(dtype=float))
+        budget_years = [int(v) for v in np.unique(budget["anio"].to_numpy(dtype=np.int64))]
+        return cls(years, list(categories), spend, count, totals, budget_years)
+
+    def _year(self, year) -> Optional[int]:
+        i = int(np.searchsorted(self.years, year))
+        return i if i < len(self.years) and self.years[i] == year else None
+
+    def actuals(self, year) -> pd.DataFrame:
+        """Month, Category, Amount for every month/category with expense rows in `year`."""
+        i = self._year(year)
+        if i is None:
+            return pd.DataFrame({"Month": pd.Series(dtype=np.int64), "Category": pd.Series(dtype=object), "Amount": pd.Series(dtype=float)})
+        months, cats = np.nonzero(self.count[i])
+        return pd.DataFrame({"Month": months, "Category": [self.categories[c] for c in cats], "Amount": self.spend[i, months, cats]})
+
+    def monthly_budget(self, year) -> pd.Series:
+        """Budget per month 1-12 (0 where the sheet has no line)."""
+        i = self._year(year)
+        values = self.budget[i, 1:] if i is not None else np.zeros(12)
+        return pd.Series(values, index=np.arange(1, 13))
+
+    def annual_budget(self, year) -> float:
+        i = self._year(year)
+        return float(self.budget[i].sum()) if i is not None else 0.0
+
+    def monthly_spend(self, years) -> pd.DataFrame:
+        """Total spend per month (rows 1-12) for each of `years` (columns)."""
+        out = {}
+        for year in years:
+            i = self._year(year)
+            out[year] = self.spend[i, 1:].sum(axis=1) if i is not None else np.zeros(12)
+        return pd.DataFrame(out, index=np.arange(1, 13))
+
+    def burn_rate(self, year, through_month: int) -> pd.DataFrame:
+        """Cumulative spend vs annual budget, projected to December at the average monthly spend.
+
+        Months 1..through_month are actuals; the rest continue the average of
+        those months. Columns: Acumulado (actuals, NaN after through_month),
+        Proyeccion, Presupuesto.
+        """
+        spend = self.monthly_spend([year])[year].to_numpy()
+        months = np.arange(1, 13)
+        through_month = max(0, min(12, through_month))
+        actual = np.cumsum(spend)
+        rate = actual[through_month - 1] / through_month if through_month else 0.0
+        base = actual[through_month - 1] if through_month else 0.0
+        projection = np.where(months <= through_month, actual, base + rate * (months - through_month))
+        return pd.DataFrame({
+            "Acumulado": np.where(months <= through_month, actual, np.nan),
+            "Proyeccion": projection,
+            "Presupuesto": self.annual_budget(year),
+        }, index=months)
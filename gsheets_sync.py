@@ -0,0 +1,309 @@
+"""Lectura de Google Sheets: petición por lotes y sincronización incremental.
+
+`fetch_sheets` lee todas las hojas en una sola llamada `values_batch_get`
+(o, si esa llamada falla, en paralelo con un pool de hilos acotado) y
+reporta el tiempo de cada hoja.
+
+La bitácora casi sólo crece al final, así que en vez de `get_all_records()`
+sobre toda la hoja se pide el encabezado y la "cola" de la hoja: las últimas
+`CHECK_WINDOW` filas ya sincronizadas (para detectar ediciones recientes por
+hash) más las filas nuevas. El estado (cantidad de filas y hashes de la
+ventana) viaja en el manifest del snapshot junto al DataFrame en caché.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+import datetime
+import hashlib
+import logging
+import time
+
+import pandas as pd
+
+# Recent rows re-checked on every sync to catch edits
+CHECK_WINDOW = 200
+# Edits older than the window are picked up by a periodic full resync
+FULL_RESYNC_EVERY = 24 * 3600
+STATE_VERSION = 1
+# Bounded pool for the per-sheet fallback when the batched request fails
+FETCH_WORKERS = 4
+BITACORA = "tbl_bitacora"
+
+logger = logging.getLogger(__name__)
+
+
+def row_hash(values: List[str]) -> str:
+    h = hashlib.blake2b(digest_size=8)
+    h.update("\x1f".join(values).encode("utf-8"))
+    return h.hexdigest()
+
+
+def sheet_revision(client, key: str) -> Optional[str]:
+    """Drive modifiedTime of the spreadsheet; None if it cannot be read (e.g. no Drive scope)."""
+    try:
+        if hasattr(client, "get_file_drive_metadata"):
+            return client.get_file_drive_metadata(key)["modifiedTime"]
+        # gspread < 6
+        return client.open_by_key(key).lastUpdateTime
+    except Exception as e:
+        logger.info("sheet revision unavailable: %s", e)
+        return None
+
+
+def _numericise(row: List[str]) -> list:
+    # Same conversion get_all_records() applies to each row
+    try:
+        from gspread.utils import numericise_all
+        return numericise_all(row)
+    except ImportError:
+        out = []
+        for v in row:
+            try:
+                out.append(int(v))
+            except ValueError:
+                try:
+                    out.append(float(v))
+                except ValueError:
+                    out.append(v)
+        return out
+
+
+def _pad(rows: List[List[str]], width: int) -> List[List[str]]:
+    # The API trims trailing empty cells/rows; get_all_values() pads them back
+    return [list(r[:width]) + [""] * (width - len(r)) for r in rows]
+
+
+def _frame(header: List[str], rows: List[List[str]], index_start: int = 0) -> pd.DataFrame:
+    if len(set(header)) != len(header):
+        raise ValueError("the header row in the worksheet is not unique")
+    if not rows:
+        return pd.DataFrame(columns=header) if header else pd.DataFrame()
+    df = pd.DataFrame([_numericise(r) for r in rows], columns=header)
+    df.index = pd.RangeIndex(index_start, index_start + len(df))
+    return df
+
+
+def _new_state(ws, header: List[str], rows: List[List[str]], window: int) -> dict:
+    tail = rows[-window:] if window else []
+    return {
+        "version": STATE_VERSION,
+        "worksheet_id": ws.id,
+        "header": header,
+        "rows": len(rows),
+        "tail_hashes": [row_hash(r) for r in tail],
+        "full_sync_at": datetime.datetime.now().isoformat(timespec="seconds"),
+    }
+
+
+def _bitacora_from_values(ws, values: List[List[str]], window: int) -> Tuple[pd.DataFrame, dict, str]:
+    if not values:
+        return pd.DataFrame(), _new_state(ws, [], [], window), "full"
+    header, rows = values[0], _pad(values[1:], len(values[0]))
+    return _frame(header, rows), _new_state(ws, header, rows, window), "full"
+
+
+def _full_sync(ws, window: int) -> Tuple[pd.DataFrame, dict, str]:
+    return _bitacora_from_values(ws, ws.get_all_values(), window)
+
+
+def plan_delta(ws, cached: Optional[pd.DataFrame], state: Optional[dict]) -> Optional[Tuple[str, str]]:
+    """A1 ranges (header, tail) for a delta sync, or None if a full read is needed.
+
+    The cached frame cannot be trusted without state, for a different
+    worksheet, when its length disagrees with the state, or once the
+    periodic full resync is due.
+    """
+    if cached is None or not state or state.get("version") != STATE_VERSION or state.get("worksheet_id") != ws.id:
+        return None
+    if len(cached) != state.get("rows"):
+        return None
+    last_full = datetime.datetime.fromisoformat(state.get("full_sync_at", "1970-01-01T00:00:00"))
+    if (datetime.datetime.now() - last_full).total_seconds() > FULL_RESYNC_EVERY:
+        return None
+    first = state["rows"] - len(state["tail_hashes"])  # 0-based data row where the window starts
+    # Row 1 is the header; data row i lives in sheet row i + 2
+    return "1:1", f"{first + 2}:{max(ws.row_count, first + 2)}"
+
+
+def apply_delta(cached: pd.DataFrame, state: dict, header_rows: List[List[str]], tail_rows: List[List[str]], window: int = CHECK_WINDOW) -> Optional[Tuple[pd.DataFrame, dict, str]]:
+    """Merge the fetched header/tail into `cached`.
+
+    Returns (frame, new_state, mode) with mode "delta" or "unchanged", or None
+    when the tail does not look like an append-only change (header changed,
+    rows removed, or too many edits inside the window).
+    """
+    header = state["header"]
+    tail_hashes = state["tail_hashes"]
+    first = state["rows"] - len(tail_hashes)
+    if not header_rows or len(header_rows[0]) > len(header) or _pad(header_rows, len(header))[0] != header:
+        return None
+    tail = _pad(list(tail_rows), len(header))
+    if len(tail) < len(tail_hashes):
+        return None
+
+    edited = [i for i, h in enumerate(tail_hashes) if row_hash(tail[i]) != h]
+    if len(edited) > max(1, len(tail_hashes) // 2):
+        # Looks like rows were inserted/deleted above the tail, not edited
+        return None
+    appended = tail[len(tail_hashes):]
+    if not edited and not appended:
+        return cached, state, "unchanged"
+
+    if edited:
+        # Re-parse the whole window so column dtypes are inferred as in a full read
+        df = pd.concat([cached.iloc[:first], _frame(header, tail, index_start=first)], ignore_index=True)
+    else:
+        df = pd.concat([cached, _frame(header, appended, index_start=len(cached))], ignore_index=True)
+
+    new_state = dict(state)
+    new_state["rows"] = len(df)
+    new_state["tail_hashes"] = [row_hash(r) for r in tail[-window:]] if window else []
+    return df, new_state, "delta"
+
+
+def sync_bitacora(ws, cached: Optional[pd.DataFrame], state: Optional[dict], window: int = CHECK_WINDOW) -> Tuple[pd.DataFrame, dict, str]:
+    """Bring `cached` (the frame described by `state`) up to date with `ws`.
+
+    Returns (frame, new_state, mode) where mode is "full", "delta" or
+    "unchanged". Falls back to a full read whenever the cached frame cannot
+    be trusted (see `plan_delta` and `apply_delta`).
+    """
+    ranges = plan_delta(ws, cached, state)
+    if ranges is None:
+        return _full_sync(ws, window)
+    try:
+        header_rows, tail_rows = ws.batch_get(list(ranges))
+    except Exception:
+        # e.g. the grid shrank below the window start
+        return _full_sync(ws, window)
+    merged = apply_delta(cached, state, header_rows, tail_rows, window)
+    return merged if merged is not None else _full_sync(ws, window)
+
+
+def _a1(title: str, rng: Optional[str] = None) -> str:
+    name = "'" + title.replace("'", "''") + "'"
+    return f"{name}!{rng}" if rng else name
+
+
+def _records_frame(values: List[List[str]]) -> pd.DataFrame:
+    # Same frame as pd.DataFrame(ws.get_all_records())
+    if len(values) < 2:
+        return pd.DataFrame()
+    return _frame(values[0], _pad(values[1:], len(values[0])))
+
+
+def _ms(t0: float) -> float:
+    return round((time.perf_counter() - t0) * 1000, 1)
+
+
+def _fetch_batched(sh, targets: dict, prev_bitacora, prev_sync, window: int, timings: dict):
+    ranges, slots = [], []
+    delta = None
+    for name, ws in targets.items():
+        if name == BITACORA:
+            delta = plan_delta(ws, prev_bitacora, prev_sync)
+            if delta is not None:
+                ranges += [_a1(ws.title, r) for r in delta]
+                slots += [(name, "header"), (name, "tail")]
+                continue
+        ranges.append(_a1(ws.title))
+        slots.append((name, "all"))
+
+    t0 = time.perf_counter()
+    resp = sh.values_batch_get(ranges)
+    timings["batch_request"] = _ms(t0)
+    values = {slot: vr.get("values", []) for slot, vr in zip(slots, resp.get("valueRanges", []))}
+
+    frames, sync_state = {}, None
+    for name, ws in targets.items():
+        t0 = time.perf_counter()
+        if name == BITACORA:
+            merged = None
+            if delta is not None:
+                merged = apply_delta(prev_bitacora, prev_sync, values[(name, "header")], values[(name, "tail")], window)
+                if merged is None:
+                    # Not append-only after all: one extra request for the whole sheet
+                    merged = _full_sync(ws, window)
+            else:
+                merged = _bitacora_from_values(ws, values[(name, "all")], window)
+            frames[name], sync_state, mode = merged
+            timings[f"{name} ({mode})"] = _ms(t0)
+        else:
+            frames[name] = _records_frame(values[(name, "all")])
+            timings[name] = _ms(t0)
+    return frames, sync_state
+
+
+def _fetch_one(name: str, ws, prev_bitacora, prev_sync, window: int):
+    t0 = time.perf_counter()
+    if name == BITACORA:
+        df, state, mode = sync_bitacora(ws, prev_bitacora, prev_sync, window)
+        return df, state, f"{name} ({mode})", _ms(t0)
+    data = ws.get_all_records()
+    return (pd.DataFrame(data) if data else pd.DataFrame()), None, name, _ms(t0)
+
+
+def _fetch_concurrent(sh, targets: dict, prev_bitacora, prev_sync, window: int, timings: dict, notices: list):
+    frames, sync_state = {}, None
+    with ThreadPoolExecutor(max_workers=max(1, min(FETCH_WORKERS, len(targets)))) as pool:
+        futures = {name: pool.submit(_fetch_one, name, ws, prev_bitacora, prev_sync, window) for name, ws in targets.items()}
+        for name, fut in futures.items():
+            try:
+                frames[name], state, label, elapsed = fut.result()
+                timings[label] = elapsed
+                if name == BITACORA:
+                    sync_state = state
+            except Exception as e:
+                if name == BITACORA:
+                    # Fallback for main sheet
+                    try:
+                        ws = sh.get_worksheet(0)
+                        frames[name] = pd.DataFrame(ws.get_all_records())
+                        notices.append(f"Error cargando 'tbl_bitacora' ({e}), intentando con la primera hoja: '{ws.title}'")
+                    except Exception:
+                        frames[name] = pd.DataFrame()
+                else:
+                    # Optional sheets return empty if missing or error
+                    frames[name] = pd.DataFrame()
+    return frames, sync_state
+
+
+def fetch_sheets(sh, names: List[str], prev_bitacora: Optional[pd.DataFrame] = None, prev_sync: Optional[dict] = None, window: int = CHECK_WINDOW) -> Tuple[Dict[str, pd.DataFrame], Optional[dict], Dict[str, float], List[str]]:
+    """Read the worksheets `names` of spreadsheet `sh`.
+
+    One metadata call resolves the worksheets and one `values_batch_get`
+    fetches them all (the bitácora as a delta when `prev_*` allow it). If the
+    batch fails, each sheet is read on its own thread. As before, a missing
+    or failing `tbl_bitacora` falls back to the first worksheet and missing
+    optional sheets come back as empty frames.
+
+    Returns (frames, bitacora_sync_state, timings_ms, notices) where notices
+    are user-facing warnings.
+    """
+    timings, notices = {}, []
+    t0 = time.perf_counter()
+    worksheets = sh.worksheets()
+    timings["metadata"] = _ms(t0)
+    by_title = {ws.title: ws for ws in worksheets}
+
+    targets = {}
+    for name in names:
+        if name in by_title:
+            targets[name] = by_title[name]
+        elif name == BITACORA and worksheets:
+            targets[name] = worksheets[0]
+            notices.append(f"No se encontró 'tbl_bitacora', usando la primera hoja: '{worksheets[0].title}'")
+
+    t0 = time.perf_counter()
+    try:
+        frames, sync_state = _fetch_batched(sh, targets, prev_bitacora, prev_sync, window, timings)
+        mode = "batch"
+    except Exception as e:
+        logger.warning("Batched Google Sheets read failed (%s); reading sheets concurrently", e)
+        frames, sync_state = _fetch_concurrent(sh, targets, prev_bitacora, prev_sync, window, timings, notices)
+        mode = "concurrent"
+    timings["total"] = _ms(t0) + timings["metadata"]
+
+    for name in names:
+        frames.setdefault(name, pd.DataFrame())
+    logger.info("Google Sheets %s read: %s", mode, ", ".join(f"{k}={v:.0f}ms" for k, v in timings.items()))
+    return {name: frames[name] for name in names}, sync_state, timings, notices
@@ -0,0 +1,200 @@
+"""Cálculos de KPI de mantenimiento (detenciones, tiempo programado)."""
+from typing import Optional, Tuple
+import datetime
+
+import numpy as np
+import pandas as pd
+
+
+def compute_downtime_minutes(row: pd.Series, det_min_col: Optional[str], inicio_col: Optional[str], fin_col: Optional[str]) -> float:
+    # prefer explicit downtime column
+    if det_min_col and det_min_col in row.index:
+        try:
+            v = row[det_min_col]
+            if pd.isna(v):
+                raise ValueError
+            if isinstance(v, str):
+                v = v.replace(",", ".")
+            return float(v)
+        except Exception:
+            pass
+    # try compute from start/end datetimes
+    try:
+        if inicio_col and fin_col and inicio_col in row.index and fin_col in row.index:
+            a = pd.to_datetime(row[inicio_col], errors="coerce")
+            b = pd.to_datetime(row[fin_col], errors="coerce")
+            if pd.isna(a) or pd.isna(b):
+                return 0.0
+            delta = b - a
+            return max(delta.total_seconds() / 60.0, 0.0)
+    except Exception:
+        return 0.0
+    return 0.0
+
+
+def _map_distinct(s: pd.Series, func, missing) -> np.ndarray:
+    """Apply a scalar function once per distinct value of s; nulls map to `missing`."""
+    codes, uniques = pd.factorize(s)
+    values = np.array([func(v) for v in uniques] + [missing])
+    return values[codes]
+
+
+def _float_or_nan(v) -> float:
+    # Same coercion as compute_downtime_minutes
+    try:
+        if isinstance(v, str):
+            v = v.replace(",", ".")
+        return float(v)
+    except Exception:
+        return np.nan
+
+
+def _instant_or_nat(v):
+    try:
+        return pd.to_datetime(v, errors="coerce").to_datetime64()
+    except Exception:
+        return np.datetime64("NaT")
+
+
+def _as_minutes(s: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(s) and not pd.api.types.is_bool_dtype(s):
+        return s.to_numpy(dtype=float, na_value=np.nan)
+    return _map_distinct(s, _float_or_nan, np.nan).astype(float)
+
+
+def _as_instants(s: pd.Series) -> np.ndarray:
+    if pd.api.types.is_datetime64_dtype(s):
+        return s.to_numpy(dtype="datetime64[ns]")
+    return _map_distinct(s, _instant_or_nat, np.datetime64("NaT", "ns")).astype("datetime64[ns]")
+
+
+def downtime_minutes(df: pd.DataFrame, det_min_col: Optional[str], inicio_col: Optional[str], fin_col: Optional[str]) -> pd.Series:
+    """Columnar version of compute_downtime_minutes for a whole frame.
+
+    Per row: the explicit minutes column if it parses as a number, else
+    max(Fin - Inicio, 0), else 0.
+    Text columns are parsed once per distinct value, so a 1M-row bitácora
+    with a few thousand distinct clock times costs a few thousand parses.
+    """
+    out = np.full(len(df), np.nan)
+    if det_min_col and det_min_col in df.columns:
+        out = _as_minutes(df[det_min_col])
+    pending = np.isnan(out)
+    fallback = np.zeros(len(df))
+    if inicio_col and fin_col and inicio_col in df.columns and fin_col in df.columns and pending.any():
+        a = _as_instants(df[inicio_col][pending])
+        b = _as_instants(df[fin_col][pending])
+        # Timedelta.total_seconds() works at microsecond resolution
+        delta = (b - a).astype("timedelta64[us]") / np.timedelta64(1, "s") / 60.0
+        fallback[pending] = np.where(np.isnan(delta), 0.0, np.maximum(delta, 0.0))
+    return pd.Series(np.where(pending, fallback, out), index=df.index, dtype=float)
+
+
+# Standard shift by weekday (Mon=0 ... Sun=6):
+# Mon-Thu 08:00-18:00 (10h) - 30m lunch = 9.5h; Fri 08:00-14:30 (6.5h) - 30m lunch = 6.0h; Sat-Sun 0.
+STANDARD_SHIFT_MINUTES = np.array([570.0, 570.0, 570.0, 570.0, 360.0, 0.0, 0.0])
+
+
+def standard_shift_minutes(d: datetime.date) -> float:
+    return float(STANDARD_SHIFT_MINUTES[d.weekday()])
+
+
+def standard_minutes_between(start: datetime.date, end: datetime.date) -> float:
+    """Standard-shift minutes of one equipment over [start, end], from weekday counts."""
+    if end < start:
+        return 0.0
+    stop = end + datetime.timedelta(days=1)
+    total = 0.0
+    for wd, minutes in enumerate(STANDARD_SHIFT_MINUTES):
+        if minutes:
+            mask = "".join("1" if i == wd else "0" for i in range(7))
+            total += minutes * np.busday_count(start, stop, weekmask=mask)
+    return total
+
+
+class AvailabilityCube:
+    """Equipo x Día totals with prefix sums along the date axis.
+
+    Built once per data version from the whole bitácora and tbl_programacion.
+    Only days with events or overrides are stored (a typo'd year does not
+    allocate decades of empty days); the standard shift of any range comes
+    from `standard_minutes_between`, so a date range reduces to two
+    `searchsorted` lookups and one subtraction per equipment.
+    """
+
+    def __init__(self, equipos: np.ndarray, days: np.ndarray, downtime: np.ndarray, events: np.ndarray, correction: np.ndarray):
+        self.equipos = equipos
+        self.days = days
+        zero = np.zeros((len(equipos), 1))
+        self._downtime = np.hstack([zero, np.cumsum(downtime, axis=1)])
+        self._events = np.hstack([zero, np.cumsum(events, axis=1)])
+        self._correction = np.hstack([zero, np.cumsum(correction, axis=1)])
+        has_events = events > 0
+        self._first_event = np.where(has_events.any(axis=1), has_events.argmax(axis=1), -1)
+        self._last_event = np.where(has_events.any(axis=1), len(days) - 1 - has_events[:, ::-1].argmax(axis=1), -1)
+
+    @classmethod
+    def build(cls, dates: pd.Series, equipos: pd.Series, downtime: pd.Series, overrides: Optional[pd.DataFrame] = None) -> "AvailabilityCube":
+        """`dates`/`equipos`/`downtime` are aligned bitácora columns; `overrides` is the canonical tbl_programacion."""
+        ev_days = pd.to_datetime(pd.Series(dates), errors="coerce").to_numpy(dtype="datetime64[D]")
+        ev_eq = pd.Series(equipos).to_numpy(dtype=object)
+        ev_down = pd.Series(downtime).to_numpy(dtype=float)
+        if overrides is None or overrides.empty:
+            overrides = pd.DataFrame({"fecha": pd.Series(dtype="datetime64[ns]"), "equipo": [], "minutos": []})
+        ov_days = pd.to_datetime(overrides["fecha"], errors="coerce").to_numpy(dtype="datetime64[D]")
+        ov_eq = overrides["equipo"].to_numpy(dtype=object)
+        ov_mins = overrides["minutos"].to_numpy(dtype=float)
+
+        # Every equipment seen in either sheet, even on rows without a valid date
+        codes, uniques = pd.factorize(np.concatenate([ev_eq, ov_eq]))
+        ev_code, ov_code = codes[:len(ev_eq)], codes[len(ev_eq):]
+        ev_ok = (ev_code >= 0) & ~np.isnat(ev_days)
+        ov_ok = (ov_code >= 0) & ~np.isnat(ov_days)
+        days = np.unique(np.concatenate([ev_days[ev_ok], ov_days[ov_ok]]))
+        shape = (len(uniques), len(days))
+
+        downtime_grid = np.zeros(shape)
+        events_grid = np.zeros(shape)
+        ev_col = np.searchsorted(days, ev_days[ev_ok])
+        np.add.at(downtime_grid, (ev_code[ev_ok], ev_col), ev_down[ev_ok])
+        np.add.at(events_grid, (ev_code[ev_ok], ev_col), 1)
+
+        # Overridden cells count the sum of their rows (NaN rows -> standard shift) instead of the standard shift
+        ov_col = np.searchsorted(days, ov_days[ov_ok])
+        weekday = (ov_days[ov_ok].astype("datetime64[D]").view("int64") - 4) % 7  # 1970-01-01 was a Thursday
+        std = STANDARD_SHIFT_MINUTES[weekday]
+        correction = np.zeros(shape)
+        np.add.at(correction, (ov_code[ov_ok], ov_col), np.where(np.isnan(ov_mins[ov_ok]), std, ov_mins[ov_ok]))
+        replaced = np.zeros(shape, dtype=bool)
+        replaced[ov_code[ov_ok], ov_col] = True
+        day_std = STANDARD_SHIFT_MINUTES[(days.view("int64") - 4) % 7]
+        correction -= np.where(replaced, day_std, 0.0)
+        return cls(np.asarray(uniques, dtype=object), days, downtime_grid, events_grid, correction)
+
+    def _slice(self, start: datetime.date, end: datetime.date) -> Tuple[int, int]:
+        lo = np.searchsorted(self.days, np.datetime64(start, "D"), side="left")
+        hi = np.searchsorted(self.days, np.datetime64(end, "D"), side="right")
+        return lo, max(lo, hi)
+
+    def select(self, keys: Optional[set] = None) -> np.ndarray:
+        """Boolean mask of equipments whose stripped name is in `keys` (all if None)."""
+        if keys is None:
+            return np.ones(len(self.equipos), dtype=bool)
+        return np.array([str(e).strip() in keys for e in self.equipos], dtype=bool)
+
+    def event_bounds(self, mask: np.ndarray) -> Tuple[Optional[datetime.date], Optional[datetime.date]]:
+        """First and last day with bitácora events among the selected equipments."""
+        first, last = self._first_event[mask], self._last_event[mask]
+        if not (first >= 0).any():
+            return None, None
+        return self.days[first[first >= 0].min()].item(), self.days[last.max()].item()
+
+    def totals(self, start: datetime.date, end: datetime.date, mask: np.ndarray) -> pd.DataFrame:
+        """Equipo, Downtime_Min, Programmed_Min and Events over [start, end] for the selected equipments."""
+        lo, hi = self._slice(start, end)
+        return pd.DataFrame({
+            "Equipo": self.equipos[mask],
+            "Downtime_Min": (self._downtime[:, hi] - self._downtime[:, lo])[mask],
+            "Programmed_Min": standard_minutes_between(start, end) + (self._correction[:, hi] - self._correction[:, lo])[mask],
+            "Events": (self._events[:, hi] - self._events[:, lo])[mask].astype(int),
+        })
@@ -0,0 +1,67 @@
+"""Informe de memoria de las hojas cargadas.
+
+Compara los bytes por fila de cada hoja tal como se lee (texto/objetos) con
+las tablas canónicas compactas de `schema.canonical_sheets` que usan las
+secciones del dashboard. Sirve para estimar cuántas plantas caben en una VM.
+
+    python memory_report.py                  # fuente automática
+    python memory_report.py --source xlsm
+"""
+from pathlib import Path
+from typing import Dict
+import argparse
+import sys
+
+import pandas as pd
+
+from schema import BITACORA_TEXTO, CANONICAL_SOURCES, canonical_sheets
+
+
+def frame_bytes(df: pd.DataFrame) -> int:
+    """Deep memory usage of a frame (object/text cells included)."""
+    return int(df.memory_usage(deep=True, index=True).sum())
+
+
+def memory_report(sheets: Dict[str, pd.DataFrame], canon: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """One row per loaded sheet: rows, bytes per row before (raw) and after (canonical)."""
+    rows = []
+    for sheet, raw in sheets.items():
+        frames = [name for name, src in CANONICAL_SOURCES.items() if src == sheet and name in canon]
+        n = len(raw)
+        before = frame_bytes(raw)
+        after = sum(frame_bytes(canon[name]) for name in frames)
+        text = sum(frame_bytes(canon[name]) for name in frames if name == BITACORA_TEXTO)
+        rows.append({
+            "Hoja": sheet,
+            "Filas": n,
+            "Antes (B/fila)": before / n if n else 0.0,
+            "Después (B/fila)": after / n if n and frames else float("nan"),
+            "Texto libre (B/fila)": text / n if n and frames else float("nan"),
+            "Antes (MB)": before / 2**20,
+            "Después (MB)": after / 2**20 if frames else float("nan"),
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    from storage_sqlite import load_source
+
+    parser = argparse.ArgumentParser(description="Bytes por fila de las hojas antes y después de compactarlas.")
+    parser.add_argument("--source", choices=["auto", "local", "gsheets"], default="auto")
+    args = parser.parse_args()
+
+    try:
+        sheets, origin, _ = load_source(Path(__file__).parent, args.source)
+    except Exception as e:
+        print(f"ERROR al leer la fuente '{args.source}': {e}")
+        sys.exit(1)
+
+    report = memory_report(sheets, canonical_sheets(sheets))
+    print(f"Memoria de las hojas leídas desde {origin}:")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+    total_before, total_after = report["Antes (MB)"].sum(), report["Después (MB)"].sum()
+    print(f"Total: {total_before:,.2f} MB -> {total_after:,.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
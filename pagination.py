@@ -0,0 +1,85 @@
+"""Vista paginada de hojas grandes (Bitácora).
+
+El navegador sólo recibe la página visible. El orden por columna se calcula
+en el servidor una vez por columna y sentido (índices de filas preordenados)
+y se reutiliza en cada interacción: ordenar, filtrar y cambiar de página es
+indexar arreglos, sin importar cuántos años de registros tenga la hoja.
+"""
+from typing import Dict, Optional, Tuple
+import warnings
+
+import numpy as np
+import pandas as pd
+
+from schema import _dates
+
+PAGE_SIZES = [50, 100, 250, 500]
+
+# Distinct values tried before parsing a whole text column as numbers or dates
+_SNIFF = 200
+
+
+def _parses(parse, uniques: pd.Series) -> Optional[pd.Series]:
+    """parse(uniques) if every value parses, checking a sample first (free text fails fast)."""
+    with warnings.catch_warnings():
+        # Mixed formats fall back to per-value parsing, which is what we want
+        warnings.simplefilter("ignore", UserWarning)
+        if parse(uniques.head(_SNIFF)).isna().any():
+            return None
+        parsed = parse(uniques)
+    return None if parsed.isna().any() else parsed
+
+
+def _value_ranks(uniques: pd.Series) -> np.ndarray:
+    """Rank of each distinct value: as numbers, else as dates, else as text without accents."""
+    if pd.api.types.is_numeric_dtype(uniques):
+        return _ranks(uniques.to_numpy(dtype=float))
+    numbers = _parses(lambda v: pd.to_numeric(v, errors="coerce"), uniques)
+    if numbers is not None:
+        return _ranks(numbers.to_numpy(dtype=float))
+    dates = _parses(_dates, uniques)
+    if dates is not None:
+        return _ranks(dates.to_numpy(dtype="datetime64[ns]"))
+    # normalize_str, column-wise
+    text = uniques.astype(str).str.normalize("NFD").str.replace("[\u0300-\u036f]", "", regex=True).str.lower()
+    return _ranks(text.to_numpy(dtype=object))
+
+
+def _ranks(key: np.ndarray) -> np.ndarray:
+    ranks = np.empty(len(key), dtype=np.int64)
+    ranks[np.argsort(key, kind="stable")] = np.arange(len(key))
+    return ranks
+
+
+class SortedPages:
+    """Row order of a frame by any column, computed on first use and kept."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._orders: Dict[Tuple[str, bool], np.ndarray] = {}
+
+    def order(self, column: Optional[str] = None, ascending: bool = True) -> np.ndarray:
+        """Row positions sorted by `column` (sheet order if None); missing values go last either way."""
+        if column is None:
+            return np.arange(len(self.df))
+        if (column, ascending) not in self._orders:
+            codes, uniques = pd.factorize(self.df[column], sort=False)
+            ranks = _value_ranks(pd.Series(uniques))
+            key = np.where(codes >= 0, ranks[codes] if ascending else -ranks[codes], np.iinfo(np.int64).max)
+            self._orders[(column, ascending)] = np.argsort(key, kind="stable")
+        return self._orders[(column, ascending)]
+
+    def rows(self, column: Optional[str] = None, ascending: bool = True, mask: Optional[np.ndarray] = None) -> np.ndarray:
+        """Sorted row positions, keeping only those where `mask` is True."""
+        order = self.order(column, ascending)
+        return order if mask is None else order[mask[order]]
+
+
+def page_count(total: int, page_size: int) -> int:
+    return max(1, -(-total // page_size))
+
+
+def page(df: pd.DataFrame, rows: np.ndarray, number: int, page_size: int) -> pd.DataFrame:
+    """Rows of page `number` (1-based) out of the sorted/filtered positions."""
+    start = (number - 1) * page_size
+    return df.iloc[rows[start:start + page_size]]
@@ -0,0 +1,167 @@
+"""Exportación de la Bitácora a PDF.
+
+La tabla se arma por tramos de filas (del tamaño de una página,
+aproximadamente) y cada tramo se maqueta y se escribe antes de crear el
+siguiente, así la memoria no crece con el largo de la bitácora (con la API
+pública de reportlab: cada tramo se ubica en el canvas con `wrapOn`/`splitOn`
+/`drawOn`). `PdfJob` ejecuta la exportación en un hilo aparte e informa el
+avance, para que la sesión de Streamlit siga respondiendo mientras se genera
+un año completo; el archivo temporal se borra al terminar (o al fallar) y el
+PDF queda en memoria para la descarga.
+"""
+from typing import Callable, Iterator, List, Optional
+from xml.sax.saxutils import escape
+import os
+import tempfile
+import threading
+
+import pandas as pd
+
+# Rows per table chunk: a few landscape A4 pages
+CHUNK_ROWS = 100
+
+
+def _cell_text(chunk: pd.DataFrame) -> List[List[str]]:
+    """Cells of a chunk as Paragraph markup: blanks for missing values, <br /> for line breaks."""
+    text = chunk.astype(object).where(chunk.notna(), "").astype(str)
+    return [[escape(v).replace("\n", "<br />") for v in row] for row in text.itertuples(index=False, name=None)]
+
+
+def write_pdf(df: pd.DataFrame, out_path: str, title: str = "Reporte - Bitácora",
+              progress: Optional[Callable[[int], None]] = None, chunk_rows: int = CHUNK_ROWS) -> None:
+    """Write df as a landscape A4 table, one chunk of rows at a time.
+
+    Each chunk is its own table with the header row repeated, so only one
+    chunk of Paragraphs is alive at a time and no giant table is ever split.
+    `progress(rows_done)` is called after each chunk. Raises ImportError
+    without reportlab.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.enums import TA_LEFT
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.pdfgen.canvas import Canvas
+    from reportlab.platypus import Paragraph, Spacer, Table, TableStyle
+
+    page_w, page_h = landscape(A4)
+    margin = 18
+    # Content box: page margins plus the 6 pt padding of a platypus Frame
+    left, bottom, top = margin + 6, margin + 6, page_h - margin - 6
+    width = page_w - 2 * (margin + 6)
+    styles = getSampleStyleSheet()
+    # black text on white background, readable sizes
+    styleN = ParagraphStyle('NormalPDF', parent=styles['Normal'], fontName='Helvetica', fontSize=9, leading=11, alignment=TA_LEFT, textColor=colors.black)
+    styleH = ParagraphStyle('HeadingPDF', parent=styles['Heading1'], fontName='Helvetica-Bold', fontSize=14, leading=16, alignment=TA_LEFT, textColor=colors.black)
+    styleHdr = ParagraphStyle('hdr', parent=styleN, fontName='Helvetica-Bold', fontSize=10, textColor=colors.black)
+
+    ncols = len(df.columns)
+    available_w = page_w - 2 * margin
+    col_w = [max(40, available_w / ncols)] * ncols if ncols else None
+    header = [Paragraph(escape(str(c)), styleHdr) for c in df.columns]
+    # Light, printable style: white background, black text, subtle alternating row colors
+    table_style = TableStyle([
+        ("BACKGROUND", (0, 0), (-1, 0), colors.HexColor("#f2f2f2")),
+        ("TEXTCOLOR", (0, 0), (-1, -1), colors.black),
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.HexColor("#cccccc")),
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ("FONTSIZE", (0, 0), (-1, -1), 9),
+        ("ALIGN", (0, 0), (-1, 0), "LEFT"),
+        ("LEFTPADDING", (0, 0), (-1, -1), 6),
+        ("RIGHTPADDING", (0, 0), (-1, -1), 6),
+        ("TOPPADDING", (0, 0), (-1, -1), 4),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), 4),
+        ("ROWBACKGROUNDS", (0, 1), (-1, -1), [colors.white, colors.HexColor('#fafafa')]),
+    ])
+
+    def chunks() -> Iterator[list]:
+        yield [Paragraph(escape(title), styleH), Spacer(1, 8)]
+        if not ncols:
+            return
+        for start in range(0, len(df), chunk_rows):
+            rows = [[Paragraph(txt, styleN) for txt in row] for row in _cell_text(df.iloc[start:start + chunk_rows])]
+            table = Table([header] + rows, colWidths=col_w, repeatRows=1)
+            table.setStyle(table_style)
+            yield [table]
+            if progress:
+                progress(min(start + chunk_rows, len(df)))
+
+    canv = Canvas(out_path, pagesize=(page_w, page_h))
+    y = top
+
+    def new_page():
+        nonlocal y
+        canv.showPage()
+        y = top
+
+    def place(flowable):
+        """Draw at the cursor, splitting across pages (a split table repeats its header)."""
+        nonlocal y
+        pending = [flowable]
+        while pending:
+            f = pending.pop(0)
+            _, h = f.wrapOn(canv, width, y - bottom)
+            if h <= y - bottom:
+                f.drawOn(canv, left, y - h)
+                y -= h
+                continue
+            parts = f.splitOn(canv, width, y - bottom)
+            if len(parts) > 1:
+                pending[:0] = parts
+            elif y < top:
+                new_page()
+                pending.insert(0, f)
+            else:
+                # Taller than a page and not splittable (a single huge row): cut at the page bottom
+                f.drawOn(canv, left, y - h)
+                new_page()
+
+    # Only the chunk being placed is alive: nothing is kept once it is drawn
+    for flowables in chunks():
+        for flowable in flowables:
+            place(flowable)
+    canv.save()
+
+
+class PdfJob:
+    """A write_pdf() running in a background thread; poll `done`/`finished`/`error`."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.total = len(df)
+        self.done = 0
+        self.error: Optional[str] = None
+        self.finished = False
+        self.data: Optional[bytes] = None
+        self._thread = threading.Thread(target=self._run, args=(df,), daemon=True)
+
+    @classmethod
+    def start(cls, df: pd.DataFrame) -> "PdfJob":
+        job = cls(df)
+        job._thread.start()
+        return job
+
+    def _run(self, df: pd.DataFrame):
+        # The temporary file only lives while the PDF is written; the result is kept as bytes
+        fd, path = tempfile.mkstemp(prefix="bitacora_", suffix=".pdf")
+        os.close(fd)
+        try:
+            write_pdf(df, path, progress=self._progress)
+            with open(path, "rb") as f:
+                self.data = f.read()
+        except ImportError:
+            self.error = "reportlab no está instalado."
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            os.remove(path)
+            self.finished = True
+
+    def _progress(self, rows: int):
+        self.done = rows
+
+    @property
+    def running(self) -> bool:
+        return not self.finished
+
+    def read(self) -> bytes:
+        return self.data
@@ -0,0 +1,51 @@
+"""Precalcula las vistas por defecto del tablero (sin Streamlit).
+
+    python precompute.py
+
+Carga los datos igual que la app (Google Sheets con las credenciales de
+`.streamlit/secrets.toml`, o el CSV/libro local), así que usa y deja el
+mismo snapshot y la misma versión de datos. Guarda `dashboard.pkl` junto a
+esa versión en `.snapshot/`: la app abre las secciones con filtros por
+defecto desde ahí, sin armar las tablas canónicas. Conviene correrlo después
+de cada sincronización (sync_excel.sh) o periódicamente con cron.
+"""
+from pathlib import Path
+import sys
+import time
+
+from dashboard import precompute, write_dashboard
+from data_source import gsheets_credentials, load_sheets, read_secrets
+from schema import canonical_sheets
+from snapshot import SNAPSHOT_DIRNAME
+
+
+def main():
+    workspace = Path(__file__).parent
+    xls_path = workspace / "BBDD_MANTENCION.xlsm"
+
+    start = time.perf_counter()
+    try:
+        sheets, source_type, data_version, notices = load_sheets(xls_path, gsheets_credentials(read_secrets(workspace)))
+    except Exception as e:
+        print(f"ERROR al cargar los datos: {e}")
+        sys.exit(1)
+    for _, text in notices:
+        print(text)
+    if not sheets or not data_version:
+        print("ERROR: no hay datos (o no se pudo escribir el snapshot) para precalcular.")
+        sys.exit(1)
+    print(f"Datos: {source_type} (versión {data_version}), {time.perf_counter() - start:.2f} s")
+
+    t0 = time.perf_counter()
+    canon = canonical_sheets(sheets)
+    print(f" - tablas canónicas: {time.perf_counter() - t0:.2f} s")
+    dashboard = precompute(sheets, canon, data_version)
+    for name, seconds in dashboard["seconds"].items():
+        print(f" - {name}: {seconds:.2f} s")
+
+    path = write_dashboard(workspace / SNAPSHOT_DIRNAME, dashboard)
+    print(f"¡Éxito! Vistas guardadas en {path} ({time.perf_counter() - start:.2f} s en total)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""Tiempos y memoria por etapa de la carga de datos y de cada ejecución de la app.
+
+`span("nombre")` mide un bloque: milisegundos, memoria del proceso al
+terminar (RSS), cuánto creció durante el bloque y el máximo del proceso. Los
+bloques dentro de otro quedan anidados en la misma traza; el más externo
+(una ejecución del script, o una carga de `load_sheets` en el hilo de
+recarga) la cierra: la traza queda en memoria para el panel de
+administración y se agrega como una línea JSON a `logs/tiempos.jsonl` (un
+archivo por día, se conservan `LOG_DAYS`). Medir cuesta unos microsegundos
+por bloque.
+
+    python profiling.py                          # etapas de los últimos 7 días
+    python profiling.py --days 30 --trace load_sheets
+"""
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from logging.handlers import TimedRotatingFileHandler
+from pathlib import Path
+from typing import Iterator, List, Optional
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+import threading
+import time
+
+try:
+    import resource
+except ImportError:
+    # Windows: no peak RSS
+    resource = None
+
+LOG_PATH = Path(__file__).parent / "logs" / "tiempos.jsonl"
+# Daily files kept by the rotation
+LOG_DAYS = 30
+# Finished traces kept in memory for the debug panel (whole process)
+RECENT_TRACES = 50
+
+_PAGE_MB = (os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096) / 2**20
+_current: ContextVar[Optional["Trace"]] = ContextVar("profiling_trace", default=None)
+_recent: "deque[Trace]" = deque(maxlen=RECENT_TRACES)
+_lock = threading.Lock()
+_logger: Optional[logging.Logger] = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """Highest resident memory of this process so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, KiB elsewhere
+    return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def rss_mb() -> Optional[float]:
+    """Resident memory of this process now (the peak where /proc is not available)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_MB
+    except (OSError, IndexError, ValueError):
+        return peak_rss_mb()
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return None if value is None else round(value, 1)
+
+
+class Trace:
+    """Spans of one script run or data load, in the order they started."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.started = datetime.datetime.now()
+        self.spans: List[dict] = []
+        self.peak_rss_mb: Optional[float] = None
+        self._depth = 0
+
+    @property
+    def ms(self) -> Optional[float]:
+        return self.spans[0].get("ms") if self.spans else None
+
+    def as_record(self) -> dict:
+        return {"ts": self.started.isoformat(timespec="seconds"), "trace": self.name, "pid": os.getpid(),
+                "ms": self.ms, "peak_rss_mb": self.peak_rss_mb, "spans": self.spans}
+
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[dict]:
+    """Time the block as a step of the current trace (or as the root of a new one).
+
+    Yields the span's record: keys added to it (rows, cache hit...) are logged with it.
+    """
+    trace = _current.get()
+    token = None
+    if trace is None:
+        trace = Trace(name)
+        token = _current.set(trace)
+    record = {"name": name, "depth": trace._depth, **attrs}
+    trace.spans.append(record)
+    trace._depth += 1
+    rss_start = rss_mb()
+    t0 = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        rss_end = rss_mb()
+        record["rss_mb"] = _round(rss_end)
+        record["delta_mb"] = _round(rss_end - rss_start) if rss_end is not None and rss_start is not None else None
+        trace._depth -= 1
+        if token is not None:
+            _current.reset(token)
+            _finish(trace)
+
+
+def current_trace() -> Optional[Trace]:
+    """The trace the running code is part of, if any."""
+    return _current.get()
+
+
+def recent_traces(name: Optional[str] = None) -> List[Trace]:
+    """Finished traces of this process, newest first."""
+    with _lock:
+        traces = list(_recent)
+    return [t for t in reversed(traces) if name is None or t.name == name]
+
+
+def _finish(trace: Trace):
+    trace.peak_rss_mb = _round(peak_rss_mb())
+    with _lock:
+        _recent.append(trace)
+    try:
+        _log().info(json.dumps(trace.as_record(), ensure_ascii=False, default=str))
+    except Exception:
+        # Profiling never breaks the app
+        pass
+
+
+def _log() -> logging.Logger:
+    global _logger
+    with _lock:
+        if _logger is None:
+            logger = logging.getLogger("dashboard.tiempos")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            try:
+                LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+                handler = TimedRotatingFileHandler(LOG_PATH, when="midnight", backupCount=LOG_DAYS, encoding="utf-8")
+            except OSError:
+                # Read-only deployment: keep the in-memory traces only
+                handler = logging.NullHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+            _logger = logger
+        return _logger
+
+
+def read_log(days: int = 7, log_path: Path = LOG_PATH) -> List[dict]:
+    """Traces logged over the last `days` days (current and rotated files)."""
+    since = (datetime.datetime.now() - datetime.timedelta(days=days)).isoformat(timespec="seconds")
+    traces = []
+    for path in sorted(log_path.parent.glob(log_path.name + "*")):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    trace = json.loads(line)
+                except ValueError:
+                    continue
+                if trace.get("ts", "") >= since:
+                    traces.append(trace)
+    return traces
+
+
+def summarize(traces: List[dict]):
+    """Count, median, p95 and max milliseconds, memory growth and cache hits per trace and span name."""
+    import pandas as pd
+
+    rows = [{"Traza": t["trace"], "Etapa": s["name"], "ms": s.get("ms"), "delta_mb": s.get("delta_mb"), "rss_mb": s.get("rss_mb"),
+             "cached": float(s["cached"]) if "cached" in s else None}
+            for t in traces for s in t.get("spans", [])]
+    if not rows:
+        return pd.DataFrame()
+    df = pd.DataFrame(rows)
+    grouped = df.groupby(["Traza", "Etapa"], sort=False)
+    out = grouped["ms"].agg(N="count", Mediana="median", P95=lambda s: s.quantile(0.95), Max="max")
+    out["Δ MB medio"] = grouped["delta_mb"].mean()
+    out["RSS máx (MB)"] = grouped["rss_mb"].max()
+    # Share of AppContext.memo lookups served from the result cache
+    out["Caché (%)"] = grouped["cached"].mean() * 100
+    return out.reset_index()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumen de tiempos y memoria por etapa desde logs/tiempos.jsonl.")
+    parser.add_argument("--days", type=int, default=7, help="días hacia atrás")
+    parser.add_argument("--trace", help="sólo esta traza (app, load_sheets)")
+    args = parser.parse_args()
+
+    traces = [t for t in read_log(args.days) if args.trace is None or t["trace"] == args.trace]
+    if not traces:
+        print(f"No hay trazas de los últimos {args.days} días en {LOG_PATH.parent}.")
+        sys.exit(1)
+    summary = summarize(traces)
+    print(f"{len(traces):,} trazas desde {min(t['ts'] for t in traces)}:")
+    print(summary.to_string(index=False, float_format=lambda v: f"{v:,.1f}"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,240 @@
+"""Métricas de confiabilidad por equipo (Pareto + Weibull).
+
+Frecuencia, detención, tiempos entre fallas (TBF) y la regresión de rangos
+medianos de Weibull se calculan para todos los equipos en una sola pasada
+agrupada con numpy, en vez de filtrar el DataFrame una vez por equipo.
+Los intervalos de confianza de β, η y la vida B10 se obtienen por bootstrap:
+todas las remuestras de un equipo se ajustan juntas como una matriz, y los
+equipos se reparten en un pool de procesos.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+import multiprocessing
+import os
+import zlib
+
+import numpy as np
+import pandas as pd
+
+MIN_TBF_SAMPLES = 4
+NO_FIT = "N/A (<4 fallas)"
+BOOTSTRAP_RESAMPLES = 2000
+CONFIDENCE_LEVEL = 0.90
+# Cells per batch of resamples (resamples x TBF), to bound memory on long histories
+_BATCH_CELLS = 2_000_000
+# Below this many equipments the pool's overhead is not worth it
+_POOL_MIN_EQUIPMENTS = 8
+
+
+def weibull_diagnosis(beta: float) -> str:
+    """Failure mode from the Weibull shape parameter."""
+    if beta < 0.9:
+        return "Mortalidad Infantil"
+    if 0.9 <= beta <= 1.1:
+        return "Aleatoria"
+    return "Desgaste"
+
+
+def median_ranks(n: int) -> np.ndarray:
+    """Bernard's approximation of the median ranks of n sorted samples."""
+    return (np.arange(1, n + 1) - 0.3) / (n + 0.4)
+
+
+def _sorted_tbf(codes: np.ndarray, seconds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Positive day gaps between consecutive events of each code, sorted by (code, gap)."""
+    order = np.lexsort((seconds, codes))
+    c, t = codes[order], seconds[order]
+    same = np.r_[False, c[1:] == c[:-1]]
+    gap = np.r_[np.nan, np.diff(t)] / (3600 * 24)
+    keep = same & (gap > 0)
+    c, tbf = c[keep], gap[keep]
+    order = np.lexsort((tbf, c))
+    return c[order], tbf[order]
+
+
+def _epoch_seconds(dates: pd.Series) -> np.ndarray:
+    values = dates.to_numpy(dtype="datetime64[ns]").astype("datetime64[us]")
+    return (values - np.datetime64(0, "us")) / np.timedelta64(1, "s")
+
+
+def _group_sum(codes: np.ndarray, values: np.ndarray, groups: int) -> np.ndarray:
+    return np.bincount(codes, weights=values, minlength=groups)
+
+
+def equipment_summary(df: pd.DataFrame, equipo_col: str, date_col: str = "__date", downtime_col: str = "__downtime_min") -> pd.DataFrame:
+    """Per-equipment Frecuencia, Detención, Beta, Eta and diagnosis, in order of first appearance.
+
+    TBF are the positive day gaps between consecutive failures of the same
+    equipment. Beta/Eta come from the least-squares fit of
+    ln(-ln(1 - MR)) on ln(TBF), with Bernard's median ranks
+    MR = (i - 0.3) / (n + 0.4); equipments with fewer than 4 TBF get no fit.
+    """
+    codes, uniques = pd.factorize(df[equipo_col], use_na_sentinel=False)
+    groups = len(uniques)
+    valid = ~pd.isna(np.asarray(uniques, dtype=object))
+    # Rows with a missing equipment never matched `== eq`, so they count as an empty group
+    ok = valid[codes]
+    freq = np.bincount(codes[ok], minlength=groups)
+    downtime = _group_sum(codes[ok], df[downtime_col].to_numpy(dtype=float)[ok], groups)
+
+    # Median ranks of the sorted TBF of each equipment
+    c, tbf = _sorted_tbf(codes[ok], _epoch_seconds(df[date_col])[ok])
+    n = np.bincount(c, minlength=groups)
+    start = np.r_[0, np.cumsum(n)[:-1]]
+    ranks = np.arange(len(c)) - start[c] + 1
+    median_ranks = (ranks - 0.3) / (n[c] + 0.4)
+    x = np.log(tbf)
+    y = np.log(-np.log(1 - median_ranks))
+
+    # Least squares per group on centered values
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = _group_sum(c, x, groups) / n
+        y_mean = _group_sum(c, y, groups) / n
+        xc = x - x_mean[c]
+        sxx = _group_sum(c, xc * xc, groups)
+        sxy = _group_sum(c, xc * (y - y_mean[c]), groups)
+        beta = sxy / sxx
+        intercept = y_mean - beta * x_mean
+
+    fit = n >= MIN_TBF_SAMPLES
+    # Constant TBF leave the regression singular: keep np.polyfit's least-norm answer
+    for g in np.flatnonzero(fit & ~(sxx > 1e-12 * np.maximum(_group_sum(c, x * x, groups), 1.0))):
+        rows = c == g
+        try:
+            beta[g], intercept[g] = np.polyfit(x[rows], y[rows], 1)
+        except Exception:
+            fit[g] = False
+    beta = np.where(fit, beta, np.nan)
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        eta = np.where(fit, np.exp(-intercept / beta), np.nan)
+
+    return pd.DataFrame({
+        "Equipo": np.asarray(uniques, dtype=object),
+        "Frecuencia": freq,
+        "Detencion_Min": downtime,
+        "Beta": beta,
+        "Eta": eta,
+        "Diagnostico": [weibull_diagnosis(b) if f else NO_FIT for b, f in zip(beta, fit)],
+    })
+
+
+def tbf_by_equipment(df: pd.DataFrame, equipo_col: str, date_col: str = "__date") -> Dict[object, np.ndarray]:
+    """Sorted TBF (days) of every equipment, in order of first appearance."""
+    codes, uniques = pd.factorize(df[equipo_col])
+    ok = codes >= 0
+    c, tbf = _sorted_tbf(codes[ok], _epoch_seconds(df[date_col])[ok])
+    bounds = np.searchsorted(c, np.arange(len(uniques) + 1))
+    return {eq: tbf[bounds[i]:bounds[i + 1]] for i, eq in enumerate(np.asarray(uniques, dtype=object))}
+
+
+def b_life(beta, eta, p: float = 0.10):
+    """Time by which a fraction p of the population has failed (B10 for p = 0.10)."""
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        return eta * (-np.log(1 - p)) ** (1 / beta)
+
+
+def _fit_rows(x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Median-rank regression of every row of a (resamples x n) matrix of sorted ln(TBF)."""
+    y = np.log(-np.log(1 - median_ranks(x.shape[1])))
+    x_mean = x.mean(axis=1)
+    xc = x - x_mean[:, None]
+    with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+        sxx = (xc * xc).sum(axis=1)
+        beta = (xc @ (y - y.mean())) / sxx
+        # Resamples that drew a single distinct value have no slope
+        beta[~(sxx > 1e-12)] = np.nan
+        eta = np.exp(x_mean - y.mean() / beta)
+    return beta, eta
+
+
+def bootstrap_weibull(tbf: np.ndarray, resamples: int = BOOTSTRAP_RESAMPLES, level: float = CONFIDENCE_LEVEL,
+                      seed: int = 0) -> Optional[Dict[str, Tuple[float, float]]]:
+    """Percentile bootstrap intervals of beta, eta and B10 from the TBF of one equipment.
+
+    Each resample draws n TBF with replacement and is refitted with the same
+    median-rank regression. Returns {"beta": (lo, hi), "eta": ..., "b10": ...}
+    or None with fewer than 4 TBF.
+    """
+    tbf = np.sort(np.asarray(tbf, dtype=float))
+    n = len(tbf)
+    if n < MIN_TBF_SAMPLES:
+        return None
+    rng = np.random.default_rng(seed)
+    log_tbf = np.log(tbf)
+    betas, etas = [], []
+    batch = max(1, _BATCH_CELLS // n)
+    for done in range(0, resamples, batch):
+        size = min(batch, resamples - done)
+        # TBF are sorted, so sorting the drawn positions sorts each resample
+        draws = np.sort(rng.integers(0, n, size=(size, n)), axis=1)
+        beta, eta = _fit_rows(log_tbf[draws])
+        betas.append(beta)
+        etas.append(eta)
+    beta, eta = np.concatenate(betas), np.concatenate(etas)
+    ok = np.isfinite(beta) & np.isfinite(eta)
+    if not ok.any():
+        return None
+    beta, eta = beta[ok], eta[ok]
+    q = [(1 - level) / 2 * 100, (1 + level) / 2 * 100]
+    out = {}
+    for name, values in (("beta", beta), ("eta", eta), ("b10", b_life(beta, eta))):
+        lo, hi = np.nanpercentile(values, q)
+        out[name] = (float(lo), float(hi))
+    return out
+
+
+def equipment_seed(equipo, seed: int = 0) -> int:
+    """Random stream of one equipment: the same whichever worker or chunk fits it."""
+    return seed * 1_000_003 + zlib.crc32(str(equipo).encode("utf-8"))
+
+
+def _bootstrap_chunk(items: List[Tuple[object, np.ndarray]], resamples: int, level: float, seed: int) -> list:
+    return [(eq, bootstrap_weibull(tbf, resamples, level, equipment_seed(eq, seed))) for eq, tbf in items]
+
+
+_POOL: Optional[ProcessPoolExecutor] = None
+_POOL_FAILED = False
+POOL_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+
+
+def _pool() -> ProcessPoolExecutor:
+    # One long-lived pool per server process; "spawn" because Streamlit runs scripts in threads
+    global _POOL
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor(max_workers=POOL_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _POOL
+
+
+def bootstrap_summary(tbf: Dict[object, np.ndarray], resamples: int = BOOTSTRAP_RESAMPLES, level: float = CONFIDENCE_LEVEL,
+                      seed: int = 0, parallel: bool = True) -> pd.DataFrame:
+    """Bootstrap intervals for every equipment (as returned by tbf_by_equipment).
+
+    Equipments with at least 4 TBF are split in chunks across a process
+    pool; results do not depend on the chunking because each equipment has
+    its own random stream. Falls back to this process if the pool fails.
+    """
+    items = [(eq, t) for eq, t in tbf.items() if len(t) >= MIN_TBF_SAMPLES]
+    results = []
+    global _POOL, _POOL_FAILED
+    if parallel and len(items) >= _POOL_MIN_EQUIPMENTS and POOL_WORKERS > 1 and not _POOL_FAILED:
+        try:
+            chunks = [items[i::POOL_WORKERS * 2] for i in range(POOL_WORKERS * 2)]
+            for part in _pool().map(partial(_bootstrap_chunk, resamples=resamples, level=level, seed=seed), chunks):
+                results.extend(part)
+        except Exception:
+            # e.g. workers cannot be spawned here: stay in-process from now on
+            if _POOL is not None:
+                _POOL.shutdown(wait=False, cancel_futures=True)
+            _POOL, _POOL_FAILED = None, True
+            results = []
+    if not results:
+        results = _bootstrap_chunk(items, resamples, level, seed)
+
+    rows = []
+    for eq, ci in results:
+        if ci is None:
+            continue
+        rows.append({"Equipo": eq, "Beta_Min": ci["beta"][0], "Beta_Max": ci["beta"][1], "Eta_Min": ci["eta"][0],
+                     "Eta_Max": ci["eta"][1], "B10_Min": ci["b10"][0], "B10_Max": ci["b10"][1]})
+    return pd.DataFrame(rows, columns=["Equipo", "Beta_Min", "Beta_Max", "Eta_Min", "Eta_Max", "B10_Min", "B10_Max"])
@@ -0,0 +1,91 @@
+"""Recarga de datos en segundo plano cuando cambia la fuente.
+
+`SourceWatcher` guarda el último resultado de `load()` (compartido por todas
+las sesiones) y cada `interval` segundos calcula una firma barata de la
+fuente: tamaño y fecha de los archivos locales o la revisión del Google
+Sheet. Cuando la firma cambia (y se mantiene igual durante una vuelta, para
+no leer un archivo a medio copiar) vuelve a cargar en su propio hilo y
+reemplaza el resultado de una sola vez: las sesiones siguen usando los datos
+anteriores mientras tanto y nunca ven una carga a medias. `state` entrega la
+generación junto con su resultado en una sola lectura.
+"""
+from typing import Callable, Generic, Optional, Tuple, TypeVar
+import logging
+import threading
+import time
+
+# Seconds between source checks
+POLL_SECONDS = 15
+
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+class SourceWatcher(Generic[T]):
+    """Latest load() result, reloaded in a background thread when signature() changes."""
+
+    def __init__(self, load: Callable[[], T], signature: Callable[[], str], interval: float = POLL_SECONDS,
+                 accept: Callable[[T], bool] = lambda result: True):
+        self._load = load
+        self._signature = signature
+        self._accept = accept
+        self.interval = interval
+        self.signature = signature()
+        # First load in the caller's thread: there is nothing to show before it.
+        # (generation, result) in one attribute, so a reader never pairs one with the other's swap
+        self.state: Tuple[int, T] = (0, load())
+        self.loaded_at = time.time()
+        self.error: Optional[str] = None
+        self._failed: Optional[str] = None
+        self._swap = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="source-watcher", daemon=True)
+
+    @property
+    def current(self) -> T:
+        return self.state[1]
+
+    @property
+    def generation(self) -> int:
+        return self.state[0]
+
+    def start(self) -> "SourceWatcher[T]":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        seen = self.signature
+        while not self._stop.wait(self.interval):
+            try:
+                signature = self._signature()
+            except Exception as e:
+                logger.warning("source check failed: %s", e)
+                continue
+            # Reload once the source has settled: same signature on two checks in a row
+            settled = signature == seen
+            seen = signature
+            if signature in (self.signature, self._failed) or not settled:
+                continue
+            self.reload(signature)
+
+    def reload(self, signature: Optional[str] = None):
+        """Load now (in the calling thread) and swap the result in; keeps the old one on failure."""
+        signature = self._signature() if signature is None else signature
+        try:
+            result = self._load()
+            if not self._accept(result):
+                raise ValueError("la fuente no entregó datos")
+        except Exception as e:
+            # Tried again when the signature changes or on the next reload()
+            self.error, self._failed = str(e), signature
+            logger.warning("reload failed, keeping the previous data: %s", e)
+            return
+        with self._swap:
+            self.state = (self.state[0] + 1, result)
+            self.signature = signature
+            self.loaded_at = time.time()
+            self.error = self._failed = None
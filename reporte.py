@@ -1,12 +1,31 @@
-"""Exporta todas las hojas de BBDD_MANTENCION.xlsm a CSV.
+"""Exporta todas las hojas de BBDD_MANTENCION.xlsm a CSV (y opcionalmente Parquet).
 
 Uso: ejecutar este módulo desde el venv del workspace.
-Genera los CSV en la carpeta `csv_exports/` dentro del workspace.
+Genera los archivos en la carpeta `csv_exports/` dentro del workspace.
+
+    python reporte.py                   # CSV
+    python reporte.py --parquet         # CSV + Parquet con tipos
+    python reporte.py --workers 1       # sin procesos paralelos
+
+Cada hoja se lee fila a fila con el iterador `read_only` de openpyxl y se
+escribe a medida que se lee, en un proceso por hoja: la memoria no depende
+del tamaño del libro. El Parquet se escribe después, leyendo el CSV por
+bloques con los tipos de cada columna (entero, decimal, fecha, hora, texto)
+detectados durante la primera pasada.
 """
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple
+import argparse
+import csv
+import datetime
 import os
 import re
 import sys
+import time
+
+# Worker processes by default (one sheet each)
+WORKERS = max(1, min(4, os.cpu_count() or 1))
 
 
 def _safe_filename(name: str) -> str:
@@ -17,51 +36,296 @@ def _safe_filename(name: str) -> str:
     return name
 
 
-def export_all_sheets(xls_path: Path, out_dir: Path) -> dict:
-    out_dir.mkdir(parents=True, exist_ok=True)
-    summary = {"written": [], "errors": []}
+def _timedelta_text(days: int, seconds: int, microseconds: int) -> str:
+    # pandas' long format: "0 days 01:40:00", "-1 days +23:55:00"
+    hh, rest = divmod(seconds, 3600)
+    fraction = f".{microseconds:06d}" if microseconds else ""
+    return f"{days} days {'+' if days < 0 else ''}{hh:02d}:{rest // 60:02d}:{rest % 60:02d}{fraction}"
+
+
+def cell_text(v) -> str:
+    """Cell value as CSV text, the same wherever the cell is.
+
+    export_data appends rows without seeing the rest of their columns, so
+    datetimes always carry their time (a column mixing "2024-01-01" and
+    "2024-01-02 07:14:00" does not parse as one date format) and numbers
+    are written as they are in the cell. Durations as pandas writes them.
+    """
+    if v is None:
+        return ""
+    if isinstance(v, datetime.timedelta):
+        return _timedelta_text(v.days, v.seconds, v.microseconds)
+    return str(v)
+
+
+def _object_text(v) -> str:
+    """Cell as pandas writes it in a column of mixed types: str() of the value read_excel gives."""
+    if v is None:
+        return ""
+    if isinstance(v, float) and v.is_integer():
+        # read_excel turns whole floats into ints
+        return str(int(v))
+    return str(v)
+
+
+def _kind(v) -> str:
+    if isinstance(v, bool):
+        return "bool"
+    if isinstance(v, int) or (isinstance(v, float) and v.is_integer()):
+        return "int"
+    if isinstance(v, float):
+        return "float"
+    if isinstance(v, datetime.datetime):
+        return "datetime"
+    if isinstance(v, datetime.time):
+        return "time"
+    if isinstance(v, datetime.timedelta):
+        return "timedelta"
+    return "str"
+
+
+def _float_text(t: str) -> str:
+    return {"True": "1.0", "False": "0.0"}.get(t) or repr(float(t))
+
+
+def _days_text(t: str) -> str:
+    # str(timedelta) of a whole number of days: "1 day, 0:00:00", "-2 days, 0:00:00", "0:00:00"
+    return f"{int(t.split()[0]) if ',' in t else 0} days"
+
+
+def _duration_text(t: str) -> str:
+    days, _, clock = t.rpartition(", ")
+    hh, mm, ss = clock.split(":")
+    ss, _, fraction = ss.partition(".")
+    return _timedelta_text(int(days.split()[0]) if days else 0, int(hh) * 3600 + int(mm) * 60 + int(ss),
+                           int(fraction.ljust(6, "0")) if fraction else 0)
+
+
+class _Column:
+    """What pandas needs to know about a whole column to write it: value kinds, blanks, date precision.
+
+    A column of one kind gets a dtype in read_excel and to_csv formats it
+    as a whole: ints with blanks (or mixed with floats) as floats, dates
+    without time only if no value has one, the same fraction digits on
+    every datetime. Columns of mixed kinds are written with str().
+    """
+
+    def __init__(self):
+        self.kinds = set()
+        self.blank = False
+        self.dates_only = True
+        self.fraction = 0
+        self.whole_days = True
+
+    def add(self, v):
+        if v is None:
+            self.blank = True
+            return
+        kind = _kind(v)
+        self.kinds.add(kind)
+        if kind == "datetime":
+            self.dates_only &= v.time() == datetime.time(0)
+            if v.microsecond:
+                self.fraction = max(self.fraction, 6 if v.microsecond % 1000 else 3)
+        elif kind == "timedelta":
+            self.whole_days &= not (v.seconds or v.microseconds)
+
+    def _numeric(self) -> bool:
+        return bool(self.kinds) and self.kinds <= {"bool", "int", "float"} and (self.kinds != {"bool"} or self.blank)
+
+    def rewrite(self) -> Optional[Callable[[str], str]]:
+        """pandas' text from the _object_text of a cell in this column; None if they are the same."""
+        if self._numeric():
+            if self.blank or "float" in self.kinds:
+                return _float_text
+            return (lambda t: {"True": "1", "False": "0"}.get(t, t)) if "bool" in self.kinds else None
+        if self.kinds == {"datetime"}:
+            if self.dates_only:
+                return lambda t: t[:10]
+            if self.fraction:
+                return lambda t: f"{t[:19]}.{(t[20:] or '000000')[:self.fraction]}"
+        if self.kinds == {"timedelta"}:
+            return _days_text if self.whole_days else _duration_text
+        return None
+
+    def arrow_type(self):
+        import pyarrow as pa
+
+        if self._numeric():
+            return pa.float64() if self.blank or "float" in self.kinds else pa.int64()
+        if self.kinds == {"bool"}:
+            return pa.bool_()
+        if self.kinds == {"datetime"}:
+            return pa.timestamp("us")
+        if self.kinds == {"time"}:
+            return pa.time64("us")
+        return pa.string()
 
-    # Intentar usar pandas primero
+
+def sheet_rows(ws) -> Tuple[tuple, Iterator[tuple]]:
+    """Header and data rows of a read_only worksheet, as pandas.read_excel sees them.
+
+    Trailing blank header cells are not columns, cells right of the header
+    are ignored, short rows are padded with None and blank rows at the end
+    of the sheet are dropped.
+    """
+    it = ws.iter_rows(values_only=True)
+    header = next(it, ())
+    width = len(header)
+    while width and header[width - 1] is None:
+        width -= 1
+
+    def rows() -> Iterator[tuple]:
+        blank = 0
+        for row in it:
+            cells = tuple(row[:width]) + (None,) * (width - len(row))
+            if all(v is None for v in cells):
+                # Held back until a non-blank row shows they are not trailing
+                blank += 1
+                continue
+            for _ in range(blank):
+                yield (None,) * width
+            blank = 0
+            yield cells
+
+    return tuple(header[:width]), rows()
+
+
+def _unique_names(header: tuple) -> List[str]:
+    """Column names as pandas would give them: Unnamed: i for blanks, .1/.2 for repeats."""
+    names, seen = [], {}
+    for i, h in enumerate(header):
+        name = f"Unnamed: {i}" if h is None else cell_text(h)
+        if name in seen:
+            seen[name] += 1
+            name = f"{name}.{seen[name]}"
+        else:
+            seen[name] = 0
+        names.append(name)
+    return names
+
+
+def _rewrite_columns(csv_path: Path, columns: List["_Column"]):
+    """Second pass over the CSV for the columns whose pandas text depends on the whole column."""
+    rewrites = [c.rewrite() for c in columns]
+    if not any(rewrites):
+        return
+    changed = [(i, f) for i, f in enumerate(rewrites) if f]
+    tmp = csv_path.with_name(csv_path.name + ".tmp")
     try:
-        import pandas as pd
-        # openpyxl engine for xlsm
-        sheets = pd.read_excel(xls_path, sheet_name=None, engine="openpyxl")
-        for sheet_name, df in sheets.items():
-            fname = out_dir / (f"{_safe_filename(sheet_name)}.csv")
-            try:
-                df.to_csv(fname, index=False, encoding="utf-8-sig")
-                summary["written"].append(str(fname))
-            except Exception as e:
-                summary["errors"].append({"sheet": sheet_name, "error": str(e)})
-        return summary
-    except Exception:
-        # fallback a openpyxl si pandas no está presente
-        pass
+        with open(csv_path, newline="", encoding="utf-8-sig") as src, open(tmp, "w", newline="", encoding="utf-8-sig") as dst:
+            reader = csv.reader(src)
+            writer = csv.writer(dst, lineterminator="\n")
+            writer.writerow(next(reader))
+            for row in reader:
+                for i, f in changed:
+                    if row[i]:
+                        row[i] = f(row[i])
+                writer.writerow(row)
+        os.replace(tmp, csv_path)
+    except BaseException:
+        if tmp.exists():
+            tmp.unlink()
+        raise
+
+
+def _write_parquet(csv_path: Path, out_path: Path, names: List[str], columns: List[_Column]):
+    """Re-read the CSV in blocks with explicit column types and write them as Parquet row groups."""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    types = {name: c.arrow_type() for name, c in zip(names, columns)}
+    reader = pacsv.open_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(column_names=names, skip_rows=1),
+        parse_options=pacsv.ParseOptions(newlines_in_values=True),
+        convert_options=pacsv.ConvertOptions(column_types=types, strings_can_be_null=True, true_values=["True"], false_values=["False"]),
+    )
+    with pq.ParquetWriter(out_path, pa.schema([(n, types[n]) for n in names])) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+
+
+def export_sheet(xls_path: Path, sheet_name: str, out_dir: Path, parquet: bool = False) -> dict:
+    """Stream one sheet to CSV (and Parquet); returns its summary row."""
+    from openpyxl import load_workbook
+
+    start = time.perf_counter()
+    result = {"sheet": sheet_name, "rows": 0, "files": [], "error": None}
+    fname = out_dir / (f"{_safe_filename(sheet_name)}.csv")
+    try:
+        wb = load_workbook(filename=str(xls_path), data_only=True, read_only=True)
+        try:
+            header, rows = sheet_rows(wb[sheet_name])
+            width = len(header)
+            names = _unique_names(header)
+            columns = [_Column() for _ in range(width)]
+            with open(fname, "w", newline="", encoding="utf-8-sig") as f:
+                # \n line ends, as pandas' to_csv
+                writer = csv.writer(f, lineterminator="\n")
+                writer.writerow(names)
+                for cells in rows:
+                    result["rows"] += 1
+                    for c, v in zip(columns, cells):
+                        c.add(v)
+                    writer.writerow([_object_text(v) for v in cells])
+        finally:
+            wb.close()
+        _rewrite_columns(fname, columns)
+        result["files"].append(str(fname))
+        if parquet and width:
+            pq_name = out_dir / (f"{_safe_filename(sheet_name)}.parquet")
+            _write_parquet(fname, pq_name, names, columns)
+            result["files"].append(str(pq_name))
+    except Exception as e:
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def export_all_sheets(xls_path: Path, out_dir: Path, parquet: bool = False, workers: int = WORKERS) -> dict:
+    out_dir.mkdir(parents=True, exist_ok=True)
+    summary = {"written": [], "errors": [], "sheets": []}
+    start = time.perf_counter()
 
     try:
         from openpyxl import load_workbook
-        import csv
 
-        wb = load_workbook(filename=str(xls_path), data_only=True, read_only=True)
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            fname = out_dir / (f"{_safe_filename(sheet_name)}.csv")
-            try:
-                with open(fname, "w", newline="", encoding="utf-8-sig") as f:
-                    writer = csv.writer(f)
-                    for row in ws.iter_rows(values_only=True):
-                        # Convertir objetos a str para evitar errores de serialización
-                        writer.writerow(["" if v is None else str(v) for v in row])
-                summary["written"].append(str(fname))
-            except Exception as e:
-                summary["errors"].append({"sheet": sheet_name, "error": str(e)})
-        return summary
+        wb = load_workbook(filename=str(xls_path), read_only=True)
+        sheet_names = list(wb.sheetnames)
+        wb.close()
     except Exception as e:
         summary["errors"].append({"error": str(e)})
         return summary
 
+    results: Optional[List[dict]] = None
+    if workers > 1 and len(sheet_names) > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=min(workers, len(sheet_names))) as pool:
+                results = list(pool.map(export_sheet, [xls_path] * len(sheet_names), sheet_names,
+                                        [out_dir] * len(sheet_names), [parquet] * len(sheet_names)))
+        except Exception:
+            # e.g. processes cannot be started here: one sheet after another
+            results = None
+    if results is None:
+        results = [export_sheet(xls_path, name, out_dir, parquet) for name in sheet_names]
+
+    for r in results:
+        summary["sheets"].append(r)
+        summary["written"].extend(r["files"])
+        if r["error"]:
+            summary["errors"].append({"sheet": r["sheet"], "error": r["error"]})
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
 
 def main():
+    parser = argparse.ArgumentParser(description="Exporta todas las hojas del libro a CSV (y Parquet).")
+    parser.add_argument("--parquet", action="store_true", help="escribir también un .parquet con tipos por hoja")
+    parser.add_argument("--workers", type=int, default=WORKERS, help="procesos en paralelo (1 = secuencial)")
+    args = parser.parse_args()
+
     workspace = Path(__file__).parent
     xls = workspace / "BBDD_MANTENCION.xlsm"
     if not xls.exists():
@@ -72,12 +336,17 @@ def main():
     print(f"Leyendo: {xls}")
     print(f"Exportando hojas a: {out_dir}")
 
-    summary = export_all_sheets(xls, out_dir)
+    summary = export_all_sheets(xls, out_dir, parquet=args.parquet, workers=args.workers)
 
     print("--- Resumen ---")
+    for s in summary.get("sheets", []):
+        state = "ERROR" if s["error"] else "ok"
+        print(f" - {s['sheet']:<24} {s['rows']:>9,} filas  {s['seconds']:7.2f} s  {state}")
     print(f"Archivos escritos: {len(summary.get('written',[]))}")
     for w in summary.get("written", []):
         print(f" - {w}")
+    if "seconds" in summary:
+        print(f"Tiempo total: {summary['seconds']:.2f} s")
     if summary.get("errors"):
         print(f"Errores ({len(summary['errors'])}):")
         for err in summary["errors"]:
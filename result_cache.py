@@ -0,0 +1,106 @@
+"""Caché de resultados de las secciones (LRU con tope de memoria).
+
+Cada interacción vuelve a ejecutar el script completo. Las tablas que arma
+una sección (detalle de disponibilidad, resumen de confiabilidad, Pareto,
+tablas del presupuesto) y sus gráficos se guardan aquí con una clave formada
+por la versión de los datos (fingerprint del snapshot) y los valores exactos
+de los filtros: volver a una combinación ya vista, o a una sección ya
+abierta, no recalcula nada. La caché es una sola para todas las sesiones;
+cuando se pasa de `MAX_BYTES` se descartan los resultados usados hace más
+tiempo. Los resultados se comparten: quien los recibe no debe modificarlos.
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+import datetime
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Memory cap of all cached results together
+MAX_BYTES = 256 * 2**20
+
+
+def freeze(value) -> Hashable:
+    """Filter values as a hashable key: lists keep their order, sets do not."""
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(freeze(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted(((k, freeze(v)) for k, v in value.items()), key=lambda kv: str(kv[0])))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def size_of(value, _seen=None) -> int:
+    """Approximate bytes held by a result (frames, arrays, figures and containers of them)."""
+    if isinstance(value, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = value.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    if isinstance(value, np.ndarray):
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes, int, float, bool, type(None), datetime.date)):
+        return sys.getsizeof(value)
+    _seen = set() if _seen is None else _seen
+    if id(value) in _seen:
+        return 0
+    _seen.add(id(value))
+    if hasattr(value, "to_plotly_json"):
+        # Plotly figures: the data and layout they hold
+        return size_of(value.to_plotly_json(), _seen)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(size_of(k, _seen) + size_of(v, _seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return sys.getsizeof(value) + sum(size_of(v, _seen) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Least recently used results, evicted beyond max_bytes. Thread-safe."""
+
+    def __init__(self, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.hits = self.misses = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        return self._bytes
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """The cached result of key, or compute() stored under it."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+        # Outside the lock: other sessions keep reading while this one computes
+        value = compute()
+        size = size_of(value)
+        if size > self.max_bytes:
+            return value
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
@@ -0,0 +1,261 @@
+"""Resolución de columnas de las hojas.
+
+Los encabezados de las hojas cambian levemente entre versiones (tildes,
+mayúsculas, "Ubicación/Equipo" vs "Equipo"), así que las columnas se buscan
+por palabras clave en vez de por nombre exacto.
+"""
+from typing import Dict, List, Optional
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+
+def normalize_str(s: str) -> str:
+    """Remove accents and convert to lowercase."""
+    if not isinstance(s, str):
+        s = str(s)
+    return ''.join(c for c in unicodedata.normalize('NFD', s) if unicodedata.category(c) != 'Mn').lower()
+
+def find_column(df: pd.DataFrame, keywords: List[str]) -> Optional[str]:
+    """Find a column in df that matches any of the keywords (case-insensitive, accent-insensitive)."""
+    # Pre-normalize columns once
+    cols_norm = {col: normalize_str(col) for col in df.columns}
+    
+    for kw in keywords:
+        kw_norm = normalize_str(kw)
+        # 1. Try exact match first (normalized)
+        for col, col_n in cols_norm.items():
+            if col_n == kw_norm:
+                return col
+        # 2. Try partial match
+        for col, col_n in cols_norm.items():
+            if kw_norm in col_n:
+                return col
+    return None
+
+
+# --- Canonical frames ---
+# Each sheet is resolved once per data load into a frame with fixed column
+# names and parsed types, so the sections do not call find_column or
+# pd.to_datetime on every rerun. A sheet whose key columns cannot be found
+# is left out of the result; optional columns are left out of the frame.
+#
+# The frames are kept compact because they live for the whole session:
+# repeated text is categorical, dates are int32 day numbers (`dia`), clock
+# times int16 minutes of the day, year/month int16/int8 (0 = no date) and
+# downtime float32. Free text (Observaciones) is kept in a separate frame
+# (BITACORA_TEXTO) aligned on the bitácora index.
+
+BITACORA = "bitacora"
+PROGRAMACION = "programacion"
+OM = "om"
+OTROS_GASTOS = "otros_gastos"
+PRESUPUESTO = "presupuesto"
+MAESTRA = "maestra_activos"
+BITACORA_TEXTO = "bitacora_texto"
+
+NO_DAY = np.iinfo(np.int32).min
+
+_BITACORA_OPTIONAL = {
+    "turno": ["turno", "shift"],
+    "especialidad": ["especialidad"],
+    "grupo": ["grupo"],
+    "tipo": ["tipo", "type", "clasificacion", "category", "clase"],
+}
+_BITACORA_TEXT = {
+    "observaciones": ["observ", "coment"],
+}
+_BITACORA_CATEGORIES = ["equipo", "equipo_key", "turno", "especialidad", "grupo", "tipo"]
+_MAESTRA_OPTIONAL = {
+    "tipo": ["tipo", "clase", "categoria"],
+    "sistema": ["sistema", "system"],
+    "espacio": ["espacio", "edificio", "ubicacion", "area", "sector"],
+}
+
+
+def equipment_key(s: pd.Series) -> pd.Series:
+    """Join key between sheets: the equipment name as stripped text."""
+    return s.astype(str).str.strip()
+
+
+def _dates(s: pd.Series) -> pd.Series:
+    return pd.to_datetime(s, errors="coerce", dayfirst=True)
+
+
+def to_days(dates: pd.Series) -> pd.Series:
+    """Datetimes -> int32 days since 1970-01-01 (NO_DAY for missing)."""
+    days = pd.Series(dates).to_numpy(dtype="datetime64[D]")
+    out = np.where(np.isnat(days), NO_DAY, days.astype(np.int64))
+    return pd.Series(out.astype(np.int32), index=getattr(dates, "index", None))
+
+
+def from_days(days: pd.Series) -> pd.Series:
+    """Inverse of to_days: int32 day numbers -> datetime64 (NaT for NO_DAY)."""
+    d = pd.Series(days).to_numpy(dtype=np.int64)
+    out = np.where(d == NO_DAY, np.datetime64("NaT", "D"), d.astype("datetime64[D]"))
+    return pd.Series(out.astype("datetime64[ns]"), index=getattr(days, "index", None))
+
+
+def canonical_bitacora(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """dia, equipo, equipo_key, downtime_min and the optional turno/especialidad/grupo/tipo."""
+    from kpi import downtime_minutes
+
+    fecha_col = find_column(df, ["fecha", "date"])
+    equipo_col = find_column(df, ["ubic", "equipo"])
+    if fecha_col is None or equipo_col is None:
+        return None
+    out = pd.DataFrame({
+        "dia": to_days(_dates(df[fecha_col])),
+        "equipo": df[equipo_col],
+        "equipo_key": equipment_key(df[equipo_col]),
+    })
+    for name, keywords in _BITACORA_OPTIONAL.items():
+        col = find_column(df, keywords)
+        if col:
+            out[name] = df[col]
+    out["downtime_min"] = downtime_minutes(
+        df, find_column(df, ["detenci", "detencion", "downtime", "min"]),
+        find_column(df, ["inicio", "start"]), find_column(df, ["fin", "end"])).astype(np.float32)
+    for name in _BITACORA_CATEGORIES:
+        if name in out.columns:
+            out[name] = out[name].astype("category")
+    return out
+
+
+def bitacora_text(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Free-text columns of the bitácora, aligned on the same index as canonical_bitacora."""
+    cols = {name: find_column(df, keywords) for name, keywords in _BITACORA_TEXT.items()}
+    cols = {name: col for name, col in cols.items() if col}
+    if not cols:
+        return None
+    return pd.DataFrame({name: df[col] for name, col in cols.items()})
+
+
+def _clean_hours(x) -> float:
+    try:
+        if isinstance(x, str): x = x.replace(",", ".")
+        return float(x)
+    except: return 0.0
+
+
+def canonical_programacion(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """dia, equipo, equipo_key and minutos (programmed hours x 60)."""
+    date_col = find_column(df, ["fecha", "date"])
+    eq_col = find_column(df, ["equipo", "ubic"])
+    hrs_col = find_column(df, ["horas", "hours", "programada"])
+    if not (date_col and eq_col and hrs_col):
+        return None
+    return pd.DataFrame({
+        "dia": to_days(_dates(df[date_col])),
+        "equipo": df[eq_col],
+        "equipo_key": equipment_key(df[eq_col]),
+        "minutos": df[hrs_col].apply(_clean_hours) * 60,
+    })
+
+
+def _year_month(df: pd.DataFrame, date_col: str) -> pd.DataFrame:
+    fecha = _dates(df[date_col])
+    return pd.DataFrame({
+        "dia": to_days(fecha),
+        "anio": fecha.dt.year.fillna(0).astype(np.int16),
+        "mes": fecha.dt.month.fillna(0).astype(np.int8),
+    })
+
+
+def canonical_om(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """dia, anio, mes, orden, descripcion and (when present) repuestos/servicios as numbers."""
+    from finance import parse_currency
+
+    date_col = find_column(df, ["fecha entrada", "fecha inicio", "date"])
+    if date_col is None:
+        return None
+    id_col = find_column(df, ["n° orden", "orden", "id"])
+    desc_col = find_column(df, ["descripción", "descripcion", "desc. orden", "desc"])
+    out = _year_month(df, date_col)
+    out["orden"] = df[id_col].astype(str) if id_col else ""
+    out["descripcion"] = df[desc_col] if desc_col else "Sin descripción"
+    for name, keywords in [("repuestos", ["costo repuestos", "repuestos"]), ("servicios", ["costo servicios", "servicios"])]:
+        col = find_column(df, keywords)
+        if col:
+            out[name] = parse_currency(df[col])
+    return out
+
+
+def canonical_otros_gastos(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """dia, anio, mes, categoria, descripcion and monto."""
+    from finance import parse_currency
+
+    date_col = find_column(df, ["fecha", "date"])
+    amount_col = find_column(df, ["monto", "amount", "valor"])
+    if not (date_col and amount_col):
+        return None
+    cat_col = find_column(df, ["categoria", "category", "tipo"])
+    desc_col = find_column(df, ["descripcion", "descripción", "detalle"])
+    out = _year_month(df, date_col)
+    # Without a category column everything is "Otros Gastos"
+    out["categoria"] = (df[cat_col] if cat_col else pd.Series("Otros Gastos", index=df.index)).astype("category")
+    out["descripcion"] = df[desc_col] if desc_col else "Sin descripción"
+    out["monto"] = parse_currency(df[amount_col])
+    return out
+
+
+def canonical_presupuesto(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """anio (as entered), mes (1-12, 0 if unknown) and monto."""
+    from finance import get_month_num, parse_currency
+
+    year_col = find_column(df, ["año", "year"])
+    month_col = find_column(df, ["mes", "month"])
+    amount_col = find_column(df, ["monto", "presupuesto", "budget"])
+    if not (year_col and month_col and amount_col):
+        return None
+    return pd.DataFrame({
+        "anio": df[year_col],
+        "mes": df[month_col].apply(get_month_num),
+        "monto": parse_currency(df[amount_col]),
+    })
+
+
+def canonical_maestra(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """equipo, equipo_key and the optional tipo/sistema/espacio."""
+    name_col = find_column(df, ["nombre", "equipo", "activo", "item"])
+    if name_col is None:
+        return None
+    out = pd.DataFrame({"equipo": df[name_col], "equipo_key": equipment_key(df[name_col])})
+    for name, keywords in _MAESTRA_OPTIONAL.items():
+        col = find_column(df, keywords)
+        if col:
+            out[name] = df[col]
+    return out
+
+
+_CANONICAL = {
+    BITACORA: ("tbl_bitacora", canonical_bitacora),
+    PROGRAMACION: ("tbl_programacion", canonical_programacion),
+    OM: ("OM", canonical_om),
+    OTROS_GASTOS: ("Otros_Gastos", canonical_otros_gastos),
+    PRESUPUESTO: ("Presupuesto", canonical_presupuesto),
+    MAESTRA: ("maestra_activos", canonical_maestra),
+}
+
+
+# Canonical frame -> sheet it is built from
+CANONICAL_SOURCES = {name: sheet for name, (sheet, _) in _CANONICAL.items()}
+CANONICAL_SOURCES[BITACORA_TEXTO] = CANONICAL_SOURCES[BITACORA]
+
+
+def canonical_sheets(sheets: Dict[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+    """Resolve every loaded sheet into its canonical frame (sheets that cannot be resolved are omitted)."""
+    out = {}
+    for name, (sheet, resolve) in _CANONICAL.items():
+        df = sheets.get(sheet)
+        if df is None:
+            continue
+        frame = resolve(df)
+        if frame is not None:
+            out[name] = frame
+    if BITACORA in out:
+        text = bitacora_text(sheets[CANONICAL_SOURCES[BITACORA]])
+        if text is not None:
+            out[BITACORA_TEXTO] = text
+    return out
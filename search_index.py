@@ -0,0 +1,133 @@
+"""Índice de búsqueda de la Bitácora.
+
+Se construye una vez por versión de datos: cada celda se pasa a texto, se separa
+en palabras, cada palabra distinta se deja sin tildes y en minúsculas con
+`normalize_str` y se indexa por sus trigramas. Una búsqueda sólo revisa las
+palabras candidatas del índice y no vuelve a recorrer las celdas.
+
+Consultas: varios términos separados por espacio deben aparecer todos (AND),
+cada uno como subcadena de alguna celda de la fila. `columna:término` limita
+el término a una columna (p. ej. `equipo:prensa`); si el prefijo no coincide
+con ninguna columna, `10:30` se busca tal cual.
+"""
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from schema import find_column, normalize_str
+
+# Above this many matching words, mark values from the whole posting list at once
+_BULK_TOKENS = 2_000
+
+
+def trigrams(word: str) -> List[str]:
+    return [word[i:i + 3] for i in range(len(word) - 2)]
+
+
+class SearchIndex:
+    """Words and trigrams of every cell of a frame, mapped back to rows.
+
+    Cells are stored once per distinct value of each column (`codes` maps
+    rows to value ids), so a column of repeated equipment names costs one
+    entry per name. Words map to value ids and trigrams map to words.
+    """
+
+    def __init__(self, columns: List[str], codes: List[np.ndarray], offsets: np.ndarray, words: np.ndarray,
+                 posting_word: np.ndarray, posting_value: np.ndarray, grams: Dict[str, np.ndarray]):
+        self.columns = columns
+        self._codes = codes
+        self._offsets = offsets
+        self.words = words
+        self._posting_word = posting_word
+        self._posting_value = posting_value
+        self._bounds = np.searchsorted(posting_word, np.arange(len(words) + 1))
+        self._grams = grams
+        self.rows = len(codes[0]) if codes else 0
+
+    @classmethod
+    def build(cls, df: pd.DataFrame) -> "SearchIndex":
+        columns = list(df.columns)
+        codes, texts, offsets = [], [], [0]
+        for col in columns:
+            c, uniques = pd.factorize(df[col])
+            codes.append(c.astype(np.int32))
+            texts.append(pd.Series(uniques).astype(str).astype(object))
+            offsets.append(offsets[-1] + len(uniques))
+        values = offsets[-1]
+
+        # Split before normalizing, so normalize_str runs once per distinct word, not per cell
+        text = pd.concat(texts, ignore_index=True) if texts else pd.Series(dtype=object)
+        split = text.str.split().explode().dropna()
+        raw_codes, raw_words = pd.factorize(split)
+        word_of_raw, words = pd.factorize(pd.Series([normalize_str(w) for w in raw_words], dtype=object))
+        # One entry per (word, value), sorted by word; value ids are global across columns
+        pairs = word_of_raw[raw_codes].astype(np.int64) * max(values, 1) + split.index.to_numpy(dtype=np.int64)
+        pairs.sort()
+        pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]] if len(pairs) else pairs
+        posting_word, posting_value = np.divmod(pairs, max(values, 1))
+
+        grams: Dict[str, List[int]] = {}
+        for i, word in enumerate(words):
+            for g in set(trigrams(word)):
+                grams.setdefault(g, []).append(i)
+        return cls(columns, codes, np.asarray(offsets), np.asarray(words, dtype=object), posting_word.astype(np.int32),
+                   posting_value.astype(np.int32), {g: np.asarray(ids, dtype=np.int32) for g, ids in grams.items()})
+
+    def _matching_words(self, term: str) -> np.ndarray:
+        """Ids of the indexed words containing `term`."""
+        grams = trigrams(term)
+        if not grams:
+            # One or two characters: scan the vocabulary
+            return np.flatnonzero([term in w for w in self.words])
+        lists = [self._grams.get(g) for g in set(grams)]
+        if any(ids is None for ids in lists):
+            return np.array([], dtype=np.int32)
+        candidates = lists[0]
+        for ids in sorted(lists[1:], key=len):
+            candidates = np.intersect1d(candidates, ids, assume_unique=True)
+        # Trigrams only narrow the candidates; confirm the substring
+        return np.array([i for i in candidates if term in self.words[i]], dtype=np.int32)
+
+    def _matching_values(self, term: str) -> np.ndarray:
+        """Boolean mask over all value ids whose cell text contains `term`."""
+        hit = np.zeros(self._offsets[-1], dtype=bool)
+        ids = self._matching_words(term)
+        if len(ids) > _BULK_TOKENS:
+            word_hit = np.zeros(len(self.words), dtype=bool)
+            word_hit[ids] = True
+            hit[self._posting_value[word_hit[self._posting_word]]] = True
+        elif len(ids):
+            hit[np.concatenate([self._posting_value[self._bounds[i]:self._bounds[i + 1]] for i in ids])] = True
+        return hit
+
+    def parse(self, query: str) -> List[Tuple[Optional[int], str]]:
+        """(column position or None for any column, normalized term) for each term of the query."""
+        terms = []
+        for raw in query.split():
+            scope, sep, rest = raw.partition(":")
+            if sep and scope and rest:
+                col = find_column(pd.DataFrame(columns=self.columns), [scope])
+                if col is not None:
+                    terms.append((self.columns.index(col), normalize_str(rest)))
+                    continue
+            terms.append((None, normalize_str(raw)))
+        return terms
+
+    def search(self, query: str) -> np.ndarray:
+        """Boolean row mask of the rows matching every term of the query (all rows if empty)."""
+        mask = np.ones(self.rows, dtype=bool)
+        for col, term in self.parse(query):
+            hit = self._matching_values(term)
+            positions = range(len(self.columns)) if col is None else [col]
+            found = np.zeros(self.rows, dtype=bool)
+            for k in positions:
+                lo, hi = self._offsets[k], self._offsets[k + 1]
+                if hit[lo:hi].any():
+                    # Missing cells (code -1) never match
+                    col_hit = np.r_[hit[lo:hi], False]
+                    found |= col_hit[self._codes[k]]
+            mask &= found
+            if not mask.any():
+                break
+        return mask
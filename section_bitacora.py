@@ -0,0 +1,106 @@
+"""Sección Bitácora: datos crudos con búsqueda, orden, páginas y exportación."""
+import pandas as pd
+import streamlit as st
+
+from app_context import AppContext
+from pagination import PAGE_SIZES, SortedPages, page, page_count
+from pdf_export import PdfJob
+from profiling import span
+from search_index import SearchIndex
+
+
+@st.cache_resource(max_entries=1)
+def load_search_index(data_version: str, sheet: str, _df: pd.DataFrame) -> SearchIndex:
+    """Accent-insensitive word/trigram index of a raw sheet, built once per data version."""
+    with span("search_index"):
+        return SearchIndex.build(_df)
+
+
+@st.cache_resource(max_entries=1)
+def load_sorted_pages(data_version: str, sheet: str, _df: pd.DataFrame) -> SortedPages:
+    """Per-column row orders of a raw sheet for the paginated table, kept for the data version."""
+    with span("sorted_pages"):
+        return SortedPages(_df)
+
+
+def pdf_export_status():
+    """Progress of the background PDF export of the Bitácora, then its download button."""
+    job = st.session_state.get("bit_pdf_job")
+    if job is None:
+        return
+    if job.running:
+        st.progress(job.done / job.total if job.total else 0.0, text=f"Generando PDF... {job.done:,} de {job.total:,} filas")
+    elif job.error:
+        st.error(f"No se pudo generar el PDF: {job.error}")
+    else:
+        st.download_button("📥 Descargar PDF", job.read(), "bitacora_filtrada.pdf", "application/pdf", key="download-pdf")
+    if not job.running and st.session_state.get("bit_pdf_shown") is not job:
+        # Last poll: rerun the page once so the polling stops
+        st.session_state["bit_pdf_shown"] = job
+        st.rerun()
+
+
+def render(ctx: AppContext):
+    sheets, data_version = ctx.sheets, ctx.data_version
+    st.subheader("Bitácora de Mantenimiento (Datos Crudos)")
+
+    # app.py only gets here with a tbl_bitacora
+    target = "tbl_bitacora"
+    df_raw = sheets[target]
+
+    # Search
+    search_term = st.text_input("🔍 Buscar en Bitácora", placeholder="Escribe equipo, falla, técnico... (ej: equipo:prensa cambio)")
+
+    mask = None
+    if search_term.strip():
+        # All terms must match (accents and case ignored); "columna:término" searches a single column
+        index = load_search_index(data_version, target, df_raw) if data_version else SearchIndex.build(df_raw)
+        mask = index.search(search_term)
+        st.caption(f"{int(mask.sum()):,} registros coinciden con la búsqueda.")
+
+    # Only the visible page goes to the browser; sorting uses row orders kept per data version
+    pages = load_sorted_pages(data_version, target, df_raw) if data_version else SortedPages(df_raw)
+    col_sort, col_dir, col_size = st.columns([2, 1, 1])
+    with col_sort:
+        sort_col = st.selectbox("Ordenar por", ["(Orden de la hoja)"] + list(df_raw.columns), key="bit_sort")
+    with col_dir:
+        descending = st.checkbox("Descendente", key="bit_desc")
+    with col_size:
+        page_size = st.selectbox("Filas por página", PAGE_SIZES, index=1, key="bit_page_size")
+
+    rows = pages.rows(None if sort_col == "(Orden de la hoja)" else sort_col, not descending, mask)
+    n_pages = page_count(len(rows), page_size)
+    # A new search, sort or page size starts again at page 1
+    view_state = (search_term, sort_col, descending, page_size)
+    if st.session_state.get("bit_view_state") != view_state or st.session_state.get("bit_page", 1) > n_pages:
+        st.session_state["bit_view_state"] = view_state
+        st.session_state["bit_page"] = 1
+    page_num = st.number_input(f"Página (de {n_pages:,})", min_value=1, max_value=n_pages, step=1, key="bit_page")
+
+    st.dataframe(page(df_raw, rows, page_num, page_size), use_container_width=True)
+    first = (page_num - 1) * page_size
+    st.caption(f"Mostrando {min(first + 1, len(rows)):,}–{min(first + page_size, len(rows)):,} de {len(rows):,} registros.")
+
+    # PDF: rendered in chunks in a background thread, in the order shown above
+    with st.expander("📄 Exportar a PDF"):
+        job = st.session_state.get("bit_pdf_job")
+        st.caption(f"Se exportan los {len(rows):,} registros de la búsqueda, en el orden elegido.")
+        if st.button("Generar PDF", key="bit_pdf_start", disabled=job is not None and job.running):
+            st.session_state["bit_pdf_job"] = PdfJob.start(sheets[target].iloc[rows])
+            st.rerun()
+        st.fragment(pdf_export_status, run_every=1 if job is not None and job.running else None)()
+
+    # Export Button
+    # CSV: the search's rows in the order shown, written only when the button is clicked (on its own
+    # thread) and kept per search and sort, so paging never re-serializes the sheet
+    def csv():
+        return ctx.memo("bitacora_csv", (search_term, sort_col, descending),
+                        lambda: sheets[target].iloc[rows].to_csv(index=False).encode('utf-8-sig'))
+
+    st.download_button(
+        "📥 Descargar CSV",
+        csv,
+        "bitacora_filtrada.csv",
+        "text/csv",
+        key='download-csv'
+    )
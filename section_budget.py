@@ -0,0 +1,303 @@
+"""Sección Control Presupuestario: presupuesto vs gasto real por mes y categoría."""
+from typing import Dict
+import datetime
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from app_context import AppContext
+from finance import BUDGET, SpendCube, build_ledger, expense_lines
+from profiling import span
+from schema import OM, OTROS_GASTOS, PRESUPUESTO
+import storage_sqlite
+
+
+@st.cache_resource(max_entries=1)
+def load_ledger(data_version: str, _canon: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Finance ledger (OM, Otros_Gastos, Presupuesto), built once per data version."""
+    with span("build_ledger"):
+        return build_ledger(_canon.get(OM), _canon.get(OTROS_GASTOS), _canon.get(PRESUPUESTO))
+
+
+@st.cache_resource(max_entries=1)
+def load_spend_cube(data_version: str, _ledger: pd.DataFrame) -> SpendCube:
+    """Año x Mes x Categoría spend/budget cube, built once per data version."""
+    with span("spend_cube"):
+        return SpendCube.build(_ledger)
+
+
+@st.cache_resource(max_entries=1)
+def load_spend_totals(data_version: str, _db) -> SpendCube:
+    """The same cube summed in SQLite (the ledger is not built), once per data version."""
+    with span("spend_totals"):
+        return storage_sqlite.spend_totals(_db)
+
+
+def render(ctx: AppContext):
+    data_version = ctx.data_version
+    dash = ctx.dashboard()
+    st.subheader("Control Presupuestario (Budget vs Actual)")
+
+    # 1. Finance ledger: OM, Otros_Gastos and Presupuesto as one cleaned table (built once per data version,
+    # and only when the precomputed cube is missing or a month's detail is not in it). With the SQLite
+    # backend the totals and a month's lines are queried instead and the ledger is never built.
+    ledger = None
+
+    def get_ledger() -> pd.DataFrame:
+        nonlocal ledger
+        if ledger is None:
+            canon = ctx.canon()
+            ledger = load_ledger(data_version, canon) if data_version else build_ledger(canon.get(OM), canon.get(OTROS_GASTOS), canon.get(PRESUPUESTO))
+        return ledger
+
+    def month_lines(year: int, month: int) -> pd.DataFrame:
+        db = ctx.db()
+        return storage_sqlite.query_expense_lines(db, year, month) if db is not None else expense_lines(get_ledger(), year, month)
+
+    budget_pre = dash["budget"] if dash else None
+    db = ctx.db() if budget_pre is None else None
+    # Año x Mes x Categoría totals: switching or comparing years does not touch the ledger rows
+    if budget_pre is not None:
+        cube, has_budget = budget_pre["cube"], budget_pre["has_budget"]
+    elif db is not None:
+        cube, has_budget = load_spend_totals(data_version, db), storage_sqlite.has_budget(db)
+    else:
+        ledger = get_ledger()
+        cube = load_spend_cube(data_version, ledger) if data_version else SpendCube.build(ledger)
+        has_budget = PRESUPUESTO in ctx.canon() and (ledger["fuente"] == BUDGET).any()
+
+    if not has_budget:
+        st.warning("⚠️ La hoja 'Presupuesto' está vacía o le faltan columnas (Año, Mes, Monto_Presupuesto). Por favor complétala en Google Sheets.")
+    else:
+        # --- PROCESS DATA ---
+
+        # A. Years with a budget
+        years_avail = cube.budget_years
+        selected_year = st.selectbox("Seleccionar Año", years_avail, index=len(years_avail)-1 if years_avail else 0)
+
+        # B. Actuals: monthly totals per category (rows without a category are left out, as before)
+        df_actuals = cube.actuals(selected_year)
+
+        if df_actuals.empty:
+            st.info("No hay gastos registrados para este año.")
+        else:
+            # --- VISUALIZATION ---
+
+            # 1. Annual Waterfall (Budget vs Months)
+            month_names = {1: "Enero", 2: "Febrero", 3: "Marzo", 4: "Abril", 5: "Mayo", 6: "Junio", 
+                           7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre"}
+
+            # Calculate Annual Budget
+            total_annual_budget = cube.annual_budget(selected_year)
+
+            # --- WATERFALL CHART ---
+            st.markdown(f"### Flujo de Caja Anual - {selected_year}")
+
+            # Prepare data for Waterfall
+            # Start: Annual Budget
+            # Decrements: Months
+            # End: Available
+
+            def waterfall_chart():
+                # Calculate Monthly Expenses
+                monthly_expenses = df_actuals.groupby("Month")["Amount"].sum().reset_index()
+                monthly_expenses["MonthName"] = monthly_expenses["Month"].map(month_names)
+                monthly_expenses = monthly_expenses.sort_values("Month")
+
+                amounts = monthly_expenses["Amount"].tolist()
+                total_spent = sum(amounts)
+                available = total_annual_budget - total_spent
+
+                # Budget, one relative (negative, it's a cost) bar per month, then Available
+                measure = ["absolute"] + ["relative"] * len(amounts) + ["total"]
+                x_data = ["Presupuesto"] + monthly_expenses["MonthName"].tolist() + ["Disponible"]
+                y_data = [total_annual_budget] + [-amt for amt in amounts] + [None]
+                text_data = [f"${total_annual_budget:,.0f}"] + [f"-${amt:,.0f}" for amt in amounts] + [f"${available:,.0f}"]
+
+                # Create Figure with Professional Dark Theme style
+                fig = go.Figure(go.Waterfall(
+                    name = "20", orientation = "v",
+                    measure = measure,
+                    x = x_data,
+                    textposition = "outside",
+                    text = text_data,
+                    y = y_data,
+                    connector = {"line":{"color":"rgba(255,255,255,0.5)", "width": 1, "dash": "solid"}},
+                    decreasing = {"marker":{"color":"#ff4b4b", "line":{"color":"#ff4b4b", "width":0}}}, # Bright Red
+                    increasing = {"marker":{"color":"#2E86C1", "line":{"color":"#2E86C1", "width":0}}}, # Professional Blue
+                    totals = {"marker":{"color":"#2E86C1", "line":{"color":"#2E86C1", "width":0}}},     # Professional Blue
+                    textfont = {"size": 13, "color": "white", "family": "Arial, sans-serif"}
+                ))
+
+                fig.update_layout(
+                    title = dict(
+                        text=f"<b>Flujo de Caja Anual {selected_year}</b><br><span style='font-size:14px;color:#a0a0a0'>Presupuesto vs Gastos Reales</span>", 
+                        font=dict(size=24, color="white")
+                    ),
+                    showlegend = False,
+                    plot_bgcolor = "rgba(0,0,0,0)",
+                    paper_bgcolor = "rgba(0,0,0,0)",
+                    font = dict(color="#e0e0e0", size=12, family="Arial, sans-serif"),
+                    xaxis = dict(
+                        tickfont=dict(size=12, color="#e0e0e0"), 
+                        showgrid=False,
+                        showline=True,
+                        linecolor="rgba(255,255,255,0.2)"
+                    ),
+                    yaxis = dict(
+                        tickfont=dict(size=12, color="#e0e0e0"), 
+                        title="Monto ($)", 
+                        showgrid=True, 
+                        gridcolor="rgba(255,255,255,0.05)",
+                        zeroline=True,
+                        zerolinecolor="rgba(255,255,255,0.2)"
+                    ),
+                    autosize=True,
+                    height=600,
+                    bargap=0.25,
+                    margin=dict(l=40, r=40, t=80, b=40)
+                )
+                return fig
+
+            # Kept per data version and year, like the other tables and charts below (read-only)
+            fig = ctx.memo("budget_waterfall", selected_year, waterfall_chart)
+
+            st.plotly_chart(fig, use_container_width=True)
+
+            # --- SUMMARY TABLE ---
+            st.markdown("### Resumen Anual")
+
+            def summary_table():
+                # Pivot table: Rows = Month, Cols = Category
+                pivot_df = df_actuals.pivot_table(index="Month", columns="Category", values="Amount", aggfunc="sum", fill_value=0)
+
+                # Add Budget Column
+                budget_map = cube.monthly_budget(selected_year)
+                pivot_df["Presupuesto"] = pivot_df.index.map(budget_map).fillna(0)
+
+                # Add Total Spent
+                cat_cols = [c for c in pivot_df.columns if c != "Presupuesto"]
+                pivot_df["Total Gastos"] = pivot_df[cat_cols].sum(axis=1)
+
+                # Add Available
+                pivot_df["Disponible"] = pivot_df["Presupuesto"] - pivot_df["Total Gastos"]
+
+                # Rename Index to Names
+                pivot_df.index = pivot_df.index.map(lambda x: month_names.get(x, x))
+                return pivot_df
+
+            pivot_df = ctx.memo("budget_summary", selected_year, summary_table)
+
+            # Format as currency (optional, string conversion)
+            st.dataframe(pivot_df.style.format("${:,.0f}"))
+
+            # --- BURN RATE ---
+            st.markdown("### Proyección de Gasto (Burn Rate)")
+            today = datetime.date.today()
+            if selected_year < today.year:
+                through_month = 12
+            elif selected_year == today.year:
+                # Last closed month: the current one is partial and would pull the monthly average down
+                through_month = today.month - 1
+            else:
+                through_month = int(df_actuals["Month"].max())
+
+            def burn_chart():
+                burn = cube.burn_rate(selected_year, through_month)
+                fig_burn = go.Figure()
+                x_months = [month_names[m] for m in burn.index]
+                fig_burn.add_trace(go.Scatter(x=x_months, y=burn["Acumulado"], mode="lines+markers", name="Gasto acumulado", line=dict(color="#ff4b4b")))
+                fig_burn.add_trace(go.Scatter(x=x_months[through_month - 1:], y=burn["Proyeccion"].iloc[through_month - 1:],
+                                              mode="lines", name="Proyección (promedio mensual)", line=dict(color="#ff4b4b", dash="dash")))
+                fig_burn.add_trace(go.Scatter(x=x_months, y=burn["Presupuesto"], mode="lines", name="Presupuesto anual", line=dict(color="#2E86C1")))
+                fig_burn.update_layout(yaxis_title="Monto ($)", height=420, margin=dict(l=40, r=40, t=30, b=40))
+                return burn, fig_burn
+
+            if through_month == 0:
+                st.info(f"Aún no hay meses cerrados en {selected_year}: la proyección se calcula desde el cierre de Enero.")
+            else:
+                burn, fig_burn = ctx.memo("budget_burn", (selected_year, through_month), burn_chart)
+                spent_to_date = burn["Acumulado"].dropna().iloc[-1]
+                projected = burn["Proyeccion"].iloc[-1]
+                over = burn.index[burn["Proyeccion"] > total_annual_budget]
+
+                c_b1, c_b2, c_b3 = st.columns(3)
+                c_b1.metric(f"Gasto acumulado al cierre de {month_names[through_month]}", f"${spent_to_date:,.0f}")
+                balance = total_annual_budget - projected
+                c_b2.metric("Proyección a diciembre", f"${projected:,.0f}", delta=f"{'-' if balance < 0 else ''}${abs(balance):,.0f} de saldo")
+                c_b3.metric("Agotamiento del presupuesto", month_names[int(over[0])] if len(over) else "No se agota")
+
+                st.plotly_chart(fig_burn, use_container_width=True)
+
+            # --- YEAR OVER YEAR ---
+            st.markdown("### Comparación entre Años")
+            all_years = [int(y) for y in cube.years]
+            default_years = [y for y in (selected_year - 1, selected_year) if y in all_years]
+            cmp_years = st.multiselect("Años a comparar", all_years, default=default_years, key="budget_yoy_years")
+            if cmp_years:
+                cmp_years = sorted(cmp_years)
+
+                def yoy_views():
+                    yoy = cube.monthly_spend(cmp_years)
+                    fig_yoy = go.Figure()
+                    for y in cmp_years:
+                        fig_yoy.add_trace(go.Bar(x=[month_names[m] for m in yoy.index], y=yoy[y], name=str(y)))
+                    fig_yoy.update_layout(barmode="group", yaxis_title="Gasto ($)", height=420, margin=dict(l=40, r=40, t=30, b=40))
+
+                    yoy_table = yoy.copy()
+                    yoy_table.loc[13] = yoy.sum()
+                    yoy_table.index = [month_names.get(m, "Total") for m in yoy_table.index]
+                    yoy_table.columns = [str(y) for y in cmp_years]
+                    if len(cmp_years) >= 2:
+                        prev, last = yoy_table.columns[-2], yoy_table.columns[-1]
+                        yoy_table[f"Var. % {last} vs {prev}"] = (yoy_table[last] / yoy_table[prev].where(yoy_table[prev] != 0) - 1) * 100
+                    return fig_yoy, yoy_table
+
+                fig_yoy, yoy_table = ctx.memo("budget_yoy", cmp_years, yoy_views)
+                st.plotly_chart(fig_yoy, use_container_width=True)
+                st.dataframe(yoy_table.style.format("${:,.0f}", subset=[str(y) for y in cmp_years]).format("{:+.1f}%", subset=yoy_table.columns[len(cmp_years):], na_rep="–"))
+
+            # --- DETAILED BREAKDOWN ---
+            st.markdown("---")
+            st.subheader("Desglose Detallado de Gastos")
+
+            # Re-calculate months present for the selector
+            months_present = sorted(df_actuals["Month"].unique())
+            month_options = {m: month_names.get(m, str(m)) for m in months_present}
+
+            # Month selector for detail
+            if not months_present:
+                st.info("No hay datos para mostrar detalle.")
+            else:
+                detail_month_num = st.selectbox("Seleccionar Mes para ver Detalle", options=months_present, format_func=lambda x: month_options[x], index=len(months_present)-1)
+
+                # Expense lines of the month from the ledger (only positive amounts are listed)
+                df_details = budget_pre["details"].get((selected_year, detail_month_num)) if budget_pre is not None else None
+                if df_details is not None:
+                    df_details = df_details.copy()
+                else:
+                    df_details = ctx.memo("budget_details", (selected_year, detail_month_num), lambda: month_lines(selected_year, detail_month_num))
+
+            if df_details.empty:
+                st.info(f"No hay gastos detallados para {month_options[detail_month_num]}.")
+            else:
+                # Sort by date
+                df_details = df_details.sort_values("Fecha")
+
+                # Display with column config for better visuals
+                st.dataframe(
+                    df_details,
+                    column_config={
+                        "Monto": st.column_config.NumberColumn(
+                            "Monto",
+                            format="$%d",
+                        ),
+                        "Fecha": st.column_config.TextColumn("Fecha"),
+                        "Origen": st.column_config.TextColumn("Origen"),
+                        "Descripción": st.column_config.TextColumn("Descripción", width="large"),
+                        "Categoría": st.column_config.TextColumn("Categoría"),
+                    },
+                    use_container_width=True,
+                    hide_index=True
+                )
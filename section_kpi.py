@@ -0,0 +1,267 @@
+"""Sección KPI Dashboard: disponibilidad, detención, MTTR y fallas por equipo."""
+from typing import Dict
+import datetime
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from app_context import AppContext
+from dashboard import KpiView, kpi_cube, kpi_default_range, kpi_default_types, master_frame
+from kpi import AvailabilityCube
+from profiling import span
+from schema import BITACORA
+import storage_sqlite
+
+
+@st.cache_resource(max_entries=1)
+def load_kpi_cube(data_version: str, _canon: Dict[str, pd.DataFrame]) -> AvailabilityCube:
+    """Equipo x Día cube, materialized once per data version."""
+    with span("kpi_cube"):
+        return kpi_cube(_canon)
+
+
+@st.cache_resource(max_entries=1)
+def load_kpi_query(data_version: str, _db) -> storage_sqlite.AvailabilityQuery:
+    """Totals read from SQLite per range (only the equipment list is kept), once per data version."""
+    with span("kpi_query"):
+        return storage_sqlite.AvailabilityQuery(_db)
+
+
+def live_kpi_cube(ctx: AppContext):
+    # With the SQLite backend the range and equipment filters run in SQL and the canonical tables are not built
+    db = ctx.db()
+    if db is not None:
+        return load_kpi_query(ctx.data_version, db)
+    return load_kpi_cube(ctx.data_version, ctx.canon()) if ctx.data_version else kpi_cube(ctx.canon())
+
+
+def render(ctx: AppContext):
+    sheets = ctx.sheets
+    dash = ctx.dashboard()
+    st.subheader("KPI Dashboard & Disponibilidad")
+
+    # Bitacora with resolved columns (None if Fecha/Equipo were not found)
+    kpi_pre = dash["kpi"] if dash else None
+    if kpi_pre is None and not ctx.has_table(BITACORA):
+        st.warning("tbl_bitacora no tiene columnas Fecha o Equipo reconocibles. Seleccione otra hoja.")
+    else:
+        # --- MASTER DATA FILTERS (KPI) ---
+        allowed_equips = None
+
+        # Debug / Info about Master Sheet
+        has_master = "maestra_activos" in sheets and not sheets["maestra_activos"].empty
+        if not has_master:
+            st.info("ℹ️ Para habilitar filtros por **Sistema** o **Edificio**, crea una hoja llamada `maestra_activos` en Google Sheets con las columnas: `Equipo`, `Sistema`, `Edificio`.")
+
+        if has_master:
+            # maestra_activos on its own: the filters do not need the canonical bitácora
+            df_master = master_frame(sheets)
+            m_name_col = "equipo_key" if df_master is not None else None
+            if df_master is None:
+                df_master = pd.DataFrame()
+            m_sys_col = "sistema" if "sistema" in df_master.columns else None
+            m_space_col = "espacio" if "espacio" in df_master.columns else None
+            m_type_col = "tipo" if "tipo" in df_master.columns else None
+
+            if not m_name_col:
+                st.warning("⚠️ Se encontró `maestra_activos` pero falta la columna `Equipo`.")
+
+            if m_name_col:
+                # Filters UI
+                filters_active = False
+
+                # Layout for filters
+                c_filt1, c_filt2, c_filt3 = st.columns(3)
+
+                # 1. Type Filter (New)
+                if m_type_col:
+                    all_types = sorted(list(df_master[m_type_col].dropna().unique()))
+                    # Default to 'Equipo' (all types if none matches)
+                    default_types = kpi_default_types(all_types)
+
+                    sel_types = c_filt1.multiselect("Filtrar por Tipo", all_types, default=default_types, key="kpi_type_filter")
+                    if sel_types:
+                        df_master = df_master[df_master[m_type_col].isin(sel_types)]
+                        filters_active = True
+
+                # 2. Space Filter
+                if m_space_col:
+                    all_spaces = sorted(list(df_master[m_space_col].dropna().unique()))
+                    sel_spaces = c_filt2.multiselect("Filtrar por Espacio/Edificio", all_spaces, key="kpi_space_filter")
+                    if sel_spaces:
+                        df_master = df_master[df_master[m_space_col].isin(sel_spaces)]
+                        filters_active = True
+                else:
+                    pass
+
+                # 3. System Filter
+                if m_sys_col:
+                    all_systems = sorted(list(df_master[m_sys_col].dropna().unique()))
+                    sel_systems = c_filt3.multiselect("Filtrar por Sistema", all_systems, key="kpi_sys_filter")
+                    if sel_systems:
+                        df_master = df_master[df_master[m_sys_col].isin(sel_systems)]
+                        filters_active = True
+
+                # If any filter is active (or default type filter applied), we filter the allowed equipments
+                # Note: Even if user didn't touch filters, we applied default_types, so we should filter.
+                if filters_active or (m_type_col and default_types):
+                    allowed_equips = set(df_master[m_name_col].unique())
+
+        # Downtime, events and programmed minutes per (Equipo, Día), with prefix sums:
+        # any date range is answered with two lookups per equipment. The default
+        # selection and range come precomputed when available.
+        cube = KpiView(kpi_pre, lambda: live_kpi_cube(ctx))
+
+        # Apply Master Filter
+        eq_mask = cube.select(allowed_equips)
+
+        # Date Range Selector
+        # One indexed MIN/MAX with the SQLite backend: kept per selection
+        default_start, default_end = kpi_default_range(*ctx.memo("kpi_bounds", allowed_equips, lambda: cube.event_bounds(eq_mask)))
+
+        c_dates = st.columns(2)
+        start = c_dates[0].date_input("Fecha inicio", value=default_start, key="kpi_start", format="DD/MM/YYYY")
+        end = c_dates[1].date_input("Fecha fin", value=default_end, key="kpi_end", format="DD/MM/YYYY")
+
+        # --- HYBRID PROGRAMMED TIME CALCULATION ---
+        # Logic (kpi.AvailabilityCube):
+        # 1. Every (Date, Equipment) pair in the range counts the Standard Shift (Mon-Thu 9.5h, Fri 6h),
+        #    summed per equipment from weekday counts.
+        # 2. Days with rows in tbl_programacion use those rows instead (NaN rows fall back to Standard Shift).
+
+        PROGRAMMING_START_DATE = datetime.date(2025, 11, 1)
+
+        def kpi_table():
+            # Totals per equipment over [start, end]
+            totals = cube.totals(start, end, eq_mask)
+            downtime_by_eq = totals[["Equipo", "Downtime_Min"]]
+
+            # All equipments (from Bitacora + Programacion to be safe)
+            all_equips = sorted(totals["Equipo"])
+            programmed_by_eq = totals[["Equipo", "Programmed_Min"]]
+
+            # Merge Logic
+            final_df = pd.DataFrame({"Equipo": all_equips})
+
+            # Merge Downtime
+            final_df = final_df.merge(downtime_by_eq, on="Equipo", how="left").fillna(0)
+
+            # Merge Programmed
+            final_df = final_df.merge(programmed_by_eq, on="Equipo", how="left").fillna(0)
+
+            # Calculate Availability
+            # Avoid division by zero
+            final_df["Availability"] = final_df.apply(
+                lambda r: ((r["Programmed_Min"] - r["Downtime_Min"]) / r["Programmed_Min"] * 100) 
+                if r["Programmed_Min"] > 0 else 0.0, axis=1
+            )
+
+            # Table for the detail and the charts
+            display_df = final_df.copy()
+            display_df["Tiempo Detención (min)"] = display_df["Downtime_Min"].round(1)
+            display_df["Programado (min)"] = display_df["Programmed_Min"].round(1)
+            display_df["Disponibilidad (%)"] = display_df["Availability"].round(2)
+            display_df = display_df.sort_values("Disponibilidad (%)", ascending=True)
+            return display_df, final_df["Downtime_Min"].sum(), final_df["Programmed_Min"].sum(), int(totals["Events"].sum())
+
+        # Kept per data version, equipment selection and date range (read-only from here on)
+        display_df, total_downtime, total_programmed, total_failures = ctx.memo("kpi_table", (allowed_equips, start, end), kpi_table)
+
+        # Global Metrics
+        global_avail = ((total_programmed - total_downtime) / total_programmed * 100) if total_programmed > 0 else 0.0
+
+        # MTTR / MTBF (Approximate)
+
+        mttr = (total_downtime / total_failures) if total_failures > 0 else 0.0
+        mtbf = ((total_programmed - total_downtime) / total_failures) if total_failures > 0 else 0.0
+
+        # Display Metrics
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Disponibilidad Global", f"{global_avail:.2f}%")
+        m2.metric("Tiempo Detención (h)", f"{total_downtime/60:.1f}")
+        m3.metric("MTTR (min)", f"{mttr:.1f}")
+        m4.metric("N° de Fallas", f"{total_failures}")
+
+        st.info(f"ℹ️ Cálculo Híbrido: Antes del {PROGRAMMING_START_DATE.strftime('%d/%m/%Y')} se usa turno estándar (L-J 9.5h, V 6h). Desde esa fecha se usa `tbl_programacion` (o turno estándar si no hay datos).")
+
+        st.markdown("---")
+
+        # Detailed Table
+        st.subheader("Detalle por Equipo")
+        st.dataframe(
+            display_df[["Equipo", "Disponibilidad (%)", "Tiempo Detención (min)", "Programado (min)"]],
+            use_container_width=True,
+            hide_index=True
+        )
+
+        # Pie Charts
+        st.markdown("---")
+        st.subheader("Análisis Visual")
+
+        equipos_list = sorted(display_df["Equipo"].astype(str).unique())
+
+        # Default selection from user request
+        default_selection = [
+            "TROZADORA 2 (VERDE)", "TROZADORA 1 (AZUL)", "Sistema extracción", "Sistema cloracion agua", 
+            "Sala de compresores", "Sala de bombas", "REX", "Pantografo CNC", 
+            "PRENSA GLT N°3 (16 MTS)", "PRENSA GLT N°2 (24 MTS)", "PRENSA GLT N° 1 (9 MTS)", "PRENSA GLT CURVA", 
+            "PRENSA CLT", "PBA", "MOLDURERA WEINIG", "Moldurera SCM", "Cepillo 1000", 
+            "Encoladora CLT", "Encoladora GLT", "Encoladora prensa curva", "Escuadradora", 
+            "FINGER (24 mts)", "FINGER (6 mts)", "FINGER 3", "Generador Planta", "K2", "MOLDURERA 1"
+        ]
+        # Filter defaults to only those that actually exist in the data
+        valid_defaults = [e for e in default_selection if e in equipos_list]
+        if not valid_defaults:
+            valid_defaults = equipos_list[:4]
+
+        with st.expander("Opciones de Visualización (Filtro de Equipos)", expanded=False):
+            sel_equipos = st.multiselect("Seleccionar Equipos para Gráfico", options=equipos_list, default=valid_defaults)
+
+        if sel_equipos:
+            cols = st.columns(min(4, len(sel_equipos)))
+            for idx, eq in enumerate(sel_equipos):
+                row_data = display_df[display_df["Equipo"] == eq].iloc[0]
+                avail = row_data["Availability"]
+                avail = max(0, avail)
+                downtime_pct = max(0, 100 - avail)
+
+                # Get raw values for tooltip
+                raw_down = row_data["Tiempo Detención (min)"]
+                raw_prog = row_data["Programado (min)"]
+
+                # Sanitize for display
+                val_down = 0.0 if pd.isna(raw_down) else float(raw_down)
+                val_prog = 0.0 if pd.isna(raw_prog) else float(raw_prog)
+
+                # Format strings
+                str_prog = f"{val_prog:,.1f} min" if val_prog > 0 else "Sin programación"
+                str_down = f"{val_down:,.1f} min"
+
+                def pie_chart():
+                    fig = px.pie(
+                        values=[avail, downtime_pct], 
+                        names=["Disponible", "Detención"], 
+                        title=f"{eq}<br>{avail:.1f}%",
+                        color_discrete_sequence=["#22c55e", "#ef4444"],
+                        hole=0.4
+                    )
+
+                    # Add custom data for tooltip - Direct injection for reliability
+                    ht = f"<b>%{{label}}</b><br>%{{percent}}<br>Programado: {str_prog}<br>Detención: {str_down}<extra></extra>"
+                    fig.update_traces(hovertemplate=ht)
+
+                    # Increased height and margins to prevent tooltip cutoff
+                    fig.update_layout(showlegend=False, margin=dict(t=40, b=20, l=10, r=10), height=240)
+                    return fig
+
+                # Building a figure takes ~30 ms: each pie is kept by the values it shows
+                fig = ctx.memo("kpi_pie", (eq, avail, str_prog, str_down), pie_chart)
+
+                col_idx = idx % 4
+                if col_idx == 0 and idx > 0:
+                    st.write("")
+                    cols = st.columns(4)
+
+                with cols[col_idx]:
+                    st.plotly_chart(fig, use_container_width=True, key=f"pie_{idx}")
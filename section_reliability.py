@@ -0,0 +1,344 @@
+"""Sección Análisis de Confiabilidad: resumen por equipo, Pareto y Weibull."""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from app_context import AppContext
+from dashboard import dated_events, pareto_table, reliability_default_types, reliability_frame
+from reliability import CONFIDENCE_LEVEL, b_life, bootstrap_summary, bootstrap_weibull, equipment_seed, equipment_summary, tbf_by_equipment
+import storage_sqlite
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def load_bootstrap_summary(tbf: Dict[str, np.ndarray]) -> pd.DataFrame:
+    """Weibull bootstrap intervals of every equipment (process pool), cached per TBF set."""
+    return bootstrap_summary(tbf)
+
+
+def _interval(lo: float, hi: float, fmt: str) -> str:
+    return f"{lo:{fmt}} – {hi:{fmt}}"
+
+
+def render(ctx: AppContext):
+    dash = ctx.dashboard()
+    st.subheader("Ingeniería de Mantenimiento: Pareto & Weibull")
+
+    equipo_col = "equipo"
+
+    # Precomputed default view, while the filters are untouched
+    rel_pre = dash["reliability"] if dash else None
+    if rel_pre is not None and (st.session_state.get("rel_space_filter") or st.session_state.get("rel_sys_filter")
+                                or st.session_state.get("rel_type_filter", rel_pre["default_types"]) != rel_pre["default_types"]):
+        rel_pre = None
+    if rel_pre is not None:
+        df_rel = None
+        type_col, system_col, space_col = rel_pre["columns"]
+    else:
+        # --- MERGE WITH MASTER SHEET (maestra_activos) ---
+        df_rel, type_col, system_col, space_col = ctx.memo("rel_frame", None, lambda: reliability_frame(ctx.canon()))
+
+    if rel_pre is None and df_rel is None:
+        st.error("Faltan columnas clave (Fecha, Equipo) en la bitácora para realizar el análisis.")
+    else:
+        db = None if rel_pre is not None else ctx.db()
+        if rel_pre is not None:
+            # Same widgets, options as computed for the default filters
+            rel_filters = {}
+            if space_col:
+                st.multiselect("Filtrar por Espacio/Edificio", rel_pre["options"]["espacio"], key="rel_space_filter")
+            if system_col:
+                st.multiselect("Filtrar por Sistema", rel_pre["options"]["sistema"], key="rel_sys_filter")
+            if type_col:
+                st.multiselect("Filtrar por Tipo de Activo", rel_pre["options"]["tipo"], default=rel_pre["default_types"], key="rel_type_filter")
+            rel_min, rel_max = rel_pre["range"]
+        else:
+            # Cascading filters: each one's options come from the rows the previous ones leave (in SQL
+            # with the SQLite backend: master join and date range run there). Options, bounds and
+            # events are kept per filter values.
+            rel_filters = {}
+
+            def filtered_rows(filters):
+                def compute():
+                    df = df_rel
+                    for col, values in filters.items():
+                        if values:
+                            df = df[df[col].isin(values)]
+                    return df
+                return ctx.memo("rel_rows", filters, compute)
+
+            def dated_rows(filters):
+                # Dates and downtime come parsed from the canonical bitácora
+                return ctx.memo("rel_dated", filters, lambda: dated_events(filtered_rows(filters)))
+
+            def options(col):
+                upstream = dict(rel_filters)
+                if db is not None:
+                    return ctx.memo("rel_options_sql", (col, upstream), lambda: storage_sqlite.reliability_options(db, col, upstream))
+                return ctx.memo("rel_options", (col, upstream), lambda: sorted(list(filtered_rows(upstream)[col].dropna().unique())))
+
+            if space_col:
+                rel_filters[space_col] = st.multiselect("Filtrar por Espacio/Edificio", options(space_col), key="rel_space_filter")
+
+            if system_col:
+                rel_filters[system_col] = st.multiselect("Filtrar por Sistema", options(system_col), key="rel_sys_filter")
+
+            if type_col:
+                all_types = options(type_col)
+                default_types = reliability_default_types(all_types)
+
+                rel_filters[type_col] = st.multiselect("Filtrar por Tipo de Activo", all_types, default=default_types, key="rel_type_filter")
+
+            if db is not None:
+                rel_min, rel_max = ctx.memo("rel_bounds_sql", rel_filters, lambda: storage_sqlite.reliability_bounds(db, rel_filters))
+            else:
+                dated = dated_rows(rel_filters)
+                rel_min, rel_max = dated["__date"].min(), dated["__date"].max()
+
+        # Global Date Filter for Reliability Section
+        st.markdown("##### Rango de Análisis")
+        c_gen_1, c_gen_2 = st.columns(2)
+        gen_start = c_gen_1.date_input("Fecha Inicio", value=rel_min, key="gen_start", format="DD/MM/YYYY")
+        gen_end = c_gen_2.date_input("Fecha Fin", value=rel_max, key="gen_end", format="DD/MM/YYYY")
+
+        # Filter Data Global (kept per source, filter values and range; read-only from here on)
+        def date_cut(df):
+            return df[(df["__date"].dt.date >= gen_start) & (df["__date"].dt.date <= gen_end)].copy()
+
+        source = "pre" if rel_pre is not None else "sql" if db is not None else "frame"
+        scope = (source, rel_filters, gen_start, gen_end)
+        if rel_pre is not None:
+            df_gen = ctx.memo("rel_events", scope, lambda: date_cut(rel_pre["events"]))
+            if (gen_start, gen_end) != rel_pre["range"]:
+                # Another range: summary and Pareto are computed from the cut
+                rel_pre = None
+        elif db is not None:
+            df_gen = ctx.memo("rel_events", scope, lambda: storage_sqlite.query_reliability(db, gen_start, gen_end, rel_filters)
+                              .rename(columns={"fecha": "__date", "downtime_min": "__downtime_min"}))
+        else:
+            df_gen = ctx.memo("rel_events", scope, lambda: date_cut(dated_rows(rel_filters)))
+
+        # Tabs for sub-analyses
+        tab_resumen, tab_pareto, tab_weibull = st.tabs(["📋 Resumen General", "📉 Análisis de Pareto", "⚙️ Análisis de Weibull"])
+
+        # --- RESUMEN GENERAL ---
+        with tab_resumen:
+            st.markdown("#### Resumen de Confiabilidad por Equipo")
+            if df_gen.empty:
+                st.warning("No hay datos en el rango seleccionado.")
+            else:
+                def summary_table():
+                    # Frequency, downtime and Weibull fit of every equipment in one grouped pass
+                    summary = rel_pre["summary"] if rel_pre is not None else equipment_summary(df_gen, equipo_col)
+                    df_summary = pd.DataFrame({
+                        "Equipo": summary["Equipo"],
+                        "Frecuencia": summary["Frecuencia"],
+                        "Tiempo Detención (min)": summary["Detencion_Min"].round(1),
+                        "Beta (β)": summary["Beta"].round(2),
+                        "Eta (η)": summary["Eta"].round(1),
+                        "Diagnóstico": summary["Diagnostico"],
+                    })
+                    # Sort by Downtime desc
+                    return df_summary.sort_values("Tiempo Detención (min)", ascending=False)
+
+                df_summary = ctx.memo("rel_summary", scope, summary_table)
+
+                if st.checkbox(f"Incluir intervalos de confianza {CONFIDENCE_LEVEL:.0%} (bootstrap)", key="rel_bootstrap"):
+                    with st.spinner("Remuestreando tiempos entre fallas..."):
+                        ci = load_bootstrap_summary({str(k): v for k, v in tbf_by_equipment(df_gen, equipo_col).items()})
+                    ci = ci.set_index("Equipo")
+                    df_summary = df_summary.copy()
+                    keys = df_summary["Equipo"].astype(str)
+                    level = f"IC {CONFIDENCE_LEVEL:.0%}"
+                    for label, name, fmt in [(f"β {level}", "Beta", ".2f"), (f"η {level}", "Eta", ".1f"), (f"B10 {level} (días)", "B10", ".1f")]:
+                        df_summary[label] = keys.map(lambda k: _interval(ci.at[k, f"{name}_Min"], ci.at[k, f"{name}_Max"], fmt) if k in ci.index else None)
+
+                st.dataframe(df_summary, use_container_width=True, hide_index=True)
+
+        # --- PARETO ---
+        with tab_pareto:
+            st.markdown("#### Principio 80/20: Identificación de Equipos Críticos")
+
+            if df_gen.empty:
+                st.info("No hay datos en el rango seleccionado.")
+            else:
+                pareto_mode = st.radio("Criterio de Pareto", ["Por Tiempo de Falla (Impacto)", "Por Frecuencia de Falla"], horizontal=True)
+
+                # Grouping, sorted descending with the cumulative percentage
+                by_downtime = pareto_mode == "Por Tiempo de Falla (Impacto)"
+                y_label = "Minutos de Detención" if by_downtime else "Cantidad de Fallas"
+
+                def pareto_chart():
+                    if rel_pre is not None:
+                        grouped = rel_pre["pareto_downtime" if by_downtime else "pareto_count"]
+                    else:
+                        grouped = pareto_table(df_gen, equipo_col, by_downtime)
+
+                    # Pareto Chart
+                    fig_pareto = go.Figure()
+
+                    # Bar Chart (Individual)
+                    fig_pareto.add_trace(go.Bar(
+                        x=grouped["Equipo"], 
+                        y=grouped["Valor"], 
+                        name=y_label,
+                        marker_color="#3b82f6"
+                    ))
+
+                    # Line Chart (Cumulative)
+                    fig_pareto.add_trace(go.Scatter(
+                        x=grouped["Equipo"], 
+                        y=grouped["Acumulado"], 
+                        name="% Acumulado",
+                        yaxis="y2",
+                        mode="lines+markers",
+                        marker_color="#ef4444"
+                    ))
+
+                    # Layout
+                    fig_pareto.update_layout(
+                        title=f"Pareto de {y_label}",
+                        yaxis=dict(title=y_label),
+                        yaxis2=dict(title="% Acumulado", overlaying="y", side="right", range=[0, 105]),
+                        showlegend=True,
+                        height=500,
+                        margin=dict(l=50, r=50, t=50, b=100)
+                    )
+                    return grouped, fig_pareto
+
+                grouped, fig_pareto = ctx.memo("rel_pareto", (scope, by_downtime), pareto_chart)
+
+                st.plotly_chart(fig_pareto, use_container_width=True)
+
+                # Interpretation
+                top_80 = grouped[grouped["Acumulado"] <= 80]
+                count_80 = len(top_80)
+                total_eq = len(grouped)
+                st.info(f"💡 **Insight:** {count_80} equipos (el {count_80/total_eq:.1%} del total) representan el 80% de los problemas. Enfocar esfuerzos en: {', '.join(top_80['Equipo'].head(5).tolist())}...")
+
+        # --- WEIBULL ---
+        with tab_weibull:
+            st.markdown("#### Análisis de Vida Útil (Weibull)")
+            st.markdown("Calcula el parámetro Beta (β) para diagnosticar el tipo de falla: Infantil, Aleatoria o Desgaste.")
+
+            # Filter Equipments with enough data (> 4 failures)
+            # Use df_gen (filtered by date) instead of df_rel
+            counts = df_gen[equipo_col].value_counts()
+            valid_equips = counts[counts >= 5].index.tolist()
+
+            if not valid_equips:
+                st.warning("No hay equipos con suficientes fallas (mínimo 5) en el rango seleccionado para un análisis Weibull confiable.")
+            else:
+                w_eq = st.selectbox("Seleccionar Equipo para Análisis", sorted(valid_equips))
+
+                # Get data for specific equipment
+                df_w = df_gen[df_gen[equipo_col] == w_eq].copy()
+                df_w = df_w.sort_values("__date")
+
+                # Calculate TBF (Time Between Failures) in Days
+                # We assume continuous operation for simplicity or use date diff
+                df_w["prev_date"] = df_w["__date"].shift(1)
+                df_w["days_diff"] = (df_w["__date"] - df_w["prev_date"]).dt.total_seconds() / (3600 * 24)
+
+                # Drop first record (no TBF) and 0 TBFs (same day failures might need aggregation, but let's keep simple)
+                tbf_data = df_w["days_diff"].dropna()
+                tbf_data = tbf_data[tbf_data > 0].sort_values()
+
+                if len(tbf_data) < 4:
+                    st.warning("Datos insuficientes para calcular TBF (se requieren al menos 4 intervalos válidos > 0).")
+                else:
+                    # Weibull Fitting using Linear Regression on Median Ranks
+                    # ln(-ln(1-Median_Rank)) = Beta * ln(t) - Beta * ln(Eta)
+                    # Y = m * X + c
+                    # m = Beta
+                    # c = -Beta * ln(Eta)  =>  Eta = exp(-c / Beta)
+
+                    n = len(tbf_data)
+                    ranks = np.arange(1, n + 1)
+                    # Median Rank Approximation (Bernard's approximation)
+                    median_ranks = (ranks - 0.3) / (n + 0.4)
+
+                    # X and Y for regression
+                    x_reg = np.log(tbf_data.values)
+                    y_reg = np.log(-np.log(1 - median_ranks))
+
+                    # Linear Fit
+                    slope, intercept = np.polyfit(x_reg, y_reg, 1)
+
+                    beta = slope
+                    eta = np.exp(-intercept / beta)
+
+                    # Display Results
+                    c_w1, c_w2, c_w3 = st.columns(3)
+                    c_w1.metric("Beta (β) - Forma", f"{beta:.2f}")
+                    c_w2.metric("Eta (η) - Escala (días)", f"{eta:.1f}")
+                    c_w3.metric("Muestras (Fallas)", f"{n}")
+
+                    # Uncertainty: percentile bootstrap of the TBF (few intervals -> wide bounds)
+                    ci = ctx.memo("rel_weibull_ci", (scope, w_eq), lambda: bootstrap_weibull(tbf_data.values, seed=equipment_seed(w_eq)))
+                    if ci is not None:
+                        c_ci1, c_ci2, c_ci3, c_ci4 = st.columns(4)
+                        c_ci1.metric(f"β IC {CONFIDENCE_LEVEL:.0%}", _interval(*ci["beta"], ".2f"))
+                        c_ci2.metric(f"η IC {CONFIDENCE_LEVEL:.0%} (días)", _interval(*ci["eta"], ".1f"))
+                        c_ci3.metric("Vida B10 (días)", f"{b_life(beta, eta):.1f}")
+                        c_ci4.metric(f"B10 IC {CONFIDENCE_LEVEL:.0%} (días)", _interval(*ci["b10"], ".1f"))
+
+                    # Diagnosis
+                    if beta < 0.9:
+                        diag = "🔴 **Mortalidad Infantil:** Fallas prematuras. Revisar calidad de repuestos, instalación o procedimientos de arranque."
+                    elif 0.9 <= beta <= 1.1:
+                        diag = "🟡 **Fallas Aleatorias:** Tasa constante. Causas externas, operación indebida o sobrecarga. El mantenimiento preventivo basado en tiempo NO es efectivo aquí."
+                    else:
+                        diag = "🟢 **Desgaste (Wear-out):** El equipo está envejeciendo. El mantenimiento preventivo y sustitución programada SON efectivos."
+
+                    st.success(diag)
+
+                    # Weibull Plot (Probability Plot)
+                    fig_wei = go.Figure()
+
+                    # Scatter points
+                    fig_wei.add_trace(go.Scatter(
+                        x=tbf_data,
+                        y=y_reg, # Plotting linearized Y for straight line check is common, but let's plot CDF vs Time for intuitive view? 
+                        # Actually, standard Weibull plot is log-log. Let's stick to the linearized plot for technical accuracy or CDF for visual?
+                        # Let's plot CDF (Probability of Failure) vs Time
+                        mode='markers',
+                        name='Datos Reales',
+                        customdata=median_ranks,
+                        hovertemplate="TBF: %{x:.1f} días<br>Prob. Falla: %{customdata:.1%}"
+                    ))
+
+                    # Theoretical Line
+                    # F(t) = 1 - exp(-(t/eta)^beta)
+                    t_theoretical = np.linspace(tbf_data.min(), tbf_data.max(), 100)
+                    f_theoretical = 1 - np.exp(-(t_theoretical / eta) ** beta)
+                    # But to match the linearized Y axis of the regression check?
+                    # Let's plot the Probability Density Function (PDF) or CDF?
+                    # Let's plot CDF vs Time standard
+
+                    fig_wei = go.Figure()
+                    fig_wei.add_trace(go.Scatter(
+                        x=tbf_data, 
+                        y=median_ranks, 
+                        mode='markers', 
+                        name='Datos (Rangos Medianos)'
+                    ))
+
+                    fig_wei.add_trace(go.Scatter(
+                        x=t_theoretical,
+                        y=f_theoretical,
+                        mode='lines',
+                        name=f'Curva Weibull (β={beta:.2f})',
+                        line=dict(color='orange')
+                    ))
+
+                    fig_wei.update_layout(
+                        title=f"Curva de Probabilidad de Falla Acumulada - {w_eq}",
+                        xaxis_title="Tiempo entre Fallas (días)",
+                        yaxis_title="Probabilidad de Falla Acumulada F(t)",
+                        height=450
+                    )
+
+                    st.plotly_chart(fig_wei, use_container_width=True)
@@ -0,0 +1,243 @@
+"""Snapshot en disco (Parquet) de las hojas cargadas por la app.
+
+Cada snapshot es una carpeta `.snapshot/<fingerprint>/` con un archivo
+Parquet por hoja y un `current.json` que apunta a la versión vigente.
+El fingerprint se calcula sobre el contenido de los DataFrames, de modo que
+volver a leer la misma fuente produce la misma versión y los reinicios del
+servicio no obligan a re-leer Google Sheets o el .xlsm.
+"""
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import datetime
+import hashlib
+import json
+import math
+import os
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+SNAPSHOT_DIRNAME = ".snapshot"
+SNAPSHOT_SHEETS = ["tbl_bitacora", "OM", "Presupuesto", "Otros_Gastos", "tbl_programacion", "maestra_activos"]
+FORMAT_VERSION = 1
+_CURRENT = "current.json"
+_KEEP_VERSIONS = 2
+
+# Object columns pyarrow can store natively
+_NATIVE_KINDS = {"string", "empty", "integer", "floating", "boolean", "decimal", "datetime", "datetime64", "date", "time", "bytes"}
+# Mixed columns keep one typed companion column per Python type, named "<col>\x1f<kind>"
+_COMPANION_SEP = "\x1f"
+
+
+def _parquet_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def _value_kind(v) -> Optional[str]:
+    if v is None or v is pd.NaT or (isinstance(v, float) and math.isnan(v)):
+        return None
+    if isinstance(v, (bool, np.bool_)):
+        return "bool"
+    if isinstance(v, (int, np.integer)):
+        return "int"
+    if isinstance(v, (float, np.floating)):
+        return "float"
+    if isinstance(v, datetime.datetime):
+        return "datetime"
+    if isinstance(v, datetime.date):
+        return "date"
+    if isinstance(v, datetime.time):
+        return "time"
+    if isinstance(v, datetime.timedelta):
+        return "timedelta"
+    return "str"
+
+
+def _typed_companion(values: pd.Series, kind: str) -> pd.Series:
+    if kind == "int":
+        return values.astype("Int64")
+    if kind == "float":
+        return values.astype("float64")
+    if kind == "bool":
+        return values.astype("boolean")
+    if kind == "datetime":
+        return pd.to_datetime(values)
+    if kind == "timedelta":
+        return pd.to_timedelta(values)
+    return values
+
+
+def to_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """Return a copy of df whose columns can be written to Parquet.
+
+    Google Sheets returns '' for empty cells and Excel may mix text and numbers
+    in one column. Such object columns are split into a text column plus one
+    typed companion column per value type, so `from_columnar` restores the
+    exact Python values (e.g. 3200.5 stays a float and is not re-parsed).
+    """
+    out = df.copy()
+    out.columns = [str(c) for c in out.columns]
+    companions = {}
+    for col in list(out.columns):
+        s = out[col]
+        if s.dtype != object or pd.api.types.infer_dtype(s, skipna=True) in _NATIVE_KINDS:
+            continue
+        kinds = s.map(_value_kind)
+        for kind in kinds.dropna().unique():
+            if kind == "str":
+                continue
+            companions[f"{col}{_COMPANION_SEP}{kind}"] = _typed_companion(s.where(kinds == kind, None), kind)
+        text = s.where(kinds == "str", None)
+        out[col] = text.map(lambda v: v if v is None or isinstance(v, str) else str(v)).astype(object)
+    if companions:
+        out = pd.concat([out, pd.DataFrame(companions, index=out.index)], axis=1)
+    return out
+
+
+def from_columnar(df: pd.DataFrame) -> pd.DataFrame:
+    """Inverse of `to_columnar`: merge companion columns back into object columns."""
+    extra = [c for c in df.columns if _COMPANION_SEP in c]
+    if not extra:
+        return df
+    out = df.drop(columns=extra)
+    for comp in extra:
+        col = comp.split(_COMPANION_SEP, 1)[0]
+        base = out[col].astype(object) if out[col].dtype != object else out[col]
+        mask = df[comp].notna().to_numpy()
+        merged = base.to_numpy(dtype=object, copy=True)
+        merged[mask] = df[comp][mask].astype(object).to_numpy()
+        out[col] = pd.Series(merged, index=out.index, dtype=object)
+    return out
+
+
+def content_fingerprint(sheets: Dict[str, pd.DataFrame]) -> str:
+    """Stable hash of the sheet names, columns, dtypes and cell values."""
+    h = hashlib.blake2b(digest_size=12)
+    h.update(f"v{FORMAT_VERSION}".encode())
+    for name in sorted(sheets):
+        df = sheets[name]
+        h.update(name.encode("utf-8"))
+        h.update(json.dumps([[str(c), str(t)] for c, t in df.dtypes.items()]).encode("utf-8"))
+        if len(df):
+            h.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return h.hexdigest()
+
+
+def file_stamp(*paths: Path) -> str:
+    """Cheap identity of local source files (name, size, mtime)."""
+    parts = []
+    for p in paths:
+        try:
+            st_ = p.stat()
+            parts.append(f"{p.name}:{st_.st_size}:{st_.st_mtime_ns}")
+        except OSError:
+            parts.append(f"{p.name}:-")
+    return "|".join(parts)
+
+
+def read_manifest(snap_dir: Path) -> Optional[dict]:
+    try:
+        with open(snap_dir / _CURRENT, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("format") != FORMAT_VERSION:
+        return None
+    return manifest
+
+
+def _write_manifest(snap_dir: Path, manifest: dict) -> None:
+    tmp = snap_dir / f".{_CURRENT}.{uuid.uuid4().hex}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, snap_dir / _CURRENT)
+
+
+def read_snapshot(snap_dir: Path, stamp: str, max_age: Optional[float] = None) -> Optional[Tuple[Dict[str, pd.DataFrame], dict]]:
+    """Load the current snapshot if it was taken from `stamp`.
+
+    `max_age` (seconds) limits how long a snapshot is trusted without
+    re-checking the source; used for remote sources without a cheap stamp.
+    """
+    if not _parquet_available():
+        return None
+    manifest = read_manifest(snap_dir)
+    if manifest is None or manifest.get("stamp") != stamp:
+        return None
+    if max_age is not None:
+        checked = datetime.datetime.fromisoformat(manifest.get("checked_at", "1970-01-01T00:00:00"))
+        if (datetime.datetime.now() - checked).total_seconds() > max_age:
+            return None
+    version_dir = snap_dir / manifest["fingerprint"]
+    sheets = {}
+    try:
+        for name, info in manifest["sheets"].items():
+            sheets[name] = from_columnar(pd.read_parquet(version_dir / info["file"]))
+    except Exception:
+        return None
+    return sheets, manifest
+
+
+def write_snapshot(snap_dir: Path, sheets: Dict[str, pd.DataFrame], stamp: str, source_type: str, extra: Optional[dict] = None) -> Optional[dict]:
+    """Persist `sheets` as a new snapshot version and make it current.
+
+    If the content fingerprint matches the current version only the
+    manifest is refreshed. Returns the manifest, or None if the snapshot
+    could not be written.
+    """
+    if not _parquet_available() or not sheets:
+        return None
+    if any(not df.columns.is_unique for df in sheets.values()):
+        return None
+    sheets = {name: to_columnar(df) for name, df in sheets.items()}
+    now = datetime.datetime.now().isoformat(timespec="seconds")
+    fingerprint = content_fingerprint(sheets)
+    snap_dir.mkdir(parents=True, exist_ok=True)
+    version_dir = snap_dir / fingerprint
+    files = {name: f"{i:02d}.parquet" for i, name in enumerate(sorted(sheets))}
+    try:
+        if not version_dir.exists():
+            tmp_dir = snap_dir / f".tmp-{uuid.uuid4().hex}"
+            tmp_dir.mkdir()
+            try:
+                for name, df in sheets.items():
+                    df.to_parquet(tmp_dir / files[name], index=False)
+                try:
+                    os.replace(tmp_dir, version_dir)
+                except OSError:
+                    # Another process published the same version first
+                    if not version_dir.exists():
+                        raise
+            finally:
+                # Partial files of a failed or interrupted write (gone after a successful replace)
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        previous = read_manifest(snap_dir)
+        manifest = {
+            "format": FORMAT_VERSION,
+            "fingerprint": fingerprint,
+            "stamp": stamp,
+            "source_type": source_type,
+            "written_at": previous["written_at"] if previous and previous.get("fingerprint") == fingerprint else now,
+            "checked_at": now,
+            "sheets": {name: {"file": files[name], "rows": int(len(df))} for name, df in sheets.items()},
+        }
+        if extra:
+            manifest.update(extra)
+        _write_manifest(snap_dir, manifest)
+        _prune(snap_dir, keep={fingerprint, previous.get("fingerprint") if previous else None})
+        return manifest
+    except Exception:
+        return None
+
+
+def _prune(snap_dir: Path, keep: set) -> None:
+    versions = sorted((p for p in snap_dir.iterdir() if p.is_dir() and not p.name.startswith(".")), key=lambda p: p.stat().st_mtime, reverse=True)
+    for p in versions[_KEEP_VERSIONS:]:
+        if p.name not in keep:
+            shutil.rmtree(p, ignore_errors=True)
@@ -0,0 +1,406 @@
+"""Backend SQLite para los datos de mantención.
+
+Guarda la bitácora, programación, OM, presupuesto, otros gastos y la
+maestra de activos en tablas con columnas ya resueltas y limpias (fechas
+ISO, montos numéricos, detención en minutos), con índices por
+(equipo, fecha) y por (año, mes). Las secciones filtran directamente en SQL
+en vez de cargar y filtrar DataFrames completos: el KPI sólo guarda la
+lista de equipos y suma las filas del rango elegido, Confiabilidad cruza con
+la maestra y filtra ahí, y Presupuesto suma por año, mes y categoría y lee
+el detalle de un mes por el índice (año, mes).
+
+Uso como importador: carga los datos igual que la app (data_source.load_sheets,
+mismo snapshot y misma versión de datos), así la app no vuelve a importar:
+
+    python storage_sqlite.py                    # Google Sheets si hay credenciales, si no CSV/libro
+    python storage_sqlite.py --source local --db mantencion.db
+"""
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import argparse
+import datetime
+import json
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+from kpi import STANDARD_SHIFT_MINUTES, standard_minutes_between
+from finance import OM_PARTS, SpendCube
+from schema import BITACORA, BITACORA_TEXTO, MAESTRA, OM, OTROS_GASTOS, PRESUPUESTO, PROGRAMACION, canonical_sheets, from_days
+
+DB_FILENAME = "mantencion.db"
+SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS bitacora (
+    id INTEGER PRIMARY KEY,
+    fecha TEXT,
+    equipo TEXT,
+    equipo_key TEXT,
+    turno TEXT,
+    especialidad TEXT,
+    grupo TEXT,
+    tipo TEXT,
+    observaciones TEXT,
+    downtime_min REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS ix_bitacora_equipo_fecha ON bitacora (equipo_key, fecha);
+CREATE INDEX IF NOT EXISTS ix_bitacora_fecha ON bitacora (fecha);
+CREATE TABLE IF NOT EXISTS programacion (
+    id INTEGER PRIMARY KEY,
+    fecha TEXT,
+    equipo TEXT,
+    equipo_key TEXT,
+    minutos REAL
+);
+CREATE INDEX IF NOT EXISTS ix_programacion_equipo_fecha ON programacion (equipo_key, fecha);
+CREATE TABLE IF NOT EXISTS om (
+    id INTEGER PRIMARY KEY,
+    fecha TEXT,
+    anio INTEGER,
+    mes INTEGER,
+    orden TEXT,
+    descripcion TEXT,
+    repuestos REAL,
+    servicios REAL
+);
+CREATE INDEX IF NOT EXISTS ix_om_anio_mes ON om (anio, mes);
+CREATE TABLE IF NOT EXISTS otros_gastos (
+    id INTEGER PRIMARY KEY,
+    fecha TEXT,
+    anio INTEGER,
+    mes INTEGER,
+    categoria TEXT,
+    descripcion TEXT,
+    monto REAL
+);
+CREATE INDEX IF NOT EXISTS ix_otros_gastos_anio_mes ON otros_gastos (anio, mes);
+CREATE TABLE IF NOT EXISTS presupuesto (
+    id INTEGER PRIMARY KEY,
+    anio INTEGER,
+    mes INTEGER,
+    monto REAL
+);
+CREATE INDEX IF NOT EXISTS ix_presupuesto_anio_mes ON presupuesto (anio, mes);
+CREATE TABLE IF NOT EXISTS maestra_activos (
+    id INTEGER PRIMARY KEY,
+    equipo TEXT,
+    equipo_key TEXT,
+    tipo TEXT,
+    sistema TEXT,
+    espacio TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_maestra_equipo_key ON maestra_activos (equipo_key);
+"""
+_TABLES = ["bitacora", "programacion", "om", "otros_gastos", "presupuesto", "maestra_activos"]
+_TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def connect(db_path: Path) -> sqlite3.Connection:
+    con = sqlite3.connect(str(db_path), check_same_thread=False)
+    con.execute("PRAGMA journal_mode=WAL")
+    con.executescript(_SCHEMA)
+    return con
+
+
+def data_version(con: sqlite3.Connection) -> Optional[str]:
+    row = con.execute("SELECT value FROM meta WHERE key = 'data_version'").fetchone()
+    return row[0] if row else None
+
+
+# --- Import ---
+
+_TABLE_COLUMNS = {
+    BITACORA: ["fecha", "equipo", "equipo_key", "turno", "especialidad", "grupo", "tipo", "observaciones", "downtime_min"],
+    PROGRAMACION: ["fecha", "equipo", "equipo_key", "minutos"],
+    OM: ["fecha", "anio", "mes", "orden", "descripcion", "repuestos", "servicios"],
+    OTROS_GASTOS: ["fecha", "anio", "mes", "categoria", "descripcion", "monto"],
+    PRESUPUESTO: ["anio", "mes", "monto"],
+    MAESTRA: ["equipo", "equipo_key", "tipo", "sistema", "espacio"],
+}
+_NUMERIC = {"downtime_min", "minutos", "repuestos", "servicios", "monto"}
+
+
+def _text(s: pd.Series) -> pd.Series:
+    return s.astype(object).map(lambda v: None if pd.isna(v) else str(v))
+
+
+def _table_rows(table: str, df: Optional[pd.DataFrame]) -> pd.DataFrame:
+    """Canonical frame -> table columns (ISO dates, text, numbers; NULL for missing columns)."""
+    if df is None:
+        return pd.DataFrame()
+    out = pd.DataFrame(index=df.index)
+    for col in _TABLE_COLUMNS[table]:
+        if col == "fecha" and "dia" in df.columns:
+            fecha = from_days(df["dia"])
+            out[col] = fecha.dt.strftime(_TS_FORMAT).where(fecha.notna(), None)
+        elif col not in df.columns:
+            # NULL marks a missing column (e.g. no Costo Servicios: left out of the totals)
+            out[col] = None
+        elif col == "anio" and table == PRESUPUESTO:
+            # Budget years as finance.build_ledger reads them ("2025", 2025.0 -> 2025); NULL if unreadable
+            years = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(np.int64)
+            out[col] = years.astype("Int64").where(years != 0)
+        elif col == "mes" and table == PRESUPUESTO:
+            # 0: a month that could not be read (counts in the annual total only)
+            out[col] = df[col].where(df[col].between(1, 12), 0).astype("Int64")
+        elif col in ("anio", "mes"):
+            # 0 marks rows without a date
+            out[col] = df[col].astype("Int64").where(df[col] != 0)
+        elif col in _NUMERIC:
+            out[col] = df[col].astype(float)
+        else:
+            out[col] = _text(df[col])
+    return out
+
+
+def import_sheets(con: sqlite3.Connection, sheets: Dict[str, pd.DataFrame], version: Optional[str] = None) -> Dict[str, int]:
+    """Replace the contents of every table with the given sheets (as returned by load_sheets)."""
+    return import_canonical(con, canonical_sheets(sheets), version)
+
+
+def import_canonical(con: sqlite3.Connection, canon: Dict[str, pd.DataFrame], version: Optional[str] = None) -> Dict[str, int]:
+    """Replace the contents of every table with the canonical frames of schema.canonical_sheets."""
+    counts = {}
+    with con:
+        for table in _TABLES:
+            con.execute(f"DELETE FROM {table}")
+            frame = canon.get(table)
+            if table == BITACORA and frame is not None and BITACORA_TEXTO in canon:
+                frame = frame.join(canon[BITACORA_TEXTO])
+            df = _table_rows(table, frame)
+            if not df.empty:
+                cols = list(df.columns)
+                rows = (tuple(None if pd.isna(v) else v for v in rec) for rec in df.astype(object).itertuples(index=False, name=None))
+                con.executemany(f"INSERT INTO {table} ({', '.join(cols)}) VALUES ({', '.join('?' * len(cols))})", rows)
+            counts[table] = len(df)
+        meta = {"schema_version": str(SCHEMA_VERSION), "data_version": version or "", "imported_at": datetime.datetime.now().isoformat(timespec="seconds"),
+                # Canonical tables the sheets resolved to (an empty table is not a missing one)
+                "tables": json.dumps(sorted(t for t in _TABLES if canon.get(t) is not None))}
+        con.executemany("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", meta.items())
+    con.execute("ANALYZE")
+    return counts
+
+
+def ensure_current(con: sqlite3.Connection, canon: Callable[[], Dict[str, pd.DataFrame]], version: str) -> bool:
+    """Re-import if the database holds another data version or schema; `canon()` is only called then."""
+    schema = con.execute("SELECT value FROM meta WHERE key = 'schema_version'").fetchone()
+    if data_version(con) == version and schema == (str(SCHEMA_VERSION),):
+        return False
+    import_canonical(con, canon(), version)
+    return True
+
+
+def has_table(con: sqlite3.Connection, table: str) -> bool:
+    """Whether the last import had this canonical table (e.g. a bitácora with Fecha and Equipo)."""
+    row = con.execute("SELECT value FROM meta WHERE key = 'tables'").fetchone()
+    return table in json.loads(row[0]) if row else False
+
+
+# --- Queries ---
+
+def _keys_clause(col: str, keys: Optional[Iterable[str]]) -> Tuple[str, list]:
+    if keys is None:
+        return "1 = 1", []
+    return f"{col} IN (SELECT value FROM json_each(?))", [json.dumps(sorted(keys))]
+
+
+def _range_clause(col: str, start: Optional[datetime.date], end: Optional[datetime.date]) -> Tuple[str, list]:
+    conds, params = [f"{col} IS NOT NULL"], []
+    if start is not None:
+        conds.append(f"{col} >= ?")
+        params.append(start.strftime(_TS_FORMAT))
+    if end is not None:
+        conds.append(f"{col} < ?")
+        params.append((end + datetime.timedelta(days=1)).strftime(_TS_FORMAT))
+    return " AND ".join(conds), params
+
+
+def _to_date(value: Optional[str]) -> Optional[datetime.date]:
+    return datetime.datetime.strptime(value, _TS_FORMAT).date() if value else None
+
+
+class AvailabilityQuery:
+    """kpi.AvailabilityCube answered in SQL: one indexed query per date range and selection.
+
+    Only the equipment list is kept in memory; totals and bounds read the
+    bitácora and tbl_programacion rows of the range through the
+    (equipo_key, fecha) indexes.
+    """
+
+    def __init__(self, con: sqlite3.Connection):
+        self.con = con
+        # Every equipment seen in either sheet, even on rows without a valid date
+        eq = con.execute("SELECT equipo, equipo_key FROM bitacora WHERE equipo IS NOT NULL "
+                         "UNION SELECT equipo, equipo_key FROM programacion WHERE equipo IS NOT NULL").fetchall()
+        self.equipos = np.array([e for e, _ in eq], dtype=object)
+        self._keys = np.array([k for _, k in eq], dtype=object)
+
+    def select(self, keys: Optional[set] = None) -> np.ndarray:
+        """Boolean mask of equipments whose stripped name is in `keys` (all if None)."""
+        if keys is None:
+            return np.ones(len(self.equipos), dtype=bool)
+        return np.array([k in keys for k in self._keys], dtype=bool)
+
+    def _where(self, col: str, mask: np.ndarray, start: Optional[datetime.date] = None, end: Optional[datetime.date] = None) -> Tuple[str, list]:
+        rng, p1 = _range_clause(f"{col}.fecha", start, end)
+        keys, p2 = _keys_clause(f"{col}.equipo_key", None if mask.all() else set(self._keys[mask]))
+        return f"{rng} AND {keys}", p1 + p2
+
+    def event_bounds(self, mask: np.ndarray) -> Tuple[Optional[datetime.date], Optional[datetime.date]]:
+        """First and last day with bitácora events among the selected equipments."""
+        if not mask.any():
+            return None, None
+        where, params = self._where("b", mask)
+        lo, hi = self.con.execute(f"SELECT MIN(b.fecha), MAX(b.fecha) FROM bitacora b WHERE {where}", params).fetchone()
+        return _to_date(lo), _to_date(hi)
+
+    def totals(self, start: datetime.date, end: datetime.date, mask: np.ndarray) -> pd.DataFrame:
+        """Equipo, Downtime_Min, Programmed_Min and Events over [start, end] for the selected equipments."""
+        out = pd.DataFrame({"Equipo": self.equipos[mask]})
+        if not mask.any() or end < start:
+            return out.assign(Downtime_Min=0.0, Programmed_Min=0.0, Events=0)
+        where, params = self._where("b", mask, start, end)
+        events = pd.read_sql_query(
+            f"SELECT b.equipo AS Equipo, SUM(b.downtime_min) AS Downtime_Min, COUNT(*) AS Events FROM bitacora b WHERE {where} GROUP BY b.equipo",
+            self.con, params=params)
+        # Overridden days count the sum of their rows (blank rows -> standard shift) instead of the standard shift
+        where, params = self._where("p", mask, start, end)
+        days = pd.read_sql_query(
+            f"SELECT p.equipo AS Equipo, p.fecha, COALESCE(SUM(p.minutos), 0) AS minutos, COUNT(*) - COUNT(p.minutos) AS blanks "
+            f"FROM programacion p WHERE {where} GROUP BY p.equipo, p.fecha", self.con, params=params)
+        std = STANDARD_SHIFT_MINUTES[pd.to_datetime(days["fecha"], format=_TS_FORMAT).dt.weekday.to_numpy()]
+        correction = (days["minutos"] + (days["blanks"] - 1) * std).groupby(days["Equipo"]).sum()
+        out = out.merge(events, on="Equipo", how="left")
+        return pd.DataFrame({
+            "Equipo": out["Equipo"],
+            "Downtime_Min": out["Downtime_Min"].fillna(0.0).astype(float),
+            "Programmed_Min": standard_minutes_between(start, end) + out["Equipo"].map(correction).fillna(0.0).astype(float),
+            "Events": out["Events"].fillna(0).astype(int),
+        })
+
+
+# Expense rows of finance.build_ledger: each OM part the sheet has (NULL column: no part), then Otros_Gastos
+_EXPENSES = " UNION ALL ".join(
+    [f"SELECT 0 AS src, id, {part} AS part, fecha, anio, mes, 'OM ' || orden AS origen, descripcion, '{category}' AS categoria, "
+     f"{col} AS monto FROM om WHERE {col} IS NOT NULL" for part, (col, category) in enumerate(OM_PARTS.items())]
+    + ["SELECT 1, id, 0, fecha, anio, mes, 'Otros Gastos', descripcion, categoria, monto FROM otros_gastos"])
+
+
+def has_budget(con: sqlite3.Connection) -> bool:
+    """Whether Presupuesto had budget lines (as any fuente == BUDGET row of the ledger)."""
+    return con.execute("SELECT EXISTS (SELECT 1 FROM presupuesto)").fetchone()[0] == 1
+
+
+def spend_totals(con: sqlite3.Connection) -> SpendCube:
+    """finance.SpendCube from Año x Mes x Categoría sums computed in SQL (the ledger rows stay on disk)."""
+    expenses = pd.read_sql_query(
+        f"SELECT anio, mes, categoria, SUM(monto) AS monto, COUNT(*) AS n FROM ({_EXPENSES}) "
+        "WHERE anio IS NOT NULL AND categoria IS NOT NULL GROUP BY anio, mes, categoria", con)
+    budget = pd.read_sql_query("SELECT anio, mes, SUM(monto) AS monto FROM presupuesto WHERE anio IS NOT NULL GROUP BY anio, mes", con)
+    years = [r[0] for r in con.execute(f"SELECT anio FROM ({_EXPENSES}) WHERE anio IS NOT NULL UNION SELECT anio FROM presupuesto WHERE anio IS NOT NULL")]
+    return SpendCube.from_totals(years, expenses, budget)
+
+
+def query_expense_lines(con: sqlite3.Connection, year: int, month: int) -> pd.DataFrame:
+    """finance.expense_lines of one month, read through the (anio, mes) indexes."""
+    df = pd.read_sql_query(
+        f"SELECT fecha, origen, descripcion, categoria, monto FROM ({_EXPENSES}) WHERE anio = ? AND mes = ? AND monto > 0 "
+        "ORDER BY src, id, part", con, params=(int(year), int(month)))
+    return pd.DataFrame({
+        "Fecha": pd.to_datetime(df["fecha"], format=_TS_FORMAT).dt.strftime("%d/%m/%Y"),
+        "Origen": df["origen"],
+        "Descripción": df["descripcion"],
+        "Categoría": df["categoria"],
+        "Monto": df["monto"].astype(float),
+    })
+
+
+_RELIABILITY_FROM = """
+FROM bitacora b LEFT JOIN maestra_activos m ON m.equipo_key = b.equipo_key
+"""
+# Master data wins over the bitácora's own type column, as in the pandas merge
+_RELIABILITY_COLS = {"tipo": "COALESCE(m.tipo, b.tipo)", "sistema": "m.sistema", "espacio": "m.espacio"}
+
+
+def _reliability_where(filters: Dict[str, Optional[List[str]]]) -> Tuple[str, list]:
+    conds, params = ["1 = 1"], []
+    for name, values in filters.items():
+        if values:
+            conds.append(f"{_RELIABILITY_COLS[name]} IN (SELECT value FROM json_each(?))")
+            params.append(json.dumps(list(values)))
+    return " AND ".join(conds), params
+
+
+def reliability_options(con: sqlite3.Connection, column: str, filters: Dict[str, Optional[List[str]]]) -> List[str]:
+    """Distinct non-null values of tipo/sistema/espacio under the filters chosen so far."""
+    where, params = _reliability_where(filters)
+    expr = _RELIABILITY_COLS[column]
+    rows = con.execute(f"SELECT DISTINCT {expr} {_RELIABILITY_FROM} WHERE {where} AND {expr} IS NOT NULL", params)
+    return sorted(r[0] for r in rows)
+
+
+def reliability_bounds(con: sqlite3.Connection, filters: Dict[str, Optional[List[str]]]) -> Tuple[Optional[datetime.date], Optional[datetime.date]]:
+    where, params = _reliability_where(filters)
+    lo, hi = con.execute(f"SELECT MIN(b.fecha), MAX(b.fecha) {_RELIABILITY_FROM} WHERE {where} AND b.fecha IS NOT NULL", params).fetchone()
+    return _to_date(lo), _to_date(hi)
+
+
+def query_reliability(con: sqlite3.Connection, start: datetime.date, end: datetime.date, filters: Dict[str, Optional[List[str]]]) -> pd.DataFrame:
+    """Bitácora rows joined with the master data, filtered in SQL."""
+    where, p1 = _reliability_where(filters)
+    rng, p2 = _range_clause("b.fecha", start, end)
+    df = pd.read_sql_query(
+        f"SELECT b.fecha, b.equipo, b.downtime_min, {_RELIABILITY_COLS['tipo']} AS tipo, m.sistema, m.espacio "
+        f"{_RELIABILITY_FROM} WHERE {where} AND {rng} ORDER BY b.id, m.id", con, params=p1 + p2)
+    df["fecha"] = pd.to_datetime(df["fecha"], format=_TS_FORMAT)
+    return df
+
+
+# --- Importer CLI ---
+
+def load_source(workspace: Path, source: str = "auto") -> Tuple[Dict[str, pd.DataFrame], str, Optional[str]]:
+    """Sheets, source label and data_version loaded as the app does (data_source.load_sheets).
+
+    "auto" uses Google Sheets when .streamlit/secrets.toml has credentials,
+    "local" only the CSV/workbook, "gsheets" fails without credentials.
+    """
+    from data_source import gsheets_credentials, load_sheets, read_secrets
+
+    creds = None if source == "local" else gsheets_credentials(read_secrets(workspace))
+    if source == "gsheets" and creds is None:
+        raise ValueError("no hay credenciales de Google Sheets en .streamlit/secrets.toml")
+    sheets, source_type, version, notices = load_sheets(workspace / "BBDD_MANTENCION.xlsm", creds)
+    for kind, text in notices:
+        print(f"{kind.upper()}: {text}")
+    if "tbl_bitacora" not in sheets:
+        raise ValueError(f"la fuente ({source_type}) no entregó tbl_bitacora")
+    return sheets, source_type, version
+
+
+def main():
+    workspace = Path(__file__).parent
+    parser = argparse.ArgumentParser(description="Importa las hojas de mantención a SQLite.")
+    parser.add_argument("--source", choices=["auto", "local", "gsheets"], default="auto")
+    parser.add_argument("--db", type=Path, default=workspace / DB_FILENAME)
+    args = parser.parse_args()
+
+    try:
+        sheets, origin, version = load_source(workspace, args.source)
+    except Exception as e:
+        print(f"ERROR al leer la fuente '{args.source}': {e}")
+        sys.exit(1)
+
+    con = connect(args.db)
+    # Stamped with the app's data_version, so the app uses the database as imported here
+    counts = import_sheets(con, sheets, version)
+    print(f"Importado desde {origin} (versión {version or 'sin snapshot'}) a {args.db}:")
+    for table, n in counts.items():
+        print(f" - {table}: {n} filas")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,7 +20,7 @@ if (-not (Test-Path ".git")) {
     exit
 }
 
-git add tbl_bitacora.csv
+git add tbl_bitacora.csv tbl_bitacora.manifest.json
 git commit -m "Actualización de datos: $(Get-Date -Format 'yyyy-MM-dd HH:mm')"
 git push
 
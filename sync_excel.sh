@@ -1,6 +1,8 @@
 #!/bin/bash
 # sync_excel.sh
 # Simple helper to upload the local Excel file to the remote VM via scp.
+# The bitácora CSV and its manifest (export_data.py) go along, so the app
+# keeps reading the CSV instead of re-parsing the workbook after the upload.
 
 if [ "$#" -lt 2 ]; then
   echo "Usage: $0 <user@host> <remote_path>"
@@ -17,7 +19,25 @@ if [ ! -f "$LOCAL_FILE" ]; then
   exit 2
 fi
 
-echo "Uploading $LOCAL_FILE to $REMOTE:$REMOTE_PATH..."
-scp "$LOCAL_FILE" "$REMOTE:$REMOTE_PATH"
-echo "Upload complete. If app caches data, restart the service on the VM:"
-echo "  ssh $REMOTE 'sudo systemctl restart streamlit-reportes.service'"
+# Upload under temporary names, then rename on the VM: the app's change
+# watcher only ever sees complete files and picks them up by itself.
+FILES=("$LOCAL_FILE")
+if python export_data.py; then
+  FILES=(tbl_bitacora.csv tbl_bitacora.manifest.json "$LOCAL_FILE")
+else
+  echo "export_data.py failed; uploading only the Excel file (the app will re-read it)."
+fi
+
+REMOTE_DIR=$(dirname "$REMOTE_PATH")
+MOVES=""
+for f in "${FILES[@]}"; do
+  if [ "$f" = "$LOCAL_FILE" ]; then DEST="$REMOTE_PATH"; else DEST="$REMOTE_DIR/$f"; fi
+  echo "Uploading $f to $REMOTE:$DEST..."
+  scp "$f" "$REMOTE:$DEST.uploading" || exit 3
+  MOVES="$MOVES mv -f '$DEST.uploading' '$DEST' &&"
+done
+ssh "$REMOTE" "$MOVES true" || exit 4
+# Precompute the default dashboard views for the new data (optional: without
+# them the app computes everything live)
+ssh "$REMOTE" "cd '$REMOTE_DIR' && .venv/bin/python precompute.py" || echo "precompute.py failed on the VM; the app will compute the views live."
+echo "Upload complete. The app reloads the data within a minute; no restart needed."